@@ -7,6 +7,8 @@ import re
 
 import config
 from ui_components import HoverButton
+from image_store import get_image_store
+from thumbnail_cache import get_thumbnail_cache
 
 class AdminPanel:
     """Admin panel for user management and application settings"""
@@ -318,6 +320,22 @@ class AdminPanel:
                                       command=self.delete_agency)
         delete_agency_btn.pack(side=tk.LEFT, padx=5)
         
+        # Image storage maintenance
+        storage_frame = ttk.LabelFrame(main_frame, text="Image Storage")
+        storage_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(storage_frame, 
+                 text=f"Remove images not used by any record (older than {config.IMAGE_GC_GRACE_DAYS} days)"
+                 ).pack(side=tk.LEFT, padx=5, pady=5)
+        
+        cleanup_btn = HoverButton(storage_frame,
+                                text="Clean Up Images",
+                                bg=config.COLORS["error"],
+                                fg=config.COLORS["button_text"],
+                                padx=5, pady=2,
+                                command=self.clean_up_images)
+        cleanup_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+        
         # Save Settings button
         save_settings_frame = ttk.Frame(main_frame)
         save_settings_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -712,6 +730,33 @@ class AdminPanel:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
     
+    def clean_up_images(self):
+        """Delete stored images that no record refers to"""
+        if not self.app or not hasattr(self.app, 'data_manager'):
+            messagebox.showerror("Error", "Records are not available")
+            return
+        
+        try:
+            store = get_image_store()
+            referenced = self.app.data_manager.get_referenced_images()
+            unused = store.collect_garbage(referenced, dry_run=True)
+            if not unused:
+                messagebox.showinfo("Image Storage", "No unused images found")
+                return
+            
+            if not messagebox.askyesno("Confirm Clean Up", 
+                                     f"Delete {len(unused)} image(s) not used by any record?"):
+                return
+            
+            removed = store.collect_garbage(referenced)
+            cache = get_thumbnail_cache()
+            for name in removed:
+                cache.remove(name)
+            messagebox.showinfo("Image Storage", f"Deleted {len(removed)} unused image(s)")
+        
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to clean up images: {str(e)}")
+    
     def hash_password(self, password):
         """Hash password using SHA-256"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -2,16 +2,24 @@ import tkinter as tk
 import os
 import datetime
 import threading
+import multiprocessing
 from tkinter import ttk, messagebox
 
 import config
-from ui_components import HoverButton, create_styles
+from ui_components import HoverButton, create_styles, when_done
 from camera import CameraView
 from main_form import MainForm
 from summary_panel import SummaryPanel
 from settings_panel import SettingsPanel
 from data_management import DataManager
 from reports import export_to_excel, export_to_pdf
+from lanes import LaneRegistry
+from auto_capture import AutoCapture
+from weighbridge_metrics import MetricsLogger
+from camera_service import stop_all_camera_services
+from report_jobs import cancel_report_jobs
+from report_scheduler import ReportScheduler
+from slip import submit_slip, prepare_slips
 from admin_panel import AdminPanel
 from app_login import LoginDialog
 from pending_vehicles_panel import PendingVehiclesPanel
@@ -36,6 +44,14 @@ class TharuniApp:
         # Initialize data manager
         self.data_manager = DataManager()
         
+        # Weighbridge lanes - one entry form, weighbridge and camera pair each
+        self.lane_registry = LaneRegistry()
+        self.active_lane = None
+        
+        # Rolling weighbridge metrics file for post-hoc analysis
+        self.metrics_logger = MetricsLogger(self.lane_registry)
+        self.metrics_logger.start()
+        
         # Initialize UI styles
         self.style = create_styles()
         
@@ -57,6 +73,13 @@ class TharuniApp:
             # Start periodic refresh for pending vehicles
             self.periodic_refresh()
             
+            # Write the scheduled daily / monthly reports in the background
+            self.report_scheduler = ReportScheduler(self.root)
+            self.report_scheduler.start()
+            
+            if config.SLIP_ENABLED:
+                prepare_slips()
+            
             # Add window close handler
             self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
@@ -84,12 +107,18 @@ class TharuniApp:
         self.notebook = ttk.Notebook(main_container)
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
         
-        # Create tabs
-        main_tab = ttk.Frame(self.notebook, style="TFrame")
-        self.notebook.add(main_tab, text="Vehicle Entry")
+        # Create tabs - one vehicle entry tab per lane
+        self.lane_tabs = {}
+        self.pending_panels = []
+        for lane in self.lane_registry:
+            main_tab = ttk.Frame(self.notebook, style="TFrame")
+            tab_text = "Vehicle Entry" if len(self.lane_registry) == 1 else f"Vehicle Entry - {lane.name}"
+            self.notebook.add(main_tab, text=tab_text)
+            self.lane_tabs[str(main_tab)] = lane
         
         summary_tab = ttk.Frame(self.notebook, style="TFrame")
         self.notebook.add(summary_tab, text="Recent Entries")
+        self.summary_tab = summary_tab
         
         settings_tab = ttk.Frame(self.notebook, style="TFrame")
         self.notebook.add(settings_tab, text="Settings")
@@ -103,7 +132,10 @@ class TharuniApp:
             self.admin_panel = AdminPanel(admin_tab, self)
         
         # Main panel with scrollable frame for small screens
-        self.create_main_panel(main_tab)
+        for tab_name, lane in self.lane_tabs.items():
+            self.create_main_panel(self.notebook.nametowidget(tab_name), lane)
+        self.active_lane = self.lane_registry.get(0)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         
         # Create summary panel
         self.summary_panel = SummaryPanel(summary_tab, self.data_manager)
@@ -111,8 +143,8 @@ class TharuniApp:
         # Create settings panel
         self.settings_panel = SettingsPanel(
             settings_tab, 
-            weighbridge_callback=self.update_weight_from_weighbridge,
-            update_cameras_callback=self.update_camera_indices
+            update_cameras_callback=self.update_camera_indices,
+            lane_registry=self.lane_registry
         )
         
         # Buttons at the bottom
@@ -194,8 +226,31 @@ class TharuniApp:
                              bg=config.COLORS["header_bg"])
         time_label.grid(row=0, column=3, sticky="w")
     
-    def create_main_panel(self, parent):
-        """Create main panel with form and pending vehicles list"""
+    @property
+    def main_form(self):
+        """Entry form of the active lane"""
+        if self.active_lane is None or self.active_lane.form is None:
+            raise AttributeError("main_form")
+        return self.active_lane.form
+    
+    @property
+    def main_forms(self):
+        """Entry forms of all lanes"""
+        return [lane.form for lane in self.lane_registry if lane.form is not None]
+    
+    def on_tab_changed(self, event=None):
+        """Track the active lane when a vehicle entry tab is selected"""
+        lane = self.lane_tabs.get(self.notebook.select())
+        if lane:
+            self.active_lane = lane
+    
+    def create_main_panel(self, parent, lane):
+        """Create main panel with form and pending vehicles list
+        
+        Args:
+            parent: Tab frame for the lane
+            lane: Lane whose weighbridge and cameras the form uses
+        """
         # Main panel to hold everything with scrollable frame for small screens
         main_panel = ttk.Frame(parent, style="TFrame")
         main_panel.pack(fill=tk.BOTH, expand=True)
@@ -227,35 +282,54 @@ class TharuniApp:
         scrollbar.pack(side="right", fill="y")
         
         # Create the main form - pass data manager for ticket lookup
-        self.main_form = MainForm(
+        main_form = MainForm(
             scrollable_frame, 
             notebook=self.notebook,
             summary_update_callback=self.update_summary,
-            data_manager=self.data_manager
+            data_manager=self.data_manager,
+            weight_state=lane.weight_state,
+            save_record_callback=lambda: self.save_record(lane.form),
+            front_camera_index=lane.settings["front_camera_index"],
+            back_camera_index=lane.settings["back_camera_index"],
+            capture_mode=lane.settings["capture_mode"],
+            front_camera_capture=lane.camera_capture_settings("front"),
+            back_camera_capture=lane.camera_capture_settings("back")
         )
+        lane.bind_form(main_form)
+        main_form.auto_capture = AutoCapture(main_form, lane)
         
         # Create the pending vehicles panel on the right
-        self.pending_vehicles = PendingVehiclesPanel(
+        pending_vehicles = PendingVehiclesPanel(
             right_panel,
             data_manager=self.data_manager,
-            on_vehicle_select=self.load_pending_vehicle
+            on_vehicle_select=lambda ticket_no: self.load_pending_vehicle(ticket_no, lane)
         )
+        self.pending_panels.append(pending_vehicles)
         
         # Configure scroll region after adding content
         scrollable_frame.update_idletasks()
         canvas.configure(scrollregion=canvas.bbox("all"))
     
-    def load_pending_vehicle(self, ticket_no):
-        """Load a pending vehicle when selected from the pending vehicles panel"""
-        if hasattr(self, 'main_form'):
-            # Switch to main tab
-            self.notebook.select(0)
+    def load_pending_vehicle(self, ticket_no, lane=None):
+        """Load a pending vehicle when selected from the pending vehicles panel
+        
+        Args:
+            ticket_no: Ticket number of the pending vehicle
+            lane: Lane whose form should load the vehicle (active lane if None)
+        """
+        lane = lane or self.active_lane
+        if lane and lane.form:
+            # Switch to the lane's entry tab
+            for tab_name, tab_lane in self.lane_tabs.items():
+                if tab_lane is lane:
+                    self.notebook.select(tab_name)
+            self.active_lane = lane
             
             # Set the ticket number in the form
-            self.main_form.rst_var.set(ticket_no)
+            lane.form.rst_var.set(ticket_no)
             
             # Trigger the ticket existence check
-            self.main_form.check_ticket_exists()
+            lane.form.check_ticket_exists()
     
     def create_buttons(self, parent):
         """Create action buttons"""
@@ -315,27 +389,29 @@ class TharuniApp:
         # Schedule next refresh
         self.root.after(60000, self.periodic_refresh)  # Refresh every minute
     
-    def update_weight_from_weighbridge(self, weight):
-        """Update weight from weighbridge"""
-        # Make the weight available to the main form
-        if hasattr(self, 'settings_panel'):
-            self.settings_panel.current_weight_var.set(f"{weight} kg")
+    def update_camera_indices(self, front_index, back_index, lane=None):
+        """Update camera indices
+        
+        Args:
+            front_index: Front camera index
+            back_index: Back camera index
+            lane: Lane whose cameras changed (active lane if None)
+        """
+        lane = lane or self.active_lane
+        if lane and lane.form:
+            form = lane.form
+            form.front_camera_index = front_index
+            form.back_camera_index = back_index
+            form.front_camera_capture = lane.camera_capture_settings("front")
+            form.back_camera_capture = lane.camera_capture_settings("back")
+            form.set_capture_mode(lane.settings["capture_mode"])
             
-        # Notify the settings panel to update its display
-        if hasattr(self, 'settings_panel'):
-            self.settings_panel.update_weight_display(weight)
-    
-    def update_camera_indices(self, front_index, back_index):
-        """Update camera indices"""
-        if hasattr(self, 'main_form'):
-            # Stop cameras if running
-            if hasattr(self.main_form, 'front_camera'):
-                self.main_form.front_camera.stop_camera()
-                self.main_form.front_camera.camera_index = front_index
+            # Stop previews and switch the camera services
+            if hasattr(form, 'front_camera'):
+                form.front_camera.set_camera_index(front_index, form.front_camera_capture)
             
-            if hasattr(self.main_form, 'back_camera'):
-                self.main_form.back_camera.stop_camera()
-                self.main_form.back_camera.camera_index = back_index
+            if hasattr(form, 'back_camera'):
+                form.back_camera.set_camera_index(back_index, form.back_camera_capture)
     
     def update_form_options(self, site_names=None, agency_names=None):
         """Update form dropdown options from admin settings"""
@@ -345,11 +421,11 @@ class TharuniApp:
             site_names = settings.get('site_names', ['Guntur'])
             agency_names = settings.get('agency_names', [])
         
-        # Update main form if it exists
-        if hasattr(self, 'main_form'):
+        # Update the entry form of every lane
+        for form in self.main_forms:
             # Look for the form_frame (LabelFrame containing form components)
             form_frame = None
-            for child in self.main_form.parent.winfo_children():
+            for child in form.parent.winfo_children():
                 if isinstance(child, ttk.LabelFrame) and "Vehicle Information" in child.cget("text"):
                     form_frame = child
                     break
@@ -367,11 +443,11 @@ class TharuniApp:
                                 widget['values'] = tuple(site_names)
                                 
                                 # Store reference to this combo box
-                                self.main_form.site_combo = widget
+                                form.site_combo = widget
                                 
                                 # Set to first site if current value not in list
-                                if self.main_form.site_var.get() not in site_names and site_names:
-                                    self.main_form.site_var.set(site_names[0])
+                                if form.site_var.get() not in site_names and site_names:
+                                    form.site_var.set(site_names[0])
                                 
                                 break
                         
@@ -380,7 +456,7 @@ class TharuniApp:
                             for widget in form_inner.grid_slaves(row=1, column=1):
                                 if isinstance(widget, ttk.Entry) or isinstance(widget, ttk.Combobox):
                                     # Get current value
-                                    current_value = self.main_form.agency_var.get()
+                                    current_value = form.agency_var.get()
                                     
                                     # If entry, convert to combobox
                                     if isinstance(widget, ttk.Entry):
@@ -390,40 +466,55 @@ class TharuniApp:
                                         # Create combobox
                                         agency_combo = ttk.Combobox(
                                             form_inner, 
-                                            textvariable=self.main_form.agency_var,
+                                            textvariable=form.agency_var,
                                             values=tuple(agency_names),
                                             width=config.STD_WIDTH
                                         )
                                         agency_combo.grid(row=1, column=1, sticky=tk.W, padx=3, pady=3)
                                         
                                         # Store reference
-                                        self.main_form.agency_combo = agency_combo
+                                        form.agency_combo = agency_combo
                                     else:
                                         # Just update values for existing combobox
                                         widget['values'] = tuple(agency_names)
-                                        self.main_form.agency_combo = widget
+                                        form.agency_combo = widget
                                     
                                     # Restore value if in new list
                                     if current_value in agency_names:
-                                        self.main_form.agency_var.set(current_value)
+                                        form.agency_var.set(current_value)
                                     elif agency_names:
-                                        self.main_form.agency_var.set(agency_names[0])
+                                        form.agency_var.set(agency_names[0])
                                     
                                     break
                         
                         break
     
-    def save_record(self):
-        """Save current record to database"""
+    def save_record(self, form=None):
+        """Save current record to database
+        
+        Args:
+            form: Entry form to save (active lane's form if None)
+        """
+        form = form or self.main_form
+        
+        # Wait for images still being written, so the record gets their paths
+        if form.pending_image_saves:
+            form.when_images_saved(lambda: self.save_record(form))
+            return
+        
         # Validate form first
-        if not self.main_form.validate_form():
+        if not form.validate_form():
             return
         
         # Get form data
-        record_data = self.main_form.get_form_data()
+        record_data = form.get_form_data()
         
         # Save to database
         if self.data_manager.save_record(record_data):
+            # Slip for the completed weighment, written while the message shows
+            if config.SLIP_ENABLED and record_data.get('second_weight') and record_data.get('second_timestamp'):
+                self.print_slip(record_data)
+            
             # Show success message
             if record_data.get('second_weight') and record_data.get('second_timestamp'):
                 # Both weighments complete
@@ -437,66 +528,80 @@ class TharuniApp:
             self.update_pending_vehicles()
             
             # Generate a new ticket number for the next entry
-            self.main_form.generate_next_ticket_number()
+            form.generate_next_ticket_number()
             
             # If second weighment is done, clear form for next entry
             if record_data.get('second_weight') and record_data.get('second_timestamp'):
-                self.clear_form()
+                form.clear_form()
                 # Switch to summary tab
-                self.notebook.select(1)
+                self.notebook.select(self.summary_tab)
             else:
                 # For first weighment, just clear the vehicle number and images
                 # but keep the ticket number and agency information
-                self.main_form.vehicle_var.set("")
-                self.main_form.front_image_path = None
-                self.main_form.back_image_path = None
-                self.main_form.front_image_status_var.set("Front: ✗")
-                self.main_form.back_image_status_var.set("Back: ✗")
-                self.main_form.front_image_status.config(foreground="red")
-                self.main_form.back_image_status.config(foreground="red")
+                form.vehicle_var.set("")
+                form.front_image_path = None
+                form.back_image_path = None
+                form.front_image_status_var.set("Front: ✗")
+                form.back_image_status_var.set("Back: ✗")
+                form.front_image_status.config(foreground="red")
+                form.back_image_status.config(foreground="red")
                 
                 # Reset camera displays if they were used
-                if hasattr(self.main_form, 'front_camera'):
-                    self.main_form.front_camera.stop_camera()
-                    self.main_form.front_camera.captured_image = None
-                    self.main_form.front_camera.canvas.delete("all")
-                    self.main_form.front_camera.canvas.create_text(75, 60, text="Click Capture", fill="white", justify=tk.CENTER)
-                    self.main_form.front_camera.capture_button.config(text="Capture")
+                if hasattr(form, 'front_camera'):
+                    form.front_camera.stop_camera()
+                    form.front_camera.captured_image = None
+                    form.front_camera.canvas.delete("all")
+                    form.front_camera.canvas.create_text(75, 60, text="Click Capture", fill="white", justify=tk.CENTER)
+                    form.front_camera.capture_button.config(text="Capture")
                     
-                if hasattr(self.main_form, 'back_camera'):
-                    self.main_form.back_camera.stop_camera()
-                    self.main_form.back_camera.captured_image = None
-                    self.main_form.back_camera.canvas.delete("all")
-                    self.main_form.back_camera.canvas.create_text(75, 60, text="Click Capture", fill="white", justify=tk.CENTER)
-                    self.main_form.back_camera.capture_button.config(text="Capture")
+                if hasattr(form, 'back_camera'):
+                    form.back_camera.stop_camera()
+                    form.back_camera.captured_image = None
+                    form.back_camera.canvas.delete("all")
+                    form.back_camera.canvas.create_text(75, 60, text="Click Capture", fill="white", justify=tk.CENTER)
+                    form.back_camera.capture_button.config(text="Capture")
                 
                 # Reset weighment state for next entry
-                self.main_form.current_weighment = "first"
-                self.main_form.first_weight_var.set("")
-                self.main_form.first_timestamp_var.set("")
-                self.main_form.second_weight_var.set("")
-                self.main_form.second_timestamp_var.set("")
-                self.main_form.net_weight_var.set("")
-                self.main_form.first_weighment_btn.config(state=tk.NORMAL)
-                self.main_form.second_weighment_btn.config(state=tk.DISABLED)
+                form.current_weighment = "first"
+                form.first_weight_var.set("")
+                form.first_timestamp_var.set("")
+                form.second_weight_var.set("")
+                form.second_timestamp_var.set("")
+                form.net_weight_var.set("")
+                form.first_weighment_btn.config(state=tk.NORMAL)
+                form.second_weighment_btn.config(state=tk.DISABLED)
                 
         else:
             messagebox.showerror("Error", "Failed to save record.")
     
+    def print_slip(self, record):
+        """Write the weighment slip for a completed record in the background
+        
+        Args:
+            record: Record dictionary that was saved
+        """
+        def written(future):
+            try:
+                print(f"Slip written: {future.result()}")
+            except Exception as e:
+                print(f"Error writing slip: {str(e)}")
+        
+        when_done(self.root, submit_slip(record), written)
+    
     def update_summary(self):
         """Update the summary view"""
         if hasattr(self, 'summary_panel'):
             self.summary_panel.update_summary()
     
     def update_pending_vehicles(self):
-        """Update the pending vehicles panel"""
-        if hasattr(self, 'pending_vehicles'):
-            self.pending_vehicles.refresh_pending_list()
+        """Update the pending vehicles panels"""
+        for pending_vehicles in getattr(self, 'pending_panels', []):
+            pending_vehicles.refresh_pending_list()
     
     def view_records(self):
         """View all records in a separate window"""
         # Switch to the summary tab
-        self.notebook.select(1)
+        self.notebook.select(self.summary_tab)
         
         # Refresh the summary
         self.update_summary()
@@ -531,12 +636,20 @@ class TharuniApp:
         """Handle application closing"""
         try:
             # Clean up resources
-            if hasattr(self, 'main_form'):
-                self.main_form.on_closing()
+            for form in self.main_forms:
+                form.on_closing()
             
             if hasattr(self, 'settings_panel'):
                 self.settings_panel.on_closing()
             
+            self.metrics_logger.stop()
+            stop_all_camera_services()
+            cancel_report_jobs()
+            if hasattr(self, 'data_manager'):
+                self.data_manager.rollups.flush()
+            if hasattr(self, 'report_scheduler'):
+                self.report_scheduler.stop()
+            
             # Close the application
             self.root.destroy()
         except Exception as e:
@@ -545,6 +658,9 @@ class TharuniApp:
 
 # Main entry point
 if __name__ == "__main__":
+    # Needed for the report process in a frozen Windows build
+    multiprocessing.freeze_support()
+    
     # Create root window
     root = tk.Tk()
     
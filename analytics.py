@@ -0,0 +1,506 @@
+import io
+import os
+import csv
+import mmap
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# CSV columns the analytics read, with their parsed types
+WEIGHT_COLUMNS = {'First Weight': 'first_weight', 'Second Weight': 'second_weight', 'Net Weight': 'net_weight'}
+TIME_COLUMNS = {'First Timestamp': 'first_time', 'Second Timestamp': 'second_time'}
+LABEL_COLUMNS = {'Site Name': 'site', 'Agency Name': 'agency', 'Material': 'material', 'Vehicle No': 'vehicle'}
+
+# Robust z-score above which a weighment is flagged
+OUTLIER_THRESHOLD = 3.5
+
+# Rows are cached in blocks of about this many CSV bytes; an edit makes the
+# block it falls in, and every later one, be parsed again
+CACHE_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Cache arrays describing the blocks rather than holding rows
+CACHE_BLOCK_KEYS = ('block_end', 'block_rows', 'block_crc')
+
+
+def parse_timestamps(values):
+    """Parse "DD-MM-YYYY HH:MM:SS" strings without a Python loop
+    
+    The strings are viewed as a byte matrix and the digits combined column
+    by column, which is far faster than strptime or pd.to_datetime with a
+    format.
+    
+    Args:
+        values: Array-like of strings (missing values may be NaN or '')
+    
+    Returns:
+        numpy.ndarray: datetime64[s], NaT where a value is missing or malformed
+    """
+    text = pd.Series(values, dtype=object).fillna('').to_numpy(dtype='S19')
+    if len(text) == 0:
+        return np.array([], dtype='datetime64[s]')
+    chars = text.view(np.uint8).reshape(len(text), 19).astype(np.int32)
+    digits = chars - ord('0')
+    
+    def number(start, end):
+        result = np.zeros(len(text), dtype=np.int64)
+        for column in range(start, end):
+            result = result * 10 + digits[:, column]
+        return result
+    
+    digit_columns = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18]
+    valid = ((digits[:, digit_columns] >= 0) & (digits[:, digit_columns] <= 9)).all(axis=1)
+    valid &= (chars[:, 2] == ord('-')) & (chars[:, 5] == ord('-')) & (chars[:, 10] == ord(' '))
+    valid &= (chars[:, 13] == ord(':')) & (chars[:, 16] == ord(':'))
+    
+    year, month, day = number(6, 10), number(3, 5), number(0, 2)
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    year, month, day = np.where(valid, year, 1970), np.where(valid, month, 1), np.where(valid, day, 1)
+    
+    dates = ((year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1)).astype('datetime64[D]')
+    times = (dates + (day - 1)).astype('datetime64[s]')
+    times = times + (number(11, 13) * 3600 + number(14, 16) * 60 + number(17, 19)).astype('timedelta64[s]')
+    times[~valid] = np.datetime64('NaT')
+    return times
+
+
+def parse_dates(values):
+    """Parse "DD-MM-YYYY" strings
+    
+    Returns:
+        numpy.ndarray: datetime64[D], NaT where missing or malformed
+    """
+    text = pd.Series(values, dtype=object).fillna('').astype(str)
+    return parse_timestamps((text + " 00:00:00").to_numpy()).astype('datetime64[D]')
+
+
+class WeighmentArrays:
+    """Weighment history as typed NumPy columns
+    
+    Weights are float64 with NaN where missing, timestamps datetime64[s]
+    with NaT, and the record date datetime64[D]. Site, agency, material and
+    vehicle are stored as integer codes into sorted label arrays, so grouping
+    is a bincount or a groupby on integers.
+    """
+    
+    def __init__(self, columns, labels):
+        """Initialize weighment arrays
+        
+        Args:
+            columns: Dict of equal-length arrays - day, the WEIGHT_COLUMNS and
+                TIME_COLUMNS names, and a <name>_code array per LABEL_COLUMNS name
+            labels: Dict of label arrays per LABEL_COLUMNS name
+        """
+        self.columns = columns
+        self.labels = labels
+    
+    def __len__(self):
+        return len(self.columns['day'])
+    
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+    
+    def label(self, name, codes):
+        """Get the labels of codes from one of the label columns"""
+        return self.labels[name][codes]
+    
+    @property
+    def completed(self):
+        """Mask of weighments with both weights and timestamps"""
+        return (~np.isnan(self.first_weight) & ~np.isnan(self.second_weight)
+                & ~np.isnat(self.first_time) & ~np.isnat(self.second_time))
+    
+    @property
+    def tare(self):
+        """Empty vehicle weight - the lighter of the two weighments"""
+        return np.fmin(self.first_weight, self.second_weight) if len(self) else self.first_weight
+    
+    def take(self, mask):
+        """Get the rows selected by a boolean mask or index array
+        
+        Returns:
+            WeighmentArrays: Subset sharing the label arrays
+        """
+        return WeighmentArrays({name: values[mask] for name, values in self.columns.items()}, self.labels)
+    
+    def select(self, query):
+        """Get the rows matching a ReportQuery
+        
+        Returns:
+            WeighmentArrays: Matching rows (self if the query is empty)
+        """
+        if query is None or query.is_empty:
+            return self
+        mask = np.ones(len(self), dtype=bool)
+        if query.start_date:
+            mask &= self.day >= np.datetime64(query.start_date, 'D')
+        if query.end_date:
+            mask &= self.day <= np.datetime64(query.end_date, 'D')
+        for name, value in (('site', query.site_name), ('agency', query.agency_name),
+                            ('material', query.material)):
+            if value:
+                matches = np.flatnonzero(self.labels[name] == value)
+                mask &= np.isin(self.columns[f"{name}_code"], matches)
+        if query.completed_only:
+            mask &= self.completed
+        return self.take(mask)
+    
+    def save(self, path):
+        """Write the arrays to an uncompressed .npz file"""
+        arrays = dict(self.columns)
+        arrays.update({f"{name}_labels": values for name, values in self.labels.items()})
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path):
+        """Read arrays written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            labels = {name: data[f"{name}_labels"] for name in LABEL_COLUMNS.values()}
+            columns = {name: data[name] for name in data.files if not name.endswith("_labels")}
+        return cls(columns, labels)
+
+
+def parse_rows(data, names):
+    """Parse CSV rows into typed arrays
+    
+    Only the needed columns are read; weights are parsed by the CSV reader
+    as floats and label columns as categories.
+    
+    Args:
+        data: CSV rows as bytes, without the header line
+        names: Column names from the header line
+    
+    Returns:
+        WeighmentArrays: The parsed rows
+    """
+    dtypes = {name: 'float64' for name in WEIGHT_COLUMNS}
+    dtypes.update({name: 'category' for name in LABEL_COLUMNS})
+    dtypes.update({'Date': 'category'})
+    dtypes.update({name: object for name in TIME_COLUMNS})
+    
+    usecols = ['Date'] + list(WEIGHT_COLUMNS) + list(TIME_COLUMNS) + list(LABEL_COLUMNS)
+    
+    def read(dtypes):
+        return pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=usecols,
+                           dtype=dtypes, on_bad_lines='skip')
+    
+    try:
+        frame = read(dtypes)
+    except ValueError:
+        # A weight that is not a number - parse those columns leniently
+        dtypes.update({name: object for name in WEIGHT_COLUMNS})
+        frame = read(dtypes)
+        for column in WEIGHT_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    
+    # Few distinct dates - parse the categories and expand by code (-1, missing, picks the NaT)
+    dates = frame['Date'].cat
+    parsed = np.append(parse_dates(dates.categories.to_numpy()), np.datetime64('NaT', 'D'))
+    columns = {'day': parsed[dates.codes.to_numpy()]}
+    
+    for column, name in WEIGHT_COLUMNS.items():
+        columns[name] = frame[column].to_numpy(dtype=np.float64)
+    for column, name in TIME_COLUMNS.items():
+        columns[name] = parse_timestamps(frame[column].to_numpy())
+    
+    labels = {}
+    for column, name in LABEL_COLUMNS.items():
+        categories = frame[column].cat
+        labels[name] = np.append(categories.categories.to_numpy(dtype=str), '')
+        codes = categories.codes.to_numpy().astype(np.int32)
+        codes[codes < 0] = len(labels[name]) - 1  # Missing -> ''
+        columns[f"{name}_code"] = codes
+    return WeighmentArrays(columns, labels)
+
+
+def concat_weighments(parts):
+    """Join WeighmentArrays end to end, merging their label arrays
+    
+    Returns:
+        WeighmentArrays: All rows, with sorted labels shared by every part
+    """
+    if len(parts) == 1:
+        return parts[0]
+    labels = {name: np.unique(np.concatenate([part.labels[name] for part in parts]))
+              for name in LABEL_COLUMNS.values()}
+    columns = {}
+    for key in parts[0].columns:
+        name = key[:-len("_code")] if key.endswith("_code") else None
+        if name in labels:
+            # Codes into each part's labels -> codes into the merged labels
+            values = [np.searchsorted(labels[name], part.labels[name]).astype(np.int32)[part.columns[key]]
+                      for part in parts]
+        else:
+            values = [part.columns[key] for part in parts]
+        columns[key] = np.concatenate(values)
+    return WeighmentArrays(columns, labels)
+
+
+def split_blocks(data, start, end, size=None):
+    """Cut a byte range into blocks of about size bytes ending at line ends
+    
+    Returns:
+        list: Block end offsets; the last is end
+    """
+    size = size or CACHE_BLOCK_BYTES
+    ends = []
+    while start < end:
+        cut = data.find(b'\n', min(start + size, end) - 1, end)
+        start = end if cut < 0 else cut + 1
+        ends.append(start)
+    return ends
+
+
+def read_weighments(data_file=None):
+    """Parse the weighment CSV into typed arrays
+    
+    Args:
+        data_file: CSV file (defaults to config.DATA_FILE)
+    
+    Returns:
+        WeighmentArrays: Every record in the file
+    """
+    with open(data_file or config.DATA_FILE, 'rb') as f:
+        header = f.readline()
+        data = f.read()
+    
+    # Whole rows only - a record may be half written
+    return parse_rows(data[:data.rfind(b'\n') + 1], header_names(header))
+
+
+def header_names(header):
+    """Column names from the CSV header line"""
+    return next(csv.reader([header.decode('utf-8', 'replace')]), [])
+
+
+def load_weighments(data_file=None, cache_file=None):
+    """Get the weighment history as arrays, using the columnar cache if current
+    
+    Parsing a million-row CSV takes a couple of seconds, so the parsed
+    arrays are saved next to it along with a checksum of each block of
+    about CACHE_BLOCK_BYTES the rows came from. On the next load the
+    blocks are checked against the file: rows from unchanged blocks are
+    reused and only what follows the first changed block - usually just the
+    rows appended since, or a pending record completed near the end - is
+    parsed. The whole file is parsed again only if its header changed.
+    
+    Args:
+        data_file: CSV file (defaults to config.DATA_FILE)
+        cache_file: Array cache (defaults to config.ANALYTICS_CACHE_FILE; '' disables)
+    
+    Returns:
+        WeighmentArrays: Every record in the file
+    """
+    data_file = data_file or config.DATA_FILE
+    cache_file = config.ANALYTICS_CACHE_FILE if cache_file is None else cache_file
+    
+    # Mapped rather than read - checksumming the mapping avoids copying the file
+    with open(data_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        try:
+            return _load_blocks(data, view, cache_file)
+        finally:
+            view.release()
+
+
+def _load_blocks(data, view, cache_file):
+    """load_weighments() on the mapped CSV
+    
+    Args:
+        data: mmap of the CSV
+        view: memoryview of data, for checksums without copies
+        cache_file: Array cache ('' disables)
+    """
+    # Whole rows only - a record may be half written
+    end = data.rfind(b'\n') + 1
+    header_end = data.find(b'\n') + 1
+    
+    # Blocks as (end offset, rows before the end, crc32); the first is the header
+    blocks = []
+    cached = None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            cached = WeighmentArrays.load(cache_file)
+            cached_blocks = zip(*(cached.columns.pop(key).tolist() for key in CACHE_BLOCK_KEYS))
+            block_start = 0
+            for block_end, rows, crc in cached_blocks:
+                if block_end > end or zlib.crc32(view[block_start:block_end]) != crc:
+                    break
+                blocks.append((block_end, rows, crc))
+                block_start = block_end
+            if blocks and blocks[-1][1] > len(cached):
+                raise ValueError("cache holds fewer rows than its blocks")
+        except Exception as e:
+            print(f"Analytics cache error: {str(e)}")
+            cached, blocks = None, []
+    
+    if not blocks or blocks[0][0] != header_end:
+        blocks = [(header_end, 0, zlib.crc32(view[:header_end]))]
+    kept_end, kept_rows = blocks[-1][0], blocks[-1][1]
+    if cached is not None and kept_end == end and kept_rows == len(cached):
+        return cached
+    
+    # Keep the rows of the unchanged blocks and parse the rest
+    parts = [cached.take(slice(0, kept_rows))] if cached is not None and kept_rows else []
+    names = header_names(data[:header_end])
+    block_start = kept_end
+    rows = kept_rows
+    for block_end in split_blocks(data, kept_end, end):
+        part = parse_rows(data[block_start:block_end], names)
+        parts.append(part)
+        rows += len(part)
+        blocks.append((block_end, rows, zlib.crc32(view[block_start:block_end])))
+        block_start = block_end
+    result = concat_weighments(parts) if parts else parse_rows(b'', names)
+    
+    # A few new rows are cheaper to parse again next time than to save
+    if cache_file and (not kept_rows or end - kept_end >= CACHE_BLOCK_BYTES):
+        # Rows appended a few at a time would leave a long tail of tiny blocks
+        while len(blocks) > 2 and blocks[-1][0] - blocks[-3][0] <= CACHE_BLOCK_BYTES:
+            block_end, rows, _ = blocks.pop()
+            blocks[-1] = (block_end, rows, zlib.crc32(view[blocks[-2][0]:block_end]))
+        try:
+            for key, values in zip(CACHE_BLOCK_KEYS, zip(*blocks)):
+                result.columns[key] = np.array(values, dtype=np.int64)
+            result.save(cache_file)
+        except Exception as e:
+            print(f"Analytics cache error: {str(e)}")
+        finally:
+            for key in CACHE_BLOCK_KEYS:
+                result.columns.pop(key, None)
+    return result
+
+
+def throughput_per_hour(data):
+    """Completed weighments and tonnage by hour of day
+    
+    Args:
+        data: WeighmentArrays
+    
+    Returns:
+        pandas.DataFrame: Indexed by hour 0-23 with trips, trips_per_day
+            (over days with any completed weighment) and net_tonnes
+    """
+    done = data.take(data.completed)
+    hours = ((done.second_time - done.second_time.astype('datetime64[D]')).astype(np.int64) // 3600).astype(np.int64)
+    trips = np.bincount(hours, minlength=24)[:24]
+    tonnes = np.bincount(hours, weights=np.nan_to_num(done.net_weight), minlength=24)[:24] / 1000.0
+    days = max(1, len(np.unique(done.second_time.astype('datetime64[D]'))))
+    return pd.DataFrame({'trips': trips, 'trips_per_day': trips / days, 'net_tonnes': tonnes},
+                        index=pd.RangeIndex(24, name='hour'))
+
+
+def turnaround_minutes(data):
+    """Minutes between the first and second weighment of each record
+    
+    Returns:
+        numpy.ndarray: float64 minutes, NaN if incomplete or out of order
+    """
+    minutes = (data.second_time - data.first_time).astype('timedelta64[s]').astype(np.float64) / 60.0
+    minutes[np.isnat(data.first_time) | np.isnat(data.second_time) | (minutes < 0)] = np.nan
+    return minutes
+
+
+def turnaround_by(data, name='agency'):
+    """Turnaround statistics per agency, material, site or vehicle
+    
+    Returns:
+        pandas.DataFrame: Indexed by label with trips, median, p90 and mean minutes
+    """
+    minutes = turnaround_minutes(data)
+    valid = ~np.isnan(minutes)
+    frame = pd.DataFrame({'code': data.columns[f"{name}_code"][valid], 'minutes': minutes[valid]})
+    grouped = frame.groupby('code')['minutes']
+    result = pd.DataFrame({'trips': grouped.size(), 'median': grouped.median(),
+                           'p90': grouped.quantile(0.9), 'mean': grouped.mean()})
+    result.index = data.labels[name][result.index.to_numpy()]
+    result.index.name = name
+    return result
+
+
+def tare_drift(data, min_trips=3):
+    """How far each vehicle's latest tare is from its usual tare
+    
+    Args:
+        data: WeighmentArrays
+        min_trips: Vehicles with fewer completed trips are left out
+    
+    Returns:
+        pandas.DataFrame: Indexed by vehicle with trips, median_tare,
+            latest_tare, drift (latest - median, kg) and tare_range, sorted
+            by absolute drift
+    """
+    done = data.take(data.completed)
+    order = np.lexsort((done.second_time, done.vehicle_code))
+    frame = pd.DataFrame({'vehicle': done.vehicle_code[order], 'tare': done.tare[order]})
+    grouped = frame.groupby('vehicle')['tare']
+    result = pd.DataFrame({'trips': grouped.size(), 'median_tare': grouped.median(),
+                           'latest_tare': grouped.last(), 'tare_range': grouped.max() - grouped.min()})
+    result['drift'] = result['latest_tare'] - result['median_tare']
+    result = result[result['trips'] >= min_trips]
+    result.index = data.labels['vehicle'][result.index.to_numpy()]
+    result.index.name = 'vehicle'
+    return result.reindex(result['drift'].abs().sort_values(ascending=False).index)
+
+
+def robust_z(values, codes):
+    """Robust z-score of each value within its group
+    
+    Uses the median and the median absolute deviation, so a few extreme
+    values do not hide themselves by inflating the spread.
+    
+    Args:
+        values: float64 array
+        codes: Group code of each value
+    
+    Returns:
+        numpy.ndarray: 0.6745 * (value - median) / MAD, NaN where MAD is 0
+    """
+    frame = pd.DataFrame({'code': codes, 'value': values})
+    median = frame.groupby('code')['value'].transform('median').to_numpy()
+    deviation = np.abs(values - median)
+    mad = pd.Series(deviation).groupby(codes).transform('median').to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = 0.6745 * (values - median) / mad
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+
+def outliers(data, threshold=OUTLIER_THRESHOLD):
+    """Flag completed weighments with an unusual net weight or tare
+    
+    Net weight is compared within its material, tare within its vehicle.
+    
+    Args:
+        data: WeighmentArrays
+        threshold: Robust z-score above which a weighment is flagged
+    
+    Returns:
+        pandas.DataFrame: Flagged weighments with time, vehicle, agency,
+            material, net_weight, tare, net_z and tare_z, most extreme first
+    """
+    done = data.take(data.completed)
+    net_z = robust_z(done.net_weight, done.material_code)
+    tare_z = robust_z(done.tare, done.vehicle_code)
+    flagged = (np.abs(np.nan_to_num(net_z)) > threshold) | (np.abs(np.nan_to_num(tare_z)) > threshold)
+    
+    index = np.flatnonzero(flagged)
+    result = pd.DataFrame({
+        'time': done.second_time[index],
+        'vehicle': done.label('vehicle', done.vehicle_code[index]),
+        'agency': done.label('agency', done.agency_code[index]),
+        'material': done.label('material', done.material_code[index]),
+        'net_weight': done.net_weight[index],
+        'tare': done.tare[index],
+        'net_z': net_z[index],
+        'tare_z': tare_z[index]
+    })
+    severity = np.fmax(np.abs(result['net_z'].to_numpy()), np.abs(result['tare_z'].to_numpy()))
+    return result.iloc[np.argsort(-np.nan_to_num(severity), kind='stable')].reset_index(drop=True)
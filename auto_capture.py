@@ -0,0 +1,131 @@
+import time
+from collections import deque
+
+import config
+
+
+class AutoCapture:
+    """Captures a weighment automatically once the lane's weight has settled
+    
+    Polls the lane's WeightState from the Tk thread. When the weight has been
+    stable and above the minimum for long enough and the form has a ticket
+    loaded, the pending weighment is captured (which also triggers both cameras).
+    The deck must empty (weight below the re-arm threshold) before the next
+    automatic capture, and each ticket/weighment pair is captured only once.
+    """
+    
+    def __init__(self, form, lane):
+        """Initialize auto capture
+        
+        Args:
+            form: MainForm to capture weighments on
+            lane: Lane providing the weight state and thresholds
+        """
+        self.form = form
+        self.lane = lane
+        self.armed = True
+        self.stable_since = None
+        self.captured = deque(maxlen=50)
+        
+        self.poll()
+    
+    @property
+    def enabled(self):
+        """True if auto capture is switched on for the lane"""
+        return bool(self.lane.settings.get("auto_capture", config.AUTO_CAPTURE_ENABLED))
+    
+    def disarm(self):
+        """Block automatic capture until the deck has emptied"""
+        self.armed = False
+        self.stable_since = None
+    
+    def poll(self):
+        """Check the latest reading and capture if all conditions are met"""
+        if not self.form.parent.winfo_exists():
+            return
+        
+        try:
+            self.check_reading()
+        except Exception as e:
+            print(f"Auto capture error: {str(e)}")
+        
+        self.form.parent.after(config.AUTO_CAPTURE_POLL_MS, self.poll)
+    
+    def check_reading(self):
+        """Evaluate the latest reading against the capture conditions"""
+        if not self.enabled:
+            self.stable_since = None
+            self.set_status("")
+            return
+        
+        settings = self.lane.settings
+        min_weight = float(settings.get("auto_capture_min_weight", config.AUTO_CAPTURE_MIN_WEIGHT))
+        stable_seconds = float(settings.get("auto_capture_stable_seconds", config.AUTO_CAPTURE_STABLE_SECONDS))
+        rearm_weight = float(settings.get("auto_capture_rearm_weight", config.AUTO_CAPTURE_REARM_WEIGHT))
+        
+        reading = self.lane.weight_state.snapshot()
+        now = time.time()
+        is_fresh = reading.seq and now - reading.timestamp <= config.WEIGHT_STALE_SECONDS
+        
+        if not reading.connected or not is_fresh:
+            self.stable_since = None
+            self.set_status("Auto capture: waiting for weighbridge")
+            return
+        
+        # Deck emptied - allow the next capture
+        if reading.weight < rearm_weight:
+            self.armed = True
+        
+        if not reading.stable or reading.weight < min_weight:
+            self.stable_since = None
+            self.set_status("Auto capture: armed" if self.armed else "Auto capture: waiting for empty deck")
+            return
+        
+        if self.stable_since is None:
+            self.stable_since = now
+        if not self.armed or now - self.stable_since < stable_seconds:
+            return
+        
+        key = self.pending_weighment()
+        if key is None or key in self.captured:
+            return
+        
+        # Guard against double capture before calling into the form (its
+        # message boxes run the event loop, and with it this poll)
+        self.captured.append(key)
+        self.disarm()
+        self.set_status("Auto capture: captured")
+        
+        if key[1] == "first":
+            captured = self.form.capture_first_weighment()
+        else:
+            captured = self.form.capture_second_weighment()
+        
+        if not captured:
+            # Rejected by the form - try again after another stable period
+            self.captured.remove(key)
+            self.armed = True
+            self.stable_since = time.time()
+            self.set_status("Auto capture: armed")
+    
+    def pending_weighment(self):
+        """Get the weighment the form is waiting for
+        
+        Returns:
+            tuple: (ticket_no, "first" or "second") or None if no ticket is loaded
+        """
+        form = self.form
+        ticket_no = form.rst_var.get().strip()
+        if not (ticket_no and form.vehicle_var.get().strip() and form.agency_var.get().strip()):
+            return None
+        
+        if form.current_weighment == "first" and form.first_weighment_btn["state"] != "disabled":
+            return ticket_no, "first"
+        if form.current_weighment == "second" and form.second_weighment_btn["state"] != "disabled":
+            return ticket_no, "second"
+        return None
+    
+    def set_status(self, text):
+        """Show auto capture status on the form"""
+        if self.form.auto_capture_status_var.get() != text:
+            self.form.auto_capture_status_var.set(text)
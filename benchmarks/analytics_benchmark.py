@@ -0,0 +1,116 @@
+"""Analytics benchmark over a synthetic weighment history
+
+Writes a CSV with the application's columns, then times parsing it, loading
+the columnar cache - unchanged, after a row is appended and after a pending
+row near the end is completed, as happens on a live site - and each
+analytics aggregate. A load after such a change plus the aggregates should
+take well under a second for a million rows.
+
+Usage:
+    python benchmarks/analytics_benchmark.py [--rows N]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import analytics
+
+
+def make_history(path, rows, seed=1):
+    """Write a synthetic history: 500 vehicles, 7 agencies, 10% still pending"""
+    rng = np.random.default_rng(seed)
+    first = np.datetime64('2024-01-01T06:00:00') + np.arange(rows) * np.timedelta64(30, 's')
+    second = first + rng.integers(10, 90, rows) * np.timedelta64(60, 's')
+    vehicle = rng.integers(0, 500, rows)
+    tare = 8000 + vehicle * 10 + rng.integers(-100, 100, rows)
+    net = rng.integers(5000, 20000, rows)
+    net[rng.integers(0, rows, 20)] *= 5  # A few overloaded trucks to flag
+    pending = rng.random(rows) < 0.1
+    
+    def stamp(times):
+        text = pd.Series(times).dt.strftime("%d-%m-%Y %H:%M:%S")
+        return text
+    
+    first_text, second_text = stamp(first), stamp(second)
+    frame = pd.DataFrame({
+        'Date': first_text.str[:10],
+        'Time': first_text.str[11:],
+        'Site Name': 'Guntur',
+        'Agency Name': pd.Series(rng.integers(0, 7, rows)).map(lambda i: f"Agency {i}"),
+        'Material': pd.Series(rng.integers(0, 4, rows)).map(lambda i: f"Material {i}"),
+        'Ticket No': np.arange(rows),
+        'Vehicle No': pd.Series(vehicle).map(lambda i: f"AP07TX{i:04d}"),
+        'Transfer Party Name': '',
+        'First Weight': tare + net,
+        'First Timestamp': first_text,
+        'Second Weight': np.where(pending, '', tare.astype(str)),
+        'Second Timestamp': np.where(pending, '', second_text),
+        'Net Weight': np.where(pending, '', net.astype(str)),
+        'Material Type': 'Wet',
+        'Front Image': '',
+        'Back Image': ''
+    }, columns=config.CSV_HEADER)
+    frame.to_csv(path, index=False)
+
+
+def timed(name, function, *args):
+    """Run a function once and print how long it took"""
+    started = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {elapsed * 1000.0:9.1f} ms")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the weighment analytics")
+    parser.add_argument("--rows", type=int, default=1000000, help="Rows in the synthetic history")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        data_file = os.path.join(folder, "history.csv")
+        cache_file = os.path.join(folder, "analytics_cache.npz")
+        
+        print(f"Writing {args.rows:,} rows...")
+        make_history(data_file, args.rows)
+        print(f"CSV size {os.path.getsize(data_file) / 1e6:.0f} MB\n")
+        
+        timed("Parse CSV (cold)", analytics.load_weighments, data_file, cache_file)
+        timed("Load columnar cache", analytics.load_weighments, data_file, cache_file)
+        
+        # A live site: a new first weighment appended, then a pending one completed
+        with open(data_file, 'rb') as f:
+            rows = f.read().splitlines(keepends=True)
+        with open(data_file, 'ab') as f:
+            f.write(rows[-1])
+        timed("Load after an append", analytics.load_weighments, data_file, cache_file)
+        pending = next(i for i in range(len(rows) - 1, 0, -1) if b',,,' in rows[i])
+        rows[pending] = rows[pending].replace(b',,,', b',8000,01-01-2025 10:00:00,9000,', 1)
+        with open(data_file, 'wb') as f:
+            f.writelines(rows)
+        data, load_time = timed("Load after a completion", analytics.load_weighments, data_file, cache_file)
+        
+        compute_time = 0.0
+        for name, function in (("Throughput per hour", analytics.throughput_per_hour),
+                               ("Turnaround by agency", analytics.turnaround_by),
+                               ("Tare drift", analytics.tare_drift),
+                               ("Outliers", analytics.outliers)):
+            result, elapsed = timed(name, function, data)
+            compute_time += elapsed
+        print(f"\nOutliers flagged: {len(result)}")
+        
+        total = load_time + compute_time
+        print(f"Load after a completion + all aggregates: {total * 1000.0:.0f} ms for {len(data):,} rows "
+              f"({'PASS' if total < 1.0 else 'FAIL'} < 1 s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Headless camera pipeline benchmark
+
+Measures source throughput, preview conversion cost, capture latency and
+JPEG encode throughput without a display or real cameras.
+
+Usage:
+    python benchmarks/camera_benchmark.py [--source SPEC] [--seconds N]
+
+SPEC is any camera source spec, e.g. synthetic:1280x720@30,
+video:/path/to/clip.mp4 or images:/path/to/folder.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from frame_sources import create_frame_source
+from camera_service import CameraService, capture_pair
+from image_pipeline import encode_jpeg, save_image
+
+
+def percentile(values, fraction):
+    """Simple percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def report(name, samples_ms):
+    """Print mean/p95 of timings in milliseconds"""
+    mean = sum(samples_ms) / len(samples_ms) if samples_ms else 0.0
+    print(f"{name:<28} mean {mean:7.2f} ms   p95 {percentile(samples_ms, 0.95):7.2f} ms   "
+          f"({1000.0 / mean if mean else 0:7.1f}/s)")
+
+
+def bench_source(spec, seconds):
+    """Frames per second the source delivers when not paced"""
+    source = create_frame_source(spec, realtime=False)
+    if not source.isOpened():
+        raise SystemExit(f"Cannot open source {spec}")
+    
+    frames = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        ret, frame = source.read()
+        if ret:
+            frames += 1
+    source.release()
+    print(f"{'Source read (unpaced)':<28} {frames / seconds:7.1f} frames/s   {frame.shape[1]}x{frame.shape[0]}")
+    return frame
+
+
+def bench_preview(frame, count=300):
+    """Per-frame cost of the preview conversion in CameraView.update_frame"""
+    size = (config.CAMERA_PREVIEW_WIDTH, config.CAMERA_PREVIEW_HEIGHT)
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    report("Preview downscale+convert", samples)
+
+
+def bench_capture(spec, seconds):
+    """Service frame rate and front/back capture latency and skew"""
+    front, back = CameraService(spec), CameraService(spec)
+    front.start()
+    back.start()
+    try:
+        front.wait_for_frame(0, 5.0)
+        back.wait_for_frame(0, 5.0)
+        
+        latencies, skews = [], []
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            t0 = time.perf_counter()
+            front_frame, back_frame, skew = capture_pair(front, back)
+            if front_frame is not None and back_frame is not None:
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                skews.append(skew)
+        
+        print(f"{'Service frame rate':<28} {front.fps:7.1f} fps")
+        report("capture_pair latency", latencies)
+        print(f"{'capture_pair skew':<28} mean {sum(skews) / max(1, len(skews)):7.2f} ms   "
+              f"p95 {percentile(skews, 0.95):7.2f} ms")
+    finally:
+        front.stop()
+        back.stop()
+
+
+def bench_encode(frame, count=50):
+    """JPEG encode and full save (watermark + encode + atomic write) throughput"""
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        encode_jpeg(frame)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    report(f"JPEG encode (q={config.JPEG_QUALITY})", samples)
+    
+    samples = []
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(count):
+            started = time.perf_counter()
+            save_image(frame.copy(), os.path.join(folder, f"{i}.jpg"), "SITE - KA01AB1234 - 20240101_120000")
+            samples.append((time.perf_counter() - started) * 1000.0)
+    report("Watermark+encode+write", samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the camera pipeline headlessly")
+    parser.add_argument("--source", default="synthetic:1280x720@30", help="Camera source spec")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of timed sections")
+    args = parser.parse_args()
+    
+    frame = bench_source(args.source, args.seconds)
+    bench_preview(frame)
+    bench_capture(args.source, args.seconds)
+    bench_encode(frame)
+
+
+if __name__ == "__main__":
+    main()
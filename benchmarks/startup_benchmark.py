@@ -0,0 +1,105 @@
+"""Startup time benchmark
+
+Starts fresh interpreters and times how long the application takes to get
+to its login dialog, with the heavy libraries (pandas, OpenCV, NumPy,
+Pillow) loaded on first use as the application now does, and with them
+imported up front as before.
+
+Without a display only the work done before the login dialog is timed
+(imports, data and lane setup). With --gui the application is started for
+real and timed until the login window is shown.
+
+Numbers here come from a warm disk cache; on a site PC's first start after
+boot the libraries are read from disk and the difference is larger.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs N] [--gui]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported before the application in the "eager" runs, as they used to be
+EAGER_IMPORTS = "import pandas, cv2, numpy, PIL.Image, PIL.ImageTk\n"
+
+HEAVY_MODULES = ("pandas", "cv2", "numpy", "PIL.Image", "reportlab", "openpyxl")
+
+# Everything TharuniApp does before showing the login dialog, minus Tk
+HEADLESS = """
+import advitia_app
+from data_management import DataManager
+from lanes import LaneRegistry
+DataManager()
+LaneRegistry()
+"""
+
+# The real application, stopped as soon as the login window is visible
+GUI = """
+import tkinter as tk
+import advitia_app
+
+root = tk.Tk()
+
+def shown():
+    if any(isinstance(w, tk.Toplevel) and w.winfo_viewable() for w in root.winfo_children()):
+        report()
+        os._exit(0)
+    root.after(5, shown)
+
+root.after(5, shown)
+advitia_app.TharuniApp(root)
+"""
+
+REPORT = """
+import os, sys, json, time
+
+def report():
+    print(json.dumps([m for m in %r if m in sys.modules]), flush=True)
+""" % (HEAVY_MODULES,)
+
+
+def run_once(eager, gui):
+    """Start the application once
+    
+    Returns:
+        tuple: (seconds from launch to login, heavy modules loaded by then)
+    """
+    body = GUI if gui else HEADLESS + "report()\n"
+    code = REPORT + (EAGER_IMPORTS if eager else "") + body
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    elapsed = time.perf_counter() - started
+    loaded = json.loads(output.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application start-up")
+    parser.add_argument("--runs", type=int, default=5, help="Starts timed per variant")
+    parser.add_argument("--gui", action="store_true", help="Time until the login window is shown (needs a display)")
+    args = parser.parse_args()
+    
+    results = {}
+    for name, eager in (("eager imports", True), ("lazy imports", False)):
+        times = []
+        for _ in range(args.runs):
+            elapsed, loaded = run_once(eager, args.gui)
+            times.append(elapsed)
+        times.sort()
+        results[name] = times[len(times) // 2]
+        print(f"{name:<14} median {times[len(times) // 2] * 1000.0:7.0f} ms   "
+              f"min {times[0] * 1000.0:7.0f} ms   loaded: {', '.join(loaded) or 'none'}")
+    
+    saved = results["eager imports"] - results["lazy imports"]
+    print(f"\nLogin reached {saved * 1000.0:.0f} ms sooner "
+          f"({results['eager imports'] / results['lazy imports']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
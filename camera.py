@@ -2,29 +2,50 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import time
-import cv2
-from PIL import Image, ImageTk
 import os
 import datetime
 
 import config
 from ui_components import HoverButton
+from camera_service import CameraService, CAPTURE_LATEST, acquire_camera_service, release_camera_service
+from lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+Image = lazy_module("PIL.Image")
+ImageTk = lazy_module("PIL.ImageTk")
 
 class CameraView:
     """Camera view widget with simplified interface"""
-    def __init__(self, parent, camera_index=0):
+    def __init__(self, parent, camera_index=0, capture_settings=None):
         self.parent = parent
         self.camera_index = camera_index
+        self.capture_settings = capture_settings
         self.is_running = False
         self.captured_image = None
-        self.cap = None
+        
+        # Frame choice on Save - see CameraService.select_frame
+        self.capture_mode = CAPTURE_LATEST
+        self.reference_time = None
+        
+        # Latest downscaled preview frame, written by the preview thread
+        # and drawn by the Tk thread
+        self._preview_image = None
+        self._preview_seq = 0
+        self._drawn_seq = 0
+        self._preview_failed = False
+        self._photo = None
+        self._image_item = None
+        self._render_job = None
+        
+        # Shared capture service - keeps the device open between captures
+        self.service = acquire_camera_service(camera_index, capture_settings)
         
         # Create frame
         self.frame = ttk.Frame(parent)
         self.frame.pack(fill=tk.BOTH, expand=True, padx=3, pady=3)
         
         # Video display - compact size
-        self.canvas = tk.Canvas(self.frame, bg="black", width=150, height=120)
+        self.canvas = tk.Canvas(self.frame, bg="black", width=config.CAMERA_PREVIEW_WIDTH, height=config.CAMERA_PREVIEW_HEIGHT)
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
         
         # Draw message on canvas
@@ -63,6 +84,9 @@ class CameraView:
         # Save function reference - will be set by the main app
         self.save_function = None
         
+        # Show camera health while the preview is off
+        self._poll_health()
+        
     def toggle_camera(self):
         """Start or stop the camera"""
         if not self.is_running:
@@ -72,19 +96,44 @@ class CameraView:
             self.stop_camera()
             self.capture_button.config(text="Capture")
     
+    def set_camera_index(self, camera_index, capture_settings=None):
+        """Switch this view to another camera or capture mode
+        
+        Args:
+            camera_index: New OpenCV camera index or source spec
+            capture_settings: Requested camera mode
+        """
+        self.capture_settings = capture_settings
+        if camera_index == self.camera_index and self.service:
+            if capture_settings is not None:
+                self.service.configure(capture_settings)
+            return
+        
+        self.stop_camera()
+        if self.service:
+            release_camera_service(self.camera_index)
+        self.camera_index = camera_index
+        self.service = acquire_camera_service(camera_index, capture_settings)
+    
     def start_camera(self):
         """Start the camera feed"""
         try:
-            self.cap = cv2.VideoCapture(self.camera_index)
-            if not self.cap.isOpened():
-                messagebox.showerror("Camera Error", "Failed to open camera.")
+            if self.service is None:
+                self.service = acquire_camera_service(self.camera_index, self.capture_settings)
+            
+            if self.service.state == CameraService.RECONNECTING:
+                messagebox.showerror("Camera Error", 
+                                   f"Failed to open camera: {self.service.last_error}")
                 return
             
             # Set status
             self.status_var.set("Camera active")
             
-            # Start video thread
+            # Start video thread and the Tk-side render loop
             self.is_running = True
+            self._preview_failed = False
+            self.service.wake()
+            self._render_job = self.parent.after(self._preview_interval_ms(), self._render_preview)
             self.video_thread = threading.Thread(target=self.update_frame)
             self.video_thread.daemon = True
             self.video_thread.start()
@@ -93,68 +142,117 @@ class CameraView:
             messagebox.showerror("Camera Error", f"Error starting camera: {str(e)}")
     
     def update_frame(self):
-        """Update the video frame in a separate thread"""
+        """Produce downscaled preview frames in a separate thread
+        
+        Frames are shrunk to the canvas size before colour conversion, rate
+        limited to CAMERA_PREVIEW_FPS and handed to the Tk thread through a
+        single slot, so only the latest preview frame is ever waiting to be
+        drawn. Full-resolution frames are only copied by snapshot().
+        """
+        last_seq = 0
+        frame_interval = 1.0 / config.CAMERA_PREVIEW_FPS
+        next_frame = time.time()
+        size = (config.CAMERA_PREVIEW_WIDTH, config.CAMERA_PREVIEW_HEIGHT)
+        
         while self.is_running:
             try:
-                ret, frame = self.cap.read()
-                if ret:
-                    # Capture frame
-                    self.captured_image = frame.copy()
-                    
-                    # Convert to RGB for tkinter
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    # Resize to fit smaller canvas
-                    frame_resized = cv2.resize(frame_rgb, (150, 120))
-                    # Convert to PhotoImage
-                    img = Image.fromarray(frame_resized)
-                    img_tk = ImageTk.PhotoImage(image=img)
-                    
-                    # Update canvas in main thread
-                    if self.is_running:
-                        self.parent.after_idle(lambda i=img_tk: self._update_canvas(i) if self.is_running else None)
-                    
-                    # Enable save button
-                    if self.is_running:
-                        self.parent.after_idle(self._enable_save)
-                    
-                    # Short delay
-                    time.sleep(0.05)
-                else:
-                    # Camera disconnected
-                    self.is_running = False
-                    if self.parent.winfo_exists():
-                        self.parent.after_idle(self._camera_error)
+                # Cap the preview rate
+                delay = next_frame - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                next_frame = max(next_frame + frame_interval, time.time())
+                
+                frame, _, last_seq = self.service.wait_for_frame(last_seq, timeout=1.0)
+                if frame is not None:
+                    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                    small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+                    self._preview_image = Image.fromarray(small)
+                    self._preview_seq = last_seq
+                elif self.service.state == CameraService.RECONNECTING:
+                    # Camera disconnected - the service keeps trying to reopen it
+                    self._preview_failed = True
                     break
             except Exception as e:
                 print(f"Camera error: {str(e)}")
-                self.is_running = False
-                if self.parent.winfo_exists():
-                    self.parent.after_idle(self._camera_error)
+                self._preview_failed = True
                 break
     
-    def _enable_save(self):
-        """Enable the save button from main thread"""
-        if self.is_running:
-            self.save_button.config(state=tk.NORMAL)
+    def _preview_interval_ms(self):
+        """Tk render interval matching the preview frame rate"""
+        fps = config.CAMERA_PREVIEW_FPS
+        if self.service and self.service.is_idle:
+            fps = min(fps, config.CAMERA_IDLE_FPS)
+        return max(1, int(1000 / fps))
     
-    def _update_canvas(self, img_tk):
-        """Update canvas with new image (called from main thread)"""
-        if self.is_running and self.parent.winfo_exists():
-            self.canvas.delete("all")
-            self.canvas.create_image(0, 0, anchor=tk.NW, image=img_tk)
-            self.canvas.image = img_tk  # Keep reference
+    def _render_preview(self):
+        """Draw the latest preview frame (called from main thread)
+        
+        Reuses one PhotoImage and one canvas item; frames produced since the
+        last draw are skipped rather than queued.
+        """
+        self._render_job = None
+        if not self.is_running or not self.parent.winfo_exists():
+            return
+        
+        if self._preview_failed:
+            self._camera_error()
+            return
+        
+        image = self._preview_image
+        if image is not None and self._preview_seq != self._drawn_seq:
+            self._drawn_seq = self._preview_seq
+            if self._photo is None or self._photo.width() != image.width or self._photo.height() != image.height:
+                self._photo = ImageTk.PhotoImage(image=image)
+            else:
+                self._photo.paste(image)
+            
+            # The item is recreated only if something cleared the canvas
+            if self._image_item is None or not self.canvas.find_withtag(self._image_item):
+                self.canvas.delete("all")
+                self._image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self._photo)
+            elif self.canvas.itemcget(self._image_item, "image") != str(self._photo):
+                self.canvas.itemconfig(self._image_item, image=self._photo)
+            
+            if str(self.save_button["state"]) == tk.DISABLED:
+                self.save_button.config(state=tk.NORMAL)
+        
+        self._render_job = self.parent.after(self._preview_interval_ms(), self._render_preview)
+    
+    def snapshot(self, mode=CAPTURE_LATEST, timestamp=None):
+        """Take a full-resolution copy of a recent frame
+        
+        Args:
+            mode: Frame choice (see CameraService.select_frame)
+            timestamp: Reference time for the buffered modes (defaults to now)
+        
+        Returns:
+            numpy.ndarray: Frame or None if the camera has not delivered one
+        """
+        if self.service is None:
+            return None
+        frame, _ = self.service.select_frame(mode, timestamp)
+        if frame is not None:
+            self.captured_image = frame
+        return frame
     
     def _camera_error(self):
         """Handle camera errors (called from main thread)"""
         if self.parent.winfo_exists():
-            self.status_var.set("Camera error - please try again")
             self.stop_camera()
+            self.status_var.set("Camera error - reconnecting")
             self.capture_button.config(text="Capture")
     
     def save_image(self):
         """Call the save function provided by main app"""
-        if self.save_function and self.captured_image is not None:
-            if self.save_function(self.captured_image):
+        # Use the weighment time only while it is still in the camera's buffer
+        timestamp = self.reference_time
+        if timestamp is not None and time.time() - timestamp > config.CAMERA_RING_SECONDS:
+            timestamp = None
+        
+        image = self.snapshot(self.capture_mode, timestamp) if self.is_running else self.captured_image
+        if self.save_function and image is not None:
+            # The pipeline watermarks the frame it is given; captured_image must stay clean
+            if self.save_function(image.copy()):
                 # Stop the camera after successful save
                 self.stop_camera()
                 self.capture_button.config(text="Capture")
@@ -169,24 +267,51 @@ class CameraView:
     def stop_camera(self):
         """Stop the camera feed"""
         self.is_running = False
+        if self._render_job:
+            self.parent.after_cancel(self._render_job)
+            self._render_job = None
         
-        # Wait for thread to complete
-        if self.video_thread and self.video_thread.is_alive():
+        # Wait for thread to complete - the device itself stays open
+        if self.video_thread and self.video_thread.is_alive() and self.video_thread is not threading.current_thread():
             self.video_thread.join(0.5)
         
-        # Release camera
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-        
         # Update status
         self.status_var.set("Ready")
         self.save_button.config(state=tk.DISABLED)
 
+    def _poll_health(self):
+        """Show the camera service state while the preview is not running"""
+        if not self.frame.winfo_exists():
+            return
+        
+        if not self.is_running and self.service:
+            if self.service.state == CameraService.RECONNECTING:
+                self.status_var.set("Camera offline - reconnecting")
+            elif self.service.state == CameraService.RUNNING:
+                self.status_var.set("Ready")
+        
+        self.frame.after(config.CAMERA_HEALTH_INTERVAL_MS, self._poll_health)
+    
+    def close(self):
+        """Stop the preview and release the camera service"""
+        self.stop_camera()
+        if self.service:
+            release_camera_service(self.camera_index)
+            self.service = None
+
 def add_watermark(image, text):
-    """Add a watermark to an image with sitename, vehicle number and timestamp"""
-    # Create a copy of the image
-    result = image.copy()
+    """Add a watermark to an image with sitename, vehicle number and timestamp
+    
+    Only the bottom strip is touched and the image is modified in place.
+    
+    Args:
+        image: BGR image to watermark
+        text: Watermark text
+    
+    Returns:
+        numpy.ndarray: The same image
+    """
+    result = image
     
     # Get image dimensions
     height, width = result.shape[:2]
@@ -197,10 +322,10 @@ def add_watermark(image, text):
     color = (255, 255, 255)  # White color
     thickness = 2
     
-    # Add semi-transparent overlay for better text visibility
-    overlay = result.copy()
-    cv2.rectangle(overlay, (0, height - 40), (width, height), (0, 0, 0), -1)
-    cv2.addWeighted(overlay, 0.5, result, 0.5, 0, result)
+    # Darken the bottom strip for better text visibility - a 50% blend with
+    # black, done on the strip only (a row slice, so it stays contiguous)
+    strip = result[max(0, height - config.WATERMARK_STRIP_HEIGHT):height]
+    cv2.addWeighted(strip, 0.5, strip, 0, 0, dst=strip)
     
     # Add text
     cv2.putText(result, text, (10, height - 15), font, font_scale, color, thickness)
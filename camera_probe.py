@@ -0,0 +1,148 @@
+"""Camera capture mode probe
+
+Opens a camera in each candidate resolution / frame rate / codec, reports
+whether the driver accepted the mode, and measures the frame rate actually
+delivered, the time to the first frame and the read latency. Use it to pick
+the capture settings for a lane's cameras.
+
+Usage:
+    python camera_probe.py [--camera SPEC] [--seconds N] [--resolutions 640x480,1280x720]
+                           [--codecs MJPG,YUYV] [--fps 15,30]
+
+SPEC is a camera index or any camera source spec (see frame_sources). File
+and synthetic sources have no modes to negotiate and are measured once.
+"""
+import time
+import argparse
+
+from frame_sources import create_frame_source, parse_source
+
+DEFAULT_RESOLUTIONS = "640x480,1280x720,1920x1080"
+DEFAULT_CODECS = "MJPG,YUYV"
+DEFAULT_FPS = "15,30"
+
+
+def percentile(values, fraction):
+    """Simple percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def measure(spec, settings, seconds):
+    """Open a source in one mode and time its reads
+    
+    Args:
+        spec: Camera source spec
+        settings: Requested capture settings (empty for the driver default)
+        seconds: How long to read frames
+    
+    Returns:
+        dict: Negotiated mode, first frame time, achieved fps and read
+            latencies in ms, or None if the source could not be opened
+    """
+    started = time.perf_counter()
+    source = create_frame_source(spec, capture_settings=settings)
+    try:
+        if not source.isOpened():
+            return None
+        
+        frame = None
+        first_frame = None
+        latencies = []
+        frames = 0
+        read_started = time.perf_counter()
+        while time.perf_counter() - read_started < seconds:
+            t0 = time.perf_counter()
+            ret, frame = source.read(frame)
+            if not ret:
+                if first_frame is None and time.perf_counter() - started > 5.0:
+                    break
+                continue
+            now = time.perf_counter()
+            if first_frame is None:
+                # The first frame includes driver start-up - keep it out of the rate
+                first_frame = now - started
+                read_started = now
+                continue
+            latencies.append((now - t0) * 1000.0)
+            frames += 1
+        
+        elapsed = time.perf_counter() - read_started
+        mode = dict(getattr(source, "mode", {}))
+        if frame is not None:
+            mode.setdefault("width", frame.shape[1])
+            mode.setdefault("height", frame.shape[0])
+        return {
+            "mode": mode,
+            "first_frame": first_frame,
+            "fps": frames / elapsed if elapsed > 0 else 0.0,
+            "latencies": latencies
+        }
+    finally:
+        source.release()
+
+
+def accepted(settings, mode):
+    """True if the driver reports the requested size, codec and frame rate"""
+    if not settings:
+        return True
+    if (mode.get("width"), mode.get("height")) != (settings["width"], settings["height"]):
+        return False
+    if mode.get("fourcc") and mode["fourcc"] != settings["fourcc"]:
+        return False
+    return not mode.get("fps") or abs(mode["fps"] - settings["fps"]) < 1.0
+
+
+def candidate_modes(resolutions, codecs, rates):
+    """Every combination of the requested sizes, codecs and frame rates"""
+    for resolution in resolutions:
+        width, height = (int(value) for value in resolution.lower().split('x'))
+        for fourcc in codecs:
+            for fps in rates:
+                yield {"width": width, "height": height, "fps": fps, "fourcc": fourcc, "buffer_size": 1}
+
+
+def describe(settings):
+    """Short label of a requested mode"""
+    if not settings:
+        return "source default"
+    return f"{settings['width']}x{settings['height']} {settings['fourcc']} @{settings['fps']:g}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the capture modes a camera supports")
+    parser.add_argument("--camera", default="0", help="Camera index or source spec")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Read time per mode")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS, help="Comma separated WIDTHxHEIGHT")
+    parser.add_argument("--codecs", default=DEFAULT_CODECS, help="Comma separated FOURCC codes")
+    parser.add_argument("--fps", default=DEFAULT_FPS, help="Comma separated frame rates")
+    args = parser.parse_args()
+    
+    kind, _ = parse_source(args.camera)
+    if kind == "device":
+        modes = list(candidate_modes(args.resolutions.split(','), args.codecs.split(','),
+                                     [float(rate) for rate in args.fps.split(',')]))
+    else:
+        modes = [{}]
+    
+    print(f"{'Requested':<24} {'Negotiated':<24} {'OK':<4} {'First':>8} {'FPS':>6} "
+          f"{'Read mean':>10} {'p95':>8}")
+    for settings in modes:
+        result = measure(args.camera, settings, args.seconds)
+        if result is None:
+            print(f"{describe(settings):<24} failed to open")
+            continue
+        
+        mode = result["mode"]
+        negotiated = f"{mode.get('width')}x{mode.get('height')} {mode.get('fourcc') or '-'}"
+        if mode.get("fps"):
+            negotiated += f" @{mode['fps']:g}"
+        latencies = result["latencies"]
+        mean = sum(latencies) / len(latencies) if latencies else 0.0
+        first = f"{result['first_frame'] * 1000.0:.0f} ms" if result["first_frame"] is not None else "none"
+        print(f"{describe(settings):<24} {negotiated:<24} {'yes' if accepted(settings, mode) else 'no':<4} "
+              f"{first:>8} {result['fps']:6.1f} {mean:7.2f} ms {percentile(latencies, 0.95):5.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
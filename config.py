@@ -5,6 +5,13 @@ from pathlib import Path
 DATA_FOLDER = 'data'
 DATA_FILE = os.path.join(DATA_FOLDER, 'tharuni_data.csv')
 IMAGES_FOLDER = os.path.join(DATA_FOLDER, 'images')
+IMAGE_INDEX_FILE = os.path.join(IMAGES_FOLDER, 'index.jsonl')
+ROLLUPS_FILE = os.path.join(DATA_FOLDER, 'daily_rollups.json')
+ANALYTICS_CACHE_FILE = os.path.join(DATA_FOLDER, 'analytics_cache.npz')
+REPORT_SCHEDULE_FILE = os.path.join(DATA_FOLDER, 'report_schedule.json')
+REPORT_SCHEDULE_STATE_FILE = os.path.join(DATA_FOLDER, 'report_schedule_state.json')
+LANES_FILE = os.path.join(DATA_FOLDER, 'lanes.json')
+METRICS_FILE = os.path.join(DATA_FOLDER, 'weighbridge_metrics.log')
 CSV_HEADER = ['Date', 'Time', 'Site Name', 'Agency Name', 'Material', 'Ticket No', 'Vehicle No', 
               'Transfer Party Name', 'First Weight', 'First Timestamp', 'Second Weight', 'Second Timestamp',
               'Net Weight', 'Material Type', 'Front Image', 'Back Image']
@@ -35,6 +42,99 @@ COLORS = {
 # Standard width for UI components - reduced for smaller windows
 STD_WIDTH = 20
 
+# Weighbridge reading settings
+WEIGHT_BUFFER_SIZE = 256            # Raw lines queued between reader and processor threads
+WEIGHT_WINDOW_SIZE = 10             # Readings in the rolling window used for mode and stability
+WEIGHT_STABLE_TOLERANCE = 1.0       # Max spread (kg) across the window to count as stable
+WEIGHT_DISPLAY_INTERVAL_MS = 200    # How often the UI polls the latest weight
+WEIGHT_STALE_SECONDS = 3.0          # Readings older than this are shown as stale
+
+# Weighbridge I/O backend: "thread" (WeighbridgeManager) or "asyncio" (AsyncWeighbridgeManager)
+WEIGHBRIDGE_IO = "thread"
+WEIGHBRIDGE_POLL_INTERVAL = 0.02    # Poll interval (s) when pyserial-asyncio is not installed
+WEIGHBRIDGE_RECONNECT_INITIAL = 0.5 # First reconnect delay (s) after the port drops
+WEIGHBRIDGE_RECONNECT_MAX = 30.0    # Upper bound for the reconnect backoff (s)
+
+# Auto capture defaults (overridable per lane in Settings)
+AUTO_CAPTURE_ENABLED = False
+AUTO_CAPTURE_MIN_WEIGHT = 100.0     # Ignore stable weights below this (kg)
+AUTO_CAPTURE_STABLE_SECONDS = 2.0   # Weight must stay stable this long before capture
+AUTO_CAPTURE_REARM_WEIGHT = 50.0    # Weight must drop below this before the next capture
+AUTO_CAPTURE_POLL_MS = 200
+
+# Weighbridge telemetry
+METRICS_DUMP_SECONDS = 60           # How often metrics are appended to METRICS_FILE
+METRICS_MAX_BYTES = 1024 * 1024     # Rotate the metrics file at this size
+METRICS_BACKUP_COUNT = 5            # Rotated metrics files to keep
+METRICS_DISPLAY_INTERVAL_MS = 1000  # How often Settings refreshes the diagnostics
+
+# Camera service settings
+CAMERA_CAPTURE_DEFAULTS = {         # Mode requested from cameras on open (0 / "" = driver default)
+    "width": 1280,
+    "height": 720,
+    "fps": 30,
+    "fourcc": "MJPG",               # Compressed stream - two cameras fit on one USB hub
+    "buffer_size": 1                # Driver-side frame queue; 1 keeps frames current
+}
+CAMERA_MAX_READ_FAILURES = 30       # Consecutive failed reads before the camera is reopened
+CAMERA_RECONNECT_INITIAL = 1.0      # First reopen delay (s) after a camera drops
+CAMERA_RECONNECT_MAX = 30.0         # Upper bound for the reopen backoff (s)
+CAMERA_STALE_SECONDS = 2.0          # Camera is unhealthy if no frame arrived for this long
+CAMERA_HEALTH_INTERVAL_MS = 1000    # How often camera views refresh their health status
+CAMERA_CAPTURE_TIMEOUT = 1.0        # Max wait (s) for a fresh frame when a weighment triggers the cameras
+CAMERA_PAIR_FRAMES = 2              # Fresh frames per camera searched for the closest front/back pair
+CAMERA_RING_SECONDS = 2.0           # Recent history kept per camera for pre-trigger capture
+CAMERA_RING_FRAMES = 20             # Frames in that history (preallocated buffers per camera)
+CAMERA_SHARPNESS_WIDTH = 160        # Width frames are shrunk to before scoring sharpness
+CAMERA_CAPTURE_MODE = "latest"      # Default frame choice: "latest", "timestamp" or "sharpest"
+CAMERA_MOTION_GATING = True         # Throttle decoding and preview while the scene is static
+CAMERA_MOTION_SIZE = (32, 24)       # Thumbnail size used for motion detection
+CAMERA_MOTION_CHECK_SECONDS = 0.5   # Spacing of the frames compared for motion
+CAMERA_MOTION_PIXEL_DELTA = 12      # Gray-level change that marks a thumbnail pixel as changed
+CAMERA_MOTION_THRESHOLD = 0.005     # Fraction of changed thumbnail pixels that counts as motion
+CAMERA_MOTION_IDLE_SECONDS = 5.0    # Seconds without motion before throttling
+CAMERA_IDLE_FPS = 2.0               # Decode and preview rate while idle
+CAMERA_PREVIEW_FPS = 15             # Maximum preview redraw rate
+CAMERA_PREVIEW_WIDTH = 150          # Preview canvas size in pixels
+CAMERA_PREVIEW_HEIGHT = 120
+
+# Image saving
+JPEG_QUALITY = 90                   # JPEG quality (0-100) for saved vehicle images
+IMAGE_SAVE_WORKERS = 2              # Threads that watermark, encode and write images
+WATERMARK_STRIP_HEIGHT = 40         # Height of the darkened strip behind the watermark text
+THUMBNAIL_WIDTH = 320               # Width of the thumbnail stored next to each image
+THUMBNAIL_QUALITY = 70              # JPEG quality of stored thumbnails
+THUMBNAIL_SUFFIX = "_thumb.jpg"     # Thumbnail file name suffix
+THUMBNAIL_CACHE_FOLDER = os.path.join(DATA_FOLDER, 'thumbnails')  # Fixed-size thumbnails for views and reports
+THUMBNAIL_SIZES = {"detail": (200, 150), "report": (250, 150)}
+THUMBNAIL_MEMORY_ITEMS = 200        # Decoded thumbnails kept in memory
+THUMBNAIL_LOAD_WORKERS = 4          # Threads that load report images in parallel
+IMAGE_GC_GRACE_DAYS = 7             # Unreferenced images younger than this are kept
+FUTURE_POLL_MS = 50                 # How often the UI checks background work for completion
+
+# Reports
+REPORT_CHUNK_ROWS = 1000            # Rows read and written per chunk by report exports
+REPORT_PDF_TABLE_ROWS = 35          # Rows per PDF table - about one A4 page
+REPORT_PROGRESS_POLL_MS = 100       # How often the report progress dialog updates
+ANALYTICS_REPORT_TOP = 25           # Vehicles / weighments listed in the analytics report tables
+ROLLUPS_SAVE_DELAY = 5.0            # Seconds new weighments are collected before the rollup file is rewritten
+
+# Scheduled reports (overridable in REPORT_SCHEDULE_FILE)
+REPORT_SCHEDULE_DEFAULTS = {
+    "enabled": True,
+    "output_folder": os.path.join(DATA_FOLDER, 'reports'),
+    "times": ["22:00"],             # When reports are refreshed each day (HH:MM), e.g. after shift close
+    "daily": ["excel", "pdf"],      # Formats written for each day
+    "monthly": ["excel"],           # Formats written for each month (month to date until it ends)
+    "catch_up_days": 7              # Days looked back over for missed runs and late edits
+}
+REPORT_SCHEDULE_CHECK_MS = 60000    # How often the application checks whether reports are due
+
+# Weighment slips
+SLIP_ENABLED = True                 # Write a slip for every completed weighment
+SLIP_FOLDER = os.path.join(DATA_FOLDER, 'slips')  # Point at a printer's spool / hot folder to print them
+SLIP_IMAGE_WAIT = 2.0               # Max wait (s) for a weighment's images to finish saving
+
 # Ensure data folder exists
 def initialize_folders():
     Path(DATA_FOLDER).mkdir(exist_ok=True)
@@ -1,9 +1,178 @@
 import os
 import csv
-import pandas as pd
+import itertools
 import datetime
 from tkinter import messagebox, filedialog
 import config
+from rollups import get_daily_rollups, is_completed, rollup_entry
+
+# Record keys in CSV column order
+RECORD_FIELDS = ['date', 'time', 'site_name', 'agency_name', 'material', 'ticket_no', 'vehicle_no',
+                 'transfer_party_name', 'first_weight', 'first_timestamp', 'second_weight',
+                 'second_timestamp', 'net_weight', 'material_type', 'front_image', 'back_image']
+
+# Record dates are stored as DD-MM-YYYY
+DATE_FORMAT = "%d-%m-%Y"
+
+
+class ReportQuery:
+    """Which records a report covers
+    
+    Every criterion is optional; an empty query matches every record. The
+    query is checked against raw CSV rows, so records that do not match are
+    never turned into dictionaries.
+    """
+    
+    def __init__(self, start_date=None, end_date=None, site_name="", agency_name="",
+                 material="", completed_only=False):
+        """Initialize report query
+        
+        Args:
+            start_date: First day included (datetime.date)
+            end_date: Last day included (datetime.date)
+            site_name: Only this site
+            agency_name: Only this agency
+            material: Only this material
+            completed_only: Only records with both weighments
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.site_name = site_name.strip()
+        self.agency_name = agency_name.strip()
+        self.material = material.strip()
+        self.completed_only = completed_only
+        
+        # Dates compared as YYYYMMDD strings, which sort like the dates
+        self._start_key = start_date.strftime("%Y%m%d") if start_date else None
+        self._end_key = end_date.strftime("%Y%m%d") if end_date else None
+    
+    @property
+    def is_empty(self):
+        """True if the query matches every record"""
+        return not (self.start_date or self.end_date or self.site_name or self.agency_name
+                    or self.material or self.completed_only)
+    
+    def matches(self, row):
+        """Check a raw CSV row against the query
+        
+        Args:
+            row: CSV row in config.CSV_HEADER order
+        
+        Returns:
+            bool: True if the record is in the report
+        """
+        if self._start_key or self._end_key:
+            date = row[0]
+            if len(date) != 10:
+                return False
+            key = date[6:10] + date[3:5] + date[0:2]
+            if self._start_key and key < self._start_key:
+                return False
+            if self._end_key and key > self._end_key:
+                return False
+        if self.site_name and row[2] != self.site_name:
+            return False
+        if self.agency_name and row[3] != self.agency_name:
+            return False
+        if self.material and row[4] != self.material:
+            return False
+        if self.completed_only and not is_completed(row):
+            return False
+        return True
+    
+    def describe(self):
+        """Short description for report titles
+        
+        Returns:
+            str: e.g. "01-03-2024 to 31-03-2024, Agency: ABC, completed only" ('' if empty)
+        """
+        parts = []
+        if self.start_date or self.end_date:
+            start = self.start_date.strftime(DATE_FORMAT) if self.start_date else "start"
+            end = self.end_date.strftime(DATE_FORMAT) if self.end_date else "today"
+            parts.append(f"{start} to {end}")
+        for label, value in (("Site", self.site_name), ("Agency", self.agency_name),
+                             ("Material", self.material)):
+            if value:
+                parts.append(f"{label}: {value}")
+        if self.completed_only:
+            parts.append("completed only")
+        return ", ".join(parts)
+
+
+def iter_rows(data_file=None, query=None, progress=None):
+    """Stream the CSV rows that match a query
+    
+    The file is read one row at a time, so memory use does not grow with
+    the history.
+    
+    Args:
+        data_file: CSV file (defaults to config.DATA_FILE)
+        query: ReportQuery (None for every row)
+        progress: Optional callback(done, total) with the part of the file
+            read so far, called every config.REPORT_CHUNK_ROWS rows and at the end
+    
+    Yields:
+        list: Row padded to config.CSV_HEADER length
+    """
+    data_file = data_file or config.DATA_FILE
+    if not os.path.exists(data_file):
+        return
+    
+    width = len(config.CSV_HEADER)
+    if query is not None and query.is_empty:
+        query = None
+    
+    with open(data_file, 'r', newline='') as csv_file:
+        lines = csv_file
+        if progress is not None:
+            # Characters read approximate the bytes read for the mostly ASCII data
+            total = max(1, os.path.getsize(data_file))
+            position = [0]
+            
+            def counted(lines):
+                for line in lines:
+                    position[0] += len(line)
+                    yield line
+            lines = counted(csv_file)
+        
+        reader = csv.reader(lines)
+        next(reader, None)  # Skip header
+        
+        for count, row in enumerate(reader, start=1):
+            if progress is not None and count % config.REPORT_CHUNK_ROWS == 0:
+                progress(min(position[0], total), total)
+            if len(row) < 13:  # Minimum fields required
+                continue
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            elif len(row) > width:
+                row = row[:width]
+            if query is None or query.matches(row):
+                yield row
+        
+        if progress is not None:
+            progress(total, total)
+
+
+def iter_chunks(rows, size=None):
+    """Group a row stream into lists
+    
+    Args:
+        rows: Iterable of rows, e.g. from iter_rows()
+        size: Rows per chunk (defaults to config.REPORT_CHUNK_ROWS)
+    
+    Yields:
+        list: Up to size rows
+    """
+    rows = iter(rows)
+    size = size or config.REPORT_CHUNK_ROWS
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class DataManager:
     """Class for managing data operations with the CSV file"""
@@ -11,6 +180,7 @@ class DataManager:
     def __init__(self):
         """Initialize data manager"""
         self.data_file = config.DATA_FILE
+        self.rollups = get_daily_rollups()
         self.initialize_new_csv_structure()
         
     def initialize_new_csv_structure(self):
@@ -142,10 +312,14 @@ class DataManager:
                 data.get('back_image', '')
             ]
             
-            # Write to CSV
-            with open(self.data_file, 'a', newline='') as csv_file:
-                writer = csv.writer(csv_file)
-                writer.writerow(record)
+            # Write to CSV - with the rollups held, so a rebuild can't count it twice
+            with self.rollups.writing():
+                with open(self.data_file, 'a', newline='') as csv_file:
+                    writer = csv.writer(csv_file)
+                    writer.writerow(record)
+                
+                if is_completed(record):
+                    self.rollups.add(record)
                 
             return True
             
@@ -174,8 +348,10 @@ class DataManager:
             ticket_no = data.get('ticket_no', '')
             updated = False
             
+            previous = None
             for i, row in enumerate(all_records):
                 if len(row) >= 6 and row[5] == ticket_no:  # Ticket number is index 5
+                    previous = row + [''] * (len(config.CSV_HEADER) - len(row))
                     # Update the row with new data
                     # Keep original date/time if not provided
                     all_records[i] = [
@@ -202,11 +378,14 @@ class DataManager:
             if not updated:
                 return False
                 
-            # Write all records back to the file
-            with open(self.data_file, 'w', newline='') as csv_file:
-                writer = csv.writer(csv_file)
-                writer.writerow(header)  # Write header
-                writer.writerows(all_records)  # Write all records
+            # Write all records back to the file, with the rollups held
+            with self.rollups.writing():
+                with open(self.data_file, 'w', newline='') as csv_file:
+                    writer = csv.writer(csv_file)
+                    writer.writerow(header)  # Write header
+                    writer.writerows(all_records)  # Write all records
+                
+                self.update_rollups(previous, all_records[i])
                 
             return True
                 
@@ -214,52 +393,65 @@ class DataManager:
             print(f"Error updating record: {e}")
             return False
             
-    def get_all_records(self):
+    def update_rollups(self, previous, row):
+        """Keep the daily rollups in step with an updated record
+        
+        Args:
+            previous: Row before the update
+            row: Row after the update
+        """
+        if not is_completed(previous):
+            if is_completed(row):
+                # Second weighment just completed
+                self.rollups.add(row)
+        elif not is_completed(row) or rollup_entry(previous) != rollup_entry(row):
+            # A completed weighment was edited - totals can't be corrected in place
+            self.rollups.invalidate()
+    
+    def rebuild_rollups(self, progress=None):
+        """Recompute the daily rollups from the whole history
+        
+        Args:
+            progress: Optional callback(done, total) while the CSV is read
+        """
+        self.rollups.rebuild(progress)
+    
+    def iter_records(self, query=None):
+        """Stream the records that match a query
+        
+        Args:
+            query: ReportQuery (None for every record)
+        
+        Yields:
+            dict: Record as dictionary
+        """
+        for row in iter_rows(self.data_file, query):
+            yield dict(zip(RECORD_FIELDS, row))
+    
+    def get_all_records(self, query=None):
         """Get all records from CSV file
         
+        Args:
+            query: Optional ReportQuery limiting the records returned
+        
         Returns:
             list: List of records as dictionaries
         """
-        records = []
-        
-        if not os.path.exists(self.data_file):
-            return records
-            
         try:
-            with open(self.data_file, 'r', newline='') as csv_file:
-                reader = csv.reader(csv_file)
-                
-                # Skip header
-                header = next(reader, None)
-                
-                for row in reader:
-                    if len(row) >= 13:  # Minimum fields required
-                        record = {
-                            'date': row[0],
-                            'time': row[1],
-                            'site_name': row[2],
-                            'agency_name': row[3],
-                            'material': row[4],
-                            'ticket_no': row[5],
-                            'vehicle_no': row[6],
-                            'transfer_party_name': row[7],
-                            'first_weight': row[8] if len(row) > 8 else '',
-                            'first_timestamp': row[9] if len(row) > 9 else '',
-                            'second_weight': row[10] if len(row) > 10 else '',
-                            'second_timestamp': row[11] if len(row) > 11 else '',
-                            'net_weight': row[12] if len(row) > 12 else '',
-                            'material_type': row[13] if len(row) > 13 else '',
-                            'front_image': row[14] if len(row) > 14 else '',
-                            'back_image': row[15] if len(row) > 15 else ''
-                        }
-                        records.append(record)
-                        
-            return records
-                
+            return list(self.iter_records(query))
         except Exception as e:
             print(f"Error reading records: {e}")
             return []
     
+    def get_referenced_images(self):
+        """Get the names of all images referenced by records
+        
+        Returns:
+            set: Image names as stored in the CSV
+        """
+        return {name for record in self.get_all_records()
+                for name in (record['front_image'], record['back_image']) if name}
+    
     def get_record_by_vehicle(self, vehicle_no):
         """Get a specific record by vehicle number
         
@@ -307,16 +499,17 @@ class DataManager:
             print(f"Error finding record: {e}")
             return None
     
-    def get_filtered_records(self, filter_text=""):
+    def get_filtered_records(self, filter_text="", query=None):
         """Get records filtered by text
         
         Args:
             filter_text: Text to filter records by
+            query: Optional ReportQuery applied while reading
             
         Returns:
             list: Filtered records
         """
-        all_records = self.get_all_records()
+        all_records = self.get_all_records(query)
         
         if not filter_text:
             return all_records
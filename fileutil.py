@@ -0,0 +1,24 @@
+import os
+
+
+def write_atomic(filepath, data):
+    """Write a file so readers never see it half written
+    
+    The data goes to a temporary file in the same folder which is then
+    renamed over the target.
+    
+    Args:
+        filepath: Destination path
+        data: Bytes to write
+    """
+    tmp_path = f"{filepath}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,361 @@
+import os
+import time
+from lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+np = lazy_module("numpy")
+
+# Image types picked up by ImageDirSource
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource:
+    """Base class for anything a CameraService can read frames from
+    
+    Mirrors the parts of cv2.VideoCapture the service uses: isOpened(),
+    read(), grab(), retrieve() and release(). File and synthetic sources pace
+    grab() to their frame rate when realtime is True, so they behave like a
+    live camera. Subclasses implement advance() and current_frame().
+    """
+    
+    def __init__(self, fps=30.0, realtime=True):
+        """Initialize frame source
+        
+        Args:
+            fps: Frames per second delivered by read()
+            realtime: Sleep in read() to keep to fps (False delivers as fast as possible)
+        """
+        self.fps = float(fps) if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self._next_frame = None
+    
+    def isOpened(self):
+        """True if frames can be read"""
+        return True
+    
+    def read(self, image=None):
+        """Read the next frame
+        
+        Args:
+            image: Optional array to fill, reused if its size matches (like
+                cv2.VideoCapture.read) so callers can avoid per-frame allocation
+        
+        Returns:
+            tuple: (success, BGR frame)
+        """
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+    
+    def grab(self):
+        """Move to the next frame without decoding it
+        
+        Returns:
+            bool: True if a frame is available
+        """
+        self._pace()
+        return self.advance()
+    
+    def retrieve(self, image=None):
+        """Decode the frame selected by the last grab()
+        
+        Returns:
+            tuple: (success, BGR frame)
+        """
+        return self.current_frame(image)
+    
+    def advance(self):
+        """Step to the next frame (implemented by subclasses)"""
+        raise NotImplementedError
+    
+    def current_frame(self, image=None):
+        """Produce the current frame (implemented by subclasses)"""
+        raise NotImplementedError
+    
+    def release(self):
+        """Release any resources held by the source"""
+    
+    def _pace(self):
+        """Wait until the next frame is due"""
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._next_frame is None:
+            self._next_frame = now
+        delay = self._next_frame - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+
+def apply_capture_settings(capture, settings):
+    """Request a capture mode from a camera
+    
+    The FOURCC is set before the size, since many drivers only offer the
+    larger sizes (or higher frame rates) for compressed formats. Empty or
+    zero values leave the driver default.
+    
+    Args:
+        capture: Opened cv2.VideoCapture
+        settings: Dict with any of width, height, fps, fourcc and buffer_size
+    
+    Returns:
+        dict: Mode the driver actually reports after negotiation
+    """
+    fourcc = (settings.get("fourcc") or "").strip()
+    if len(fourcc) == 4:
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if settings.get("width") and settings.get("height"):
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, int(settings["width"]))
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, int(settings["height"]))
+    if settings.get("fps"):
+        capture.set(cv2.CAP_PROP_FPS, float(settings["fps"]))
+    if settings.get("buffer_size"):
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, int(settings["buffer_size"]))
+    return negotiated_mode(capture)
+
+
+def negotiated_mode(capture):
+    """Get the mode a camera is running in
+    
+    Returns:
+        dict: width, height, fps, fourcc and buffer_size as reported by the driver
+    """
+    code = int(capture.get(cv2.CAP_PROP_FOURCC))
+    fourcc = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)) if code > 0 else ""
+    return {
+        "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": capture.get(cv2.CAP_PROP_FPS),
+        "fourcc": fourcc.strip("\x00"),
+        "buffer_size": int(capture.get(cv2.CAP_PROP_BUFFERSIZE))
+    }
+
+
+class DeviceSource(FrameSource):
+    """Live camera opened through OpenCV"""
+    
+    def __init__(self, index, capture_settings=None):
+        """Initialize device source
+        
+        Args:
+            index: OpenCV camera index
+            capture_settings: Requested mode (see apply_capture_settings)
+        """
+        super().__init__(realtime=False)
+        self.capture = cv2.VideoCapture(index)
+        self.mode = {}
+        if self.capture.isOpened():
+            self.mode = apply_capture_settings(self.capture, capture_settings or {})
+    
+    def isOpened(self):
+        return self.capture.isOpened()
+    
+    def read(self, image=None):
+        # The device paces itself
+        return self.capture.read(image) if image is not None else self.capture.read()
+    
+    def grab(self):
+        return self.capture.grab()
+    
+    def retrieve(self, image=None):
+        return self.capture.retrieve(image) if image is not None else self.capture.retrieve()
+    
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """Video file played back at its own frame rate, looping at the end"""
+    
+    def __init__(self, path, realtime=True):
+        """Initialize video file source
+        
+        Args:
+            path: Video file path
+            realtime: Play at the file's frame rate
+        """
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        super().__init__(self.capture.get(cv2.CAP_PROP_FPS), realtime)
+    
+    def isOpened(self):
+        return self.capture.isOpened()
+    
+    def advance(self):
+        if self.capture.grab():
+            return True
+        # Loop back to the start
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.capture.grab()
+    
+    def current_frame(self, image=None):
+        return self.capture.retrieve(image) if image is not None else self.capture.retrieve()
+    
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirSource(FrameSource):
+    """Still images from a folder shown in name order, looping at the end"""
+    
+    def __init__(self, path, fps=10.0, realtime=True):
+        """Initialize image folder source
+        
+        Images are decoded once and kept in memory.
+        
+        Args:
+            path: Folder containing images
+            fps: Frames per second
+            realtime: Sleep to keep to fps
+        """
+        super().__init__(fps, realtime)
+        self.path = path
+        self.frames = []
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    image = cv2.imread(os.path.join(path, name))
+                    if image is not None:
+                        self.frames.append(image)
+        self.position = -1
+    
+    def isOpened(self):
+        return bool(self.frames)
+    
+    def advance(self):
+        if not self.frames:
+            return False
+        self.position = (self.position + 1) % len(self.frames)
+        return True
+    
+    def current_frame(self, image=None):
+        if not self.frames:
+            return False, None
+        # Never hand out the cached image itself
+        return True, fill(image, self.frames[max(0, self.position)])
+
+
+class SyntheticSource(FrameSource):
+    """Generated test pattern with a frame counter and a bar that sweeps across
+    
+    The bar crosses the frame once every few seconds and is still in
+    between, so both busy and static scenes are exercised.
+    """
+    
+    def __init__(self, width=640, height=480, fps=30.0, realtime=True):
+        """Initialize synthetic source
+        
+        Args:
+            width: Frame width
+            height: Frame height
+            fps: Frames per second
+            realtime: Sleep to keep to fps
+        """
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.count = -1
+        self.sweep_frames = max(1, width // 8)
+        self.cycle_frames = self.sweep_frames + int(self.fps * 10)
+        
+        # Static background gradient, drawn once
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        self.background = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+    
+    def advance(self):
+        self.count += 1
+        return True
+    
+    def current_frame(self, image=None):
+        frame = fill(image, self.background)
+        bar_x = min(self.count % self.cycle_frames, self.sweep_frames) * 8 % self.width
+        frame[:, bar_x:bar_x + 20] = (0, 165, 255)
+        cv2.putText(frame, f"#{max(0, self.count)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.8, (255, 255, 255), 2)
+        return True, frame
+
+
+def fill(image, frame):
+    """Copy a frame into image if it fits, otherwise into a new array
+    
+    Returns:
+        numpy.ndarray: The filled array
+    """
+    if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+        np.copyto(image, frame)
+        return image
+    return frame.copy()
+
+
+def parse_source(spec):
+    """Split a camera source spec into its kind and argument
+    
+    Specs are stored in lane settings and look like:
+        0, "1"                          OpenCV camera index
+        "video:<path>"                  video file
+        "images:<folder>"               folder of still images
+        "synthetic" or "synthetic:640x480@30"  generated test pattern
+    
+    Args:
+        spec: Camera index or source spec string
+    
+    Returns:
+        tuple: (kind, argument) where kind is "device", "video", "images" or "synthetic"
+    """
+    if isinstance(spec, int):
+        return "device", spec
+    
+    text = str(spec).strip()
+    if text.lstrip('-').isdigit():
+        return "device", int(text)
+    
+    kind, _, argument = text.partition(':')
+    kind = kind.lower()
+    if kind not in ("video", "images", "synthetic"):
+        raise ValueError(f"Unknown camera source: {spec}")
+    return kind, argument
+
+
+def normalize_source(spec):
+    """Get the form of a spec stored in settings (camera indices as ints)
+    
+    Args:
+        spec: Camera index or source spec string
+    
+    Returns:
+        int or str: Normalized spec
+    """
+    kind, argument = parse_source(spec)
+    return argument if kind == "device" else str(spec).strip()
+
+
+def create_frame_source(spec, realtime=True, capture_settings=None):
+    """Create a frame source from a spec
+    
+    Args:
+        spec: Camera index or source spec string (see parse_source)
+        realtime: Pace file and synthetic sources to their frame rate
+        capture_settings: Requested camera mode, used by device sources only
+    
+    Returns:
+        FrameSource: New, opened source (check isOpened())
+    """
+    kind, argument = parse_source(spec)
+    
+    if kind == "device":
+        return DeviceSource(argument, capture_settings)
+    if kind == "video":
+        return VideoFileSource(argument, realtime)
+    if kind == "images":
+        return ImageDirSource(argument, realtime=realtime)
+    
+    # synthetic[:WxH[@fps]]
+    width, height, fps = 640, 480, 30.0
+    if argument:
+        size, _, rate = argument.partition('@')
+        if size:
+            width, height = (int(value) for value in size.lower().split('x'))
+        if rate:
+            fps = float(rate)
+    return SyntheticSource(width, height, fps, realtime)
@@ -0,0 +1,152 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from fileutil import write_atomic
+from camera import add_watermark
+from image_store import get_image_store
+from thumbnail_cache import get_thumbnail_cache
+from lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# Watermarking, encoding and writing run here, never on the Tk thread
+_pool = ThreadPoolExecutor(max_workers=config.IMAGE_SAVE_WORKERS, thread_name_prefix="image-save")
+
+
+def encode_jpeg(image, quality=None):
+    """Encode an image as JPEG
+    
+    Args:
+        image: BGR image
+        quality: JPEG quality 0-100 (defaults to config.JPEG_QUALITY)
+    
+    Returns:
+        bytes: Encoded JPEG data
+    """
+    quality = quality if quality is not None else config.JPEG_QUALITY
+    ok, buffer = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+
+def save_image(image, filepath, watermark_text=None, quality=None):
+    """Watermark, encode and write an image
+    
+    The image is watermarked in place, so callers must pass a frame they own.
+    
+    Args:
+        image: BGR image
+        filepath: Destination path
+        watermark_text: Text for the bottom strip (no watermark if None)
+        quality: JPEG quality (defaults to config.JPEG_QUALITY)
+    
+    Returns:
+        str: The file path written
+    """
+    if watermark_text:
+        add_watermark(image, watermark_text)
+    write_atomic(filepath, encode_jpeg(image, quality))
+    return filepath
+
+
+def submit_save(image, filepath, watermark_text=None, quality=None):
+    """Save an image in the background
+    
+    Args:
+        image: BGR image (ownership passes to the pipeline)
+        filepath: Destination path
+        watermark_text: Text for the bottom strip
+        quality: JPEG quality
+    
+    Returns:
+        concurrent.futures.Future: Resolves to the file path or raises the save error
+    """
+    return _pool.submit(save_image, image, filepath, watermark_text, quality)
+
+
+def make_thumbnail(image, width=None):
+    """Shrink an image for the thumbnail tier
+    
+    Args:
+        image: BGR image
+        width: Thumbnail width (defaults to config.THUMBNAIL_WIDTH)
+    
+    Returns:
+        numpy.ndarray: Thumbnail keeping the aspect ratio
+    """
+    width = width or config.THUMBNAIL_WIDTH
+    height, image_width = image.shape[:2]
+    if image_width <= width:
+        return image
+    return cv2.resize(image, (width, max(1, height * width // image_width)), interpolation=cv2.INTER_AREA)
+
+
+def frame_digest(image):
+    """Get the content key of a camera frame
+    
+    The frame is hashed before it is watermarked, so saving the same frame
+    again matches even though the watermark's timestamp differs.
+    
+    Args:
+        image: BGR image
+    
+    Returns:
+        str: Hex SHA-256 of the frame's shape and pixels
+    """
+    digest = hashlib.sha256(f"{image.shape}{image.dtype}".encode('ascii'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def store_image(image, filepath, watermark_text=None, store=None):
+    """Watermark an image and add it, with a thumbnail, to the image store
+    
+    An image whose frame was stored before is not encoded or written
+    again; the earlier file is reused.
+    
+    Args:
+        image: BGR image (watermarked in place)
+        filepath: Destination from ImageStore.path_for()
+        watermark_text: Text for the bottom strip (no watermark if None)
+        store: ImageStore (defaults to the application store)
+    
+    Returns:
+        str: Path of the stored image - an existing file if the content was
+            already stored
+    """
+    store = store or get_image_store()
+    digest = frame_digest(image)
+    existing = store.find(digest)
+    if existing:
+        return existing
+    
+    if watermark_text:
+        add_watermark(image, watermark_text)
+    
+    data = encode_jpeg(image)
+    thumbnail = encode_jpeg(make_thumbnail(image), config.THUMBNAIL_QUALITY)
+    path = store.put(data, filepath, thumbnail, digest)
+    
+    # Detail views and reports will never need to decode this frame again
+    if store is get_image_store():
+        try:
+            get_thumbnail_cache().warm(store.relative_name(path), image)
+        except Exception as e:
+            print(f"Thumbnail error: {str(e)}")
+    return path
+
+
+def submit_store(image, filepath, watermark_text=None):
+    """Store an image in the background
+    
+    Args:
+        image: BGR image (ownership passes to the pipeline)
+        filepath: Destination from ImageStore.path_for()
+        watermark_text: Text for the bottom strip
+    
+    Returns:
+        concurrent.futures.Future: Resolves to the stored path or raises the save error
+    """
+    return _pool.submit(store_image, image, filepath, watermark_text)
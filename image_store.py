@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+
+import config
+from fileutil import write_atomic
+
+
+class ImageStore:
+    """Date-sharded image folder with a content-hash index
+    
+    Full images are written to YYYY/MM/DD subfolders of the images folder,
+    each with a small thumbnail next to it. Every image's content key (a
+    SHA-256) is kept in an append-only JSON-lines index, so saving the same
+    content again reuses the existing file. Camera images are keyed on the
+    frame before it is watermarked, since the watermark's timestamp differs
+    on every save. Records refer to images by their path relative
+    to the images folder; older records holding a bare file name still
+    resolve to the flat folder.
+    """
+    
+    def __init__(self, root=None, index_file=None):
+        """Initialize image store
+        
+        Args:
+            root: Images folder (defaults to config.IMAGES_FOLDER)
+            index_file: Hash index (defaults to config.IMAGE_INDEX_FILE)
+        """
+        self.root = root or config.IMAGES_FOLDER
+        self.index_file = index_file or config.IMAGE_INDEX_FILE
+        self._lock = threading.Lock()
+        self._hashes = None  # sha256 -> relative name
+    
+    def path_for(self, filename, when=None):
+        """Get the full path a new image should be written to
+        
+        Args:
+            filename: Image file name
+            when: Capture time (defaults to now)
+        
+        Returns:
+            str: Absolute path in the day's folder
+        """
+        when = when or datetime.datetime.now()
+        return os.path.join(self.root, when.strftime("%Y"), when.strftime("%m"), when.strftime("%d"), filename)
+    
+    def relative_name(self, path):
+        """Get the name stored in records for an image path
+        
+        Returns:
+            str: Path relative to the images folder, with forward slashes
+        """
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+    
+    def resolve(self, name):
+        """Get the full path of an image named in a record
+        
+        Args:
+            name: Relative name (or a bare legacy file name)
+        
+        Returns:
+            str: Absolute path ('' if name is empty)
+        """
+        if not name:
+            return ""
+        return os.path.join(self.root, *name.split('/'))
+    
+    def thumbnail_path(self, path):
+        """Get the thumbnail path stored alongside a full image"""
+        stem, _ = os.path.splitext(path)
+        return f"{stem}{config.THUMBNAIL_SUFFIX}"
+    
+    def is_thumbnail(self, path):
+        """True if a path is a thumbnail rather than a full image"""
+        return path.endswith(config.THUMBNAIL_SUFFIX)
+    
+    def find(self, digest):
+        """Find an existing image with the same content
+        
+        Args:
+            digest: Content key, from content_digest() or the caller's own
+                SHA-256 of the image's source
+        
+        Returns:
+            str: Absolute path of the existing image or None
+        """
+        with self._lock:
+            return self._existing(digest)
+    
+    def put(self, data, path, thumbnail=None, digest=None):
+        """Store an image, reusing an existing one with the same content
+        
+        Args:
+            data: Encoded full image bytes
+            path: Destination from path_for()
+            thumbnail: Encoded thumbnail bytes (optional)
+            digest: Content key (defaults to content_digest(data))
+        
+        Returns:
+            str: Absolute path of the stored (or existing identical) image
+        """
+        digest = digest or content_digest(data)
+        with self._lock:
+            existing = self._existing(digest)
+            if existing:
+                return existing
+            
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, data)
+            if thumbnail is not None:
+                write_atomic(self.thumbnail_path(path), thumbnail)
+            
+            name = self.relative_name(path)
+            self._hashes[digest] = name
+            self._append_index({"sha256": digest, "name": name, "bytes": len(data),
+                                "time": time.strftime("%Y-%m-%d %H:%M:%S")})
+            return path
+    
+    def collect_garbage(self, referenced, grace_seconds=None, dry_run=False):
+        """Delete images that no record refers to
+        
+        Images newer than the grace period are kept, since a weighment's
+        images are written before its record is saved.
+        
+        Args:
+            referenced: Image names stored in records
+            grace_seconds: Minimum age before deletion (defaults to config.IMAGE_GC_GRACE_DAYS)
+            dry_run: Only report what would be deleted
+        
+        Returns:
+            list: Relative names of the deleted (or deletable) images
+        """
+        if grace_seconds is None:
+            grace_seconds = config.IMAGE_GC_GRACE_DAYS * 86400
+        referenced = {name.replace('\\', '/') for name in referenced if name}
+        cutoff = time.time() - grace_seconds
+        removed = []
+        
+        with self._lock:
+            for folder, _, files in os.walk(self.root):
+                for filename in files:
+                    path = os.path.join(folder, filename)
+                    if path == self.index_file or self.is_thumbnail(path):
+                        continue
+                    
+                    try:
+                        if os.path.getmtime(path) > cutoff:
+                            continue
+                    except OSError:
+                        continue
+                    
+                    # Interrupted writes
+                    if filename.endswith('.tmp'):
+                        if not dry_run:
+                            os.remove(path)
+                        continue
+                    
+                    name = self.relative_name(path)
+                    if name in referenced:
+                        continue
+                    
+                    removed.append(name)
+                    if not dry_run:
+                        os.remove(path)
+                        thumbnail = self.thumbnail_path(path)
+                        if os.path.exists(thumbnail):
+                            os.remove(thumbnail)
+            
+            if removed and not dry_run:
+                self._compact_index()
+                
+                # Drop day folders that are now empty
+                for folder, _, _ in os.walk(self.root, topdown=False):
+                    if folder != self.root and not os.listdir(folder):
+                        os.rmdir(folder)
+        
+        return removed
+    
+    def _existing(self, digest):
+        """Path of an indexed image that still exists (lock held)"""
+        self._load_index()
+        name = self._hashes.get(digest)
+        if name:
+            path = self.resolve(name)
+            if os.path.exists(path):
+                return path
+            del self._hashes[digest]
+        return None
+    
+    def _load_index(self):
+        """Read the hash index on first use (lock held)"""
+        if self._hashes is not None:
+            return
+        
+        self._hashes = {}
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._hashes[entry["sha256"]] = entry["name"]
+                    except (ValueError, KeyError):
+                        continue
+        except Exception as e:
+            print(f"Error loading image index: {str(e)}")
+    
+    def _append_index(self, entry):
+        """Append one entry to the index file (lock held)"""
+        try:
+            with open(self.index_file, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"Error writing image index: {str(e)}")
+    
+    def _compact_index(self):
+        """Rewrite the index with only images that still exist (lock held)"""
+        self._load_index()
+        self._hashes = {digest: name for digest, name in self._hashes.items()
+                        if os.path.exists(self.resolve(name))}
+        lines = "".join(json.dumps({"sha256": digest, "name": name}) + "\n"
+                        for digest, name in self._hashes.items())
+        write_atomic(self.index_file, lines.encode('utf-8'))
+
+
+def content_digest(data):
+    """Get the content key of encoded image bytes
+    
+    Returns:
+        str: Hex SHA-256
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+# Shared store for the application's images folder
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_image_store():
+    """Get the application's image store
+    
+    Returns:
+        ImageStore: Shared store for config.IMAGES_FOLDER
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
+
+
+def image_path(name):
+    """Get the full path of an image named in a record
+    
+    Args:
+        name: Image name from a record
+    
+    Returns:
+        str: Absolute path ('' if name is empty)
+    """
+    return get_image_store().resolve(name)
@@ -0,0 +1,216 @@
+import os
+import json
+
+import config
+from weighbridge import WeighbridgeManager, WeightState
+
+# Settings for a lane that has not been configured yet
+DEFAULT_LANE_SETTINGS = {
+    "name": "Lane 1",
+    "com_port": "",
+    "baud_rate": 9600,
+    "data_bits": 8,
+    "parity": "None",
+    "stop_bits": 1.0,
+    "front_camera_index": 0,
+    "back_camera_index": 1,
+    "capture_mode": config.CAMERA_CAPTURE_MODE,
+    "front_camera_capture": {},
+    "back_camera_capture": {},
+    "auto_capture": config.AUTO_CAPTURE_ENABLED,
+    "auto_capture_min_weight": config.AUTO_CAPTURE_MIN_WEIGHT,
+    "auto_capture_stable_seconds": config.AUTO_CAPTURE_STABLE_SECONDS,
+    "auto_capture_rearm_weight": config.AUTO_CAPTURE_REARM_WEIGHT
+}
+
+
+def create_weighbridge_manager(update_callback=None, weight_state=None):
+    """Create a weighbridge manager for the configured I/O backend
+    
+    Args:
+        update_callback: Function to call when weight is updated (non-UI thread)
+        weight_state: WeightState the manager publishes to
+    
+    Returns:
+        WeighbridgeManager or AsyncWeighbridgeManager
+    """
+    if config.WEIGHBRIDGE_IO == "asyncio":
+        from weighbridge_async import AsyncWeighbridgeManager
+        return AsyncWeighbridgeManager(update_callback, weight_state)
+    return WeighbridgeManager(update_callback, weight_state)
+
+
+class Lane:
+    """One weighbridge lane with its own port settings, weighbridge and cameras"""
+    
+    def __init__(self, lane_id, settings=None, update_callback=None):
+        """Initialize lane
+        
+        Args:
+            lane_id: Index of the lane in the registry
+            settings: Lane settings dictionary (missing keys use defaults)
+            update_callback: Function to call when this lane's weight is updated
+        """
+        self.lane_id = lane_id
+        self.settings = dict(DEFAULT_LANE_SETTINGS)
+        self.settings["name"] = f"Lane {lane_id + 1}"
+        self.settings.update(settings or {})
+        
+        # Each lane has its own buffers and stability state
+        self.weight_state = WeightState()
+        self.weighbridge = create_weighbridge_manager(update_callback, self.weight_state)
+        
+        # Entry form bound to this lane
+        self.form = None
+    
+    @property
+    def name(self):
+        """Display name of the lane"""
+        return self.settings.get("name", f"Lane {self.lane_id + 1}")
+    
+    @property
+    def is_connected(self):
+        """True if the lane's weighbridge is connected"""
+        return self.weighbridge.weighbridge_connected
+    
+    def camera_capture_settings(self, side):
+        """Get the capture mode requested for one of the lane's cameras
+        
+        Args:
+            side: "front" or "back"
+        
+        Returns:
+            dict: config.CAMERA_CAPTURE_DEFAULTS overridden by the lane's settings
+        """
+        settings = dict(config.CAMERA_CAPTURE_DEFAULTS)
+        settings.update(self.settings.get(f"{side}_camera_capture") or {})
+        return settings
+    
+    def bind_form(self, form):
+        """Bind an entry form to this lane
+        
+        Args:
+            form: MainForm that captures weighments from this lane
+        """
+        self.form = form
+    
+    def connect(self):
+        """Connect the lane's weighbridge using its saved port settings
+        
+        Returns:
+            bool: True if connected successfully, False otherwise
+        """
+        return self.weighbridge.connect(
+            self.settings["com_port"],
+            self.settings["baud_rate"],
+            self.settings["data_bits"],
+            self.settings["parity"],
+            self.settings["stop_bits"]
+        )
+    
+    def disconnect(self):
+        """Disconnect the lane's weighbridge
+        
+        Returns:
+            bool: True if disconnected successfully, False otherwise
+        """
+        return self.weighbridge.disconnect()
+
+
+class LaneRegistry:
+    """Registry of the weighbridge lanes handled by this application instance"""
+    
+    def __init__(self, lanes_file=None, update_callback=None):
+        """Initialize lane registry
+        
+        Args:
+            lanes_file: JSON file holding lane settings (defaults to config.LANES_FILE)
+            update_callback: Function to call when any lane's weight is updated
+        """
+        self.lanes_file = lanes_file or config.LANES_FILE
+        self.update_callback = update_callback
+        self.lanes = []
+        self.load()
+    
+    def load(self):
+        """Load lanes from the settings file, falling back to a single lane"""
+        lane_settings = []
+        
+        try:
+            if os.path.exists(self.lanes_file):
+                with open(self.lanes_file, 'r') as f:
+                    lane_settings = json.load(f).get("lanes", [])
+        except Exception as e:
+            print(f"Error loading lanes: {str(e)}")
+        
+        if not lane_settings:
+            lane_settings = [{}]
+        
+        self.lanes = [Lane(i, settings, self.update_callback) for i, settings in enumerate(lane_settings)]
+    
+    def save(self):
+        """Save lane settings to file
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            os.makedirs(os.path.dirname(self.lanes_file), exist_ok=True)
+            with open(self.lanes_file, 'w') as f:
+                json.dump({"lanes": [lane.settings for lane in self.lanes]}, f, indent=4)
+            return True
+        except Exception as e:
+            print(f"Error saving lanes: {str(e)}")
+            return False
+    
+    def add_lane(self, settings=None):
+        """Add a new lane
+        
+        Args:
+            settings: Lane settings dictionary
+        
+        Returns:
+            Lane: The new lane
+        """
+        lane = Lane(len(self.lanes), settings, self.update_callback)
+        self.lanes.append(lane)
+        return lane
+    
+    def get(self, lane_id):
+        """Get a lane by index
+        
+        Args:
+            lane_id: Index of the lane
+        
+        Returns:
+            Lane: Lane or None if not found
+        """
+        if 0 <= lane_id < len(self.lanes):
+            return self.lanes[lane_id]
+        return None
+    
+    def find_by_name(self, name):
+        """Get a lane by display name
+        
+        Args:
+            name: Lane name
+        
+        Returns:
+            Lane: Lane or None if not found
+        """
+        for lane in self.lanes:
+            if lane.name == name:
+                return lane
+        return None
+    
+    def disconnect_all(self):
+        """Disconnect every lane's weighbridge"""
+        for lane in self.lanes:
+            if lane.is_connected:
+                lane.disconnect()
+    
+    def __iter__(self):
+        return iter(self.lanes)
+    
+    def __len__(self):
+        return len(self.lanes)
@@ -0,0 +1,62 @@
+import sys
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported when first used
+    
+    Heavy libraries (OpenCV, NumPy, pandas, Pillow) take seconds to load on
+    a cold start but are not needed until a camera starts or a report is
+    written. Modules bind the stand-in at import time and use it like the
+    real module; the first attribute access imports the module.
+    """
+    
+    def __init__(self, name):
+        """Initialize lazy module
+        
+        Args:
+            name: Full module name, e.g. "PIL.ImageTk"
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+    
+    @property
+    def loaded(self):
+        """True once the real module has been imported"""
+        return self._module is not None
+    
+    def _load(self):
+        """Import the real module (thread-safe through the import lock)"""
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+        return module
+    
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+    
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+    
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name):
+    """Get a module that is imported the first time one of its attributes is used
+    
+    An ImportError for a missing library is raised at that first use rather
+    than when the calling module is imported.
+    
+    Args:
+        name: Full module name
+    
+    Returns:
+        module or LazyModule: The module itself if it is already imported
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -1,20 +1,26 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import os
+import time
 import datetime
-import cv2
-from PIL import Image, ImageTk
-import threading
 
 import config
-from ui_components import HoverButton
-from camera import CameraView, add_watermark
+from ui_components import HoverButton, when_done
+from camera import CameraView
+from image_pipeline import submit_store
+from image_store import get_image_store
+from camera_service import submit_capture_pair
+from lazy_import import lazy_module
+
+Image = lazy_module("PIL.Image")
+ImageTk = lazy_module("PIL.ImageTk")
 
 class MainForm:
     """Main data entry form for vehicle information"""
     
-    def __init__(self, parent, notebook=None, summary_update_callback=None, data_manager=None):
+    def __init__(self, parent, notebook=None, summary_update_callback=None, data_manager=None,
+                 weight_state=None, save_record_callback=None, front_camera_index=0, back_camera_index=1,
+                 capture_mode=config.CAMERA_CAPTURE_MODE, front_camera_capture=None, back_camera_capture=None):
         """Initialize the main form
         
         Args:
@@ -22,18 +28,32 @@ class MainForm:
             notebook: Notebook for tab switching
             summary_update_callback: Function to call to update summary view
             data_manager: Data manager instance for checking existing entries
+            weight_state: WeightState published by this form's weighbridge lane
+            save_record_callback: Function to call to save this form's record
+            front_camera_index: Camera index or source spec of the lane's front camera
+            back_camera_index: Camera index or source spec of the lane's back camera
+            capture_mode: Which buffered frame to save ("latest", "timestamp" or "sharpest")
+            front_camera_capture: Requested resolution/fps/codec of the front camera
+            back_camera_capture: Requested resolution/fps/codec of the back camera
         """
         self.parent = parent
         self.notebook = notebook
         self.summary_update_callback = summary_update_callback
         self.data_manager = data_manager
+        self.weight_state = weight_state
+        self.save_record_callback = save_record_callback
+        self.front_camera_index = front_camera_index
+        self.back_camera_index = back_camera_index
+        self.capture_mode = capture_mode
+        self.front_camera_capture = front_camera_capture
+        self.back_camera_capture = back_camera_capture
+        
+        # Time of the last weighment, used to pick frames from the camera buffers
+        self.weighment_time = None
         
         # Create form variables
         self.init_variables()
         
-        # Camera lock to prevent both cameras from being used simultaneously
-        self.camera_lock = threading.Lock()
-        
         # Create UI elements
         self.create_form(parent)
         self.create_cameras_panel(parent)
@@ -65,9 +85,17 @@ class MainForm:
         self.front_image_path = None
         self.back_image_path = None
         
+        # Image saves still running, and what to do when they have finished
+        self.pending_image_saves = set()
+        self.images_saved_callbacks = []
+        
         # Weighment state
         self.current_weighment = "first"  # Can be "first" or "second"
         
+        # Auto capture status (set by AutoCapture when attached)
+        self.auto_capture = None
+        self.auto_capture_status_var = tk.StringVar()
+        
         # If data manager is available, generate the next ticket number
         if hasattr(self, 'data_manager') and self.data_manager:
             self.generate_next_ticket_number()
@@ -236,6 +264,11 @@ class MainForm:
                                   font=("Segoe UI", 8, "italic"))
         spacebar_label.grid(row=3, column=0, columnspan=5, pady=(5, 0), sticky=tk.E)
         
+        # Auto capture status
+        ttk.Label(weighment_frame, textvariable=self.auto_capture_status_var, 
+                 font=("Segoe UI", 8, "italic"), foreground=config.COLORS["primary"]).grid(
+                     row=3, column=0, columnspan=3, pady=(5, 0), sticky=tk.W)
+        
         # Image status indicators
         image_status_frame = ttk.Frame(form_inner)
         image_status_frame.grid(row=7, column=0, columnspan=3, sticky=tk.W, padx=3, pady=3)
@@ -323,19 +356,32 @@ class MainForm:
             self.capture_second_weighment()
     
     def capture_first_weighment(self):
-        """Capture the first weighment"""
+        """Capture the first weighment
+        
+        Returns:
+            bool: True if the weight was captured
+        """
         # Validate required fields
         if not self.validate_basic_fields():
-            return
+            return False
             
         # Get current weight from weighbridge
         current_weight = self.get_current_weighbridge_value()
         if current_weight is None:
-            return
+            return False
             
         # Set first weighment
         self.first_weight_var.set(str(current_weight))
         
+        # Truck is weighed - no automatic capture until the deck empties
+        if self.auto_capture:
+            self.auto_capture.disarm()
+        
+        # Photograph the vehicle on the bridge as of this moment
+        self.weighment_time = time.time()
+        self.front_camera.reference_time = self.weighment_time
+        self.back_camera.reference_time = self.weighment_time
+        
         # Set timestamp
         now = datetime.datetime.now()
         timestamp = now.strftime("%d-%m-%Y %H:%M:%S")
@@ -349,10 +395,14 @@ class MainForm:
         self.current_weighment = "second"
         
         # Automatically save the record to add to the pending queue
-        if hasattr(self, 'summary_update_callback'):
+        def save():
+            if not hasattr(self, 'summary_update_callback'):
+                return
             # Try to find the main app to trigger save
             app = self.find_main_app()
-            if app and hasattr(app, 'save_record'):
+            if self.save_record_callback:
+                self.save_record_callback()
+            elif app and hasattr(app, 'save_record'):
                 app.save_record()
             else:
                 # Show confirmation if auto-save not available
@@ -360,21 +410,38 @@ class MainForm:
                                   f"First weighment recorded: {current_weight} kg\n"
                                   f"Please save the record to add to the pending queue.")
     
+        # Saved once the images are in, so the record includes them
+        self.trigger_cameras(then=save)
+        return True
+    
     def capture_second_weighment(self):
-        """Capture the second weighment"""
+        """Capture the second weighment
+        
+        Returns:
+            bool: True if the weight was captured
+        """
         # Validate first weighment exists
         if not self.first_weight_var.get():
             messagebox.showerror("Error", "Please record the first weighment first.")
-            return
+            return False
             
         # Get current weight from weighbridge
         current_weight = self.get_current_weighbridge_value()
         if current_weight is None:
-            return
+            return False
             
         # Set second weighment
         self.second_weight_var.set(str(current_weight))
         
+        # Truck is weighed - no automatic capture until the deck empties
+        if self.auto_capture:
+            self.auto_capture.disarm()
+        
+        # Photograph the vehicle on the bridge as of this moment
+        self.weighment_time = time.time()
+        self.front_camera.reference_time = self.weighment_time
+        self.back_camera.reference_time = self.weighment_time
+        
         # Set timestamp
         now = datetime.datetime.now()
         timestamp = now.strftime("%d-%m-%Y %H:%M:%S")
@@ -384,49 +451,49 @@ class MainForm:
         self.calculate_net_weight()
         
         # Automatically save the record to complete the process
-        app = self.find_main_app()
-        if app and hasattr(app, 'save_record'):
-            app.save_record()
-        else:
-            # Show confirmation if auto-save not available
-            messagebox.showinfo("Second Weighment", 
-                          f"Second weighment recorded: {current_weight} kg\n"
-                          f"Net weight: {self.net_weight_var.get()} kg\n"
-                          f"Please save the record to complete the process.")
+        def save():
+            app = self.find_main_app()
+            if self.save_record_callback:
+                self.save_record_callback()
+            elif app and hasattr(app, 'save_record'):
+                app.save_record()
+            else:
+                # Show confirmation if auto-save not available
+                messagebox.showinfo("Second Weighment", 
+                              f"Second weighment recorded: {current_weight} kg\n"
+                              f"Net weight: {self.net_weight_var.get()} kg\n"
+                              f"Please save the record to complete the process.")
+        
+        # Saved once the images are in, so the record includes them
+        self.trigger_cameras(then=save)
+        return True
     
     def get_current_weighbridge_value(self):
         """Get the current value from the weighbridge"""
-        try:
-            # Try to find the main app instance to access weighbridge data
-            app = self.find_main_app()
-            if app and hasattr(app, 'settings_panel'):
-                # Get weight from the weighbridge display
-                weight_str = app.settings_panel.current_weight_var.get()
+        if not self.weight_state:
+            messagebox.showerror("Application Error", 
+                               "Cannot access weighbridge settings. Please restart the application.")
+            return None
                 
-                # Check if weighbridge is connected
-                is_connected = app.settings_panel.weighbridge and app.settings_panel.wb_status_var.get() == "Status: Connected"
+        reading = self.weight_state.snapshot()
                 
-                if not is_connected:
-                    messagebox.showerror("Weighbridge Error", 
-                                       "Weighbridge is not connected. Please connect the weighbridge in Settings tab.")
-                    return None
+        # Check if weighbridge is connected
+        if not reading.connected:
+            messagebox.showerror("Weighbridge Error", 
+                               "Weighbridge is not connected. Please connect the weighbridge in Settings tab.")
+            return None
                 
-                # Extract number from string like "123.45 kg"
-                import re
-                match = re.search(r'(\d+\.?\d*)', weight_str)
-                if match:
-                    return float(match.group(1))
-                else:
-                    messagebox.showerror("Error", "Could not read weight from weighbridge. Please check connection.")
-                    return None
-            else:
-                messagebox.showerror("Application Error", 
-                                   "Cannot access weighbridge settings. Please restart the application.")
-                return None
+        if not reading.seq:
+            messagebox.showerror("Error", "Could not read weight from weighbridge. Please check connection.")
+            return None
                 
-        except Exception as e:
-            messagebox.showerror("Weighbridge Error", f"Error reading weighbridge: {str(e)}")
+        # A weight that stopped updating is not the truck on the deck now
+        if time.time() - reading.timestamp > config.WEIGHT_STALE_SECONDS:
+            messagebox.showerror("Weighbridge Error",
+                               "The weighbridge reading is out of date. Please check the connection.")
             return None
+        
+        return reading.weight
     
     def find_main_app(self):
         """Find the main app instance to access weighbridge data"""
@@ -492,7 +559,7 @@ class MainForm:
         ttk.Label(front_panel, text="Front Camera").pack(anchor=tk.W, pady=2)
         
         # Create front camera
-        self.front_camera = CameraView(front_panel)
+        self.front_camera = CameraView(front_panel, self.front_camera_index, self.front_camera_capture)
         self.front_camera.save_function = self.save_front_image
         
         # Back camera
@@ -503,8 +570,69 @@ class MainForm:
         ttk.Label(back_panel, text="Back Camera").pack(anchor=tk.W, pady=2)
         
         # Create back camera
-        self.back_camera = CameraView(back_panel)
+        self.back_camera = CameraView(back_panel, self.back_camera_index, self.back_camera_capture)
         self.back_camera.save_function = self.save_back_image
+        
+        self.set_capture_mode(self.capture_mode)
+    
+    def set_capture_mode(self, capture_mode):
+        """Choose which buffered frame is saved on capture
+        
+        Args:
+            capture_mode: "latest", "timestamp" (frame at the weighment time)
+                or "sharpest" (sharpest frame before the trigger)
+        """
+        self.capture_mode = capture_mode
+        for camera in (self.front_camera, self.back_camera):
+            camera.capture_mode = capture_mode
+            camera.reference_time = self.weighment_time
+    
+    def trigger_cameras(self, then=None):
+        """Capture front and back images together for the current weighment
+        
+        Both cameras are grabbed at the same moment, in the background so the
+        UI does not wait for a camera. Cameras that already have an image for
+        this record (saved manually or at the first weighment) are left alone.
+        
+        Args:
+            then: Function called on the Tk thread once the images have been
+                saved (see when_images_saved)
+        """
+        front_service = self.front_camera.service if not self.front_image_path else None
+        back_service = self.back_camera.service if not self.back_image_path else None
+        if front_service is None and back_service is None:
+            if then:
+                self.when_images_saved(then)
+            return
+        
+        future = submit_capture_pair(front_service, back_service,
+                                     mode=self.capture_mode, timestamp=self.weighment_time)
+        when_done(self.parent, future, lambda f: self.cameras_triggered(f, then))
+    
+    def cameras_triggered(self, future, then=None):
+        """Save the frames from a finished trigger_cameras() capture
+        
+        Args:
+            future: Finished capture_pair() future
+            then: Function to call once the frames have been saved
+        """
+        try:
+            front, back, skew = future.result()
+        except Exception as e:
+            print(f"Camera capture error: {str(e)}")
+            front, back, skew = None, None, None
+        
+        if skew is not None and skew > 1000.0 / config.CAMERA_PREVIEW_FPS:
+            print(f"Front/back capture skew {skew:.0f} ms")
+        
+        if front is not None:
+            self.save_front_image(front, notify=False)
+        
+        if back is not None:
+            self.save_back_image(back, notify=False)
+        
+        if then:
+            self.when_images_saved(then)
     
     def validate_vehicle_number(self):
         """Validate that vehicle number is entered before capturing images"""
@@ -513,79 +641,135 @@ class MainForm:
             return False
         return True
     
-    def save_front_image(self, captured_image=None):
-        """Save the front view camera image with watermark"""
-        if not self.validate_vehicle_number():
-            return False
+    def save_front_image(self, captured_image=None, notify=True):
+        """Save the front view camera image with watermark
         
-        # Use captured image or get from camera
-        image = captured_image if captured_image is not None else self.front_camera.captured_image
+        Args:
+            captured_image: Frame to save (camera's last frame if None)
+            notify: Show a confirmation message when saved
+        """
+        return self.save_camera_image("front", captured_image, notify)
+    
+    def save_back_image(self, captured_image=None, notify=True):
+        """Save the back view camera image with watermark
         
-        if image is not None:
-            # Generate filename and watermark text
-            site_name = self.site_var.get().replace(" ", "_")
-            vehicle_no = self.vehicle_var.get().replace(" ", "_")
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Watermark text
-            watermark_text = f"{site_name} - {vehicle_no} - {timestamp}"
-            
-            # Add watermark
-            watermarked_image = add_watermark(image, watermark_text)
-            
-            # Save file path
-            filename = f"{site_name}_{vehicle_no}_{timestamp}_front.jpg"
-            filepath = os.path.join(config.IMAGES_FOLDER, filename)
-            
-            # Save the image
-            cv2.imwrite(filepath, watermarked_image)
-            
-            # Update status
-            self.front_image_path = filepath
-            self.front_image_status_var.set("Front: ✓")
-            self.front_image_status.config(foreground="green")
-            
-            messagebox.showinfo("Success", "Front image saved!")
-            return True
-            
-        return False
+        Args:
+            captured_image: Frame to save (camera's last frame if None)
+            notify: Show a confirmation message when saved
+        """
+        return self.save_camera_image("back", captured_image, notify)
     
-    def save_back_image(self, captured_image=None):
-        """Save the back view camera image with watermark"""
+    def save_camera_image(self, side, captured_image=None, notify=True):
+        """Watermark and save a camera image in the background
+        
+        The status label turns green when the write completes. Records are
+        saved through when_images_saved(), so they get the stored path.
+        
+        Args:
+            side: "front" or "back"
+            captured_image: Frame to save, handed over to the image pipeline
+                (a copy of the camera's last frame if None)
+            notify: Show a confirmation message when saved
+        
+        Returns:
+            bool: True if the save was started
+        """
         if not self.validate_vehicle_number():
             return False
         
-        # Use captured image or get from camera
-        image = captured_image if captured_image is not None else self.back_camera.captured_image
+        camera = self.front_camera if side == "front" else self.back_camera
+        image = captured_image
+        if image is None and camera.captured_image is not None:
+            image = camera.captured_image.copy()
+        
+        if image is None:
+            return False
+        
+        # Generate filename and watermark text
+        site_name = self.site_var.get().replace(" ", "_")
+        vehicle_no = self.vehicle_var.get().replace(" ", "_")
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        watermark_text = f"{site_name} - {vehicle_no} - {timestamp}"
         
-        if image is not None:
-            # Generate filename and watermark text
-            site_name = self.site_var.get().replace(" ", "_")
-            vehicle_no = self.vehicle_var.get().replace(" ", "_")
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{site_name}_{vehicle_no}_{timestamp}_{side}.jpg"
+        filepath = get_image_store().path_for(filename)
             
-            # Watermark text
-            watermark_text = f"{site_name} - {vehicle_no} - {timestamp}"
+        setattr(self, f"{side}_image_path", filepath)
+        status_var, status_label = self.image_status_widgets(side)
+        status_var.set(f"{side.title()}: ...")
+        status_label.config(foreground="orange")
             
-            # Add watermark
-            watermarked_image = add_watermark(image, watermark_text)
+        future = submit_store(image, filepath, watermark_text)
+        self.pending_image_saves.add(future)
+        when_done(self.parent, future,
+                  lambda f: self.image_saved(side, filepath, f, notify))
+        return True
             
-            # Save file path
-            filename = f"{site_name}_{vehicle_no}_{timestamp}_back.jpg"
-            filepath = os.path.join(config.IMAGES_FOLDER, filename)
+    def image_saved(self, side, filepath, future, notify):
+        """Update the image status once a background save finishes
             
-            # Save the image
-            cv2.imwrite(filepath, watermarked_image)
+        Args:
+            side: "front" or "back"
+            filepath: Path that was being written
+            future: Finished save future
+            notify: Show a confirmation message
+        """
+        self.pending_image_saves.discard(future)
+        try:
+            try:
+                stored = future.result()
+            except Exception as e:
+                # Reported even if the form has moved on to another record
+                if getattr(self, f"{side}_image_path") == filepath:
+                    setattr(self, f"{side}_image_path", None)
+                    status_var, status_label = self.image_status_widgets(side)
+                    status_var.set(f"{side.title()}: ✗")
+                    status_label.config(foreground="red")
+                messagebox.showerror("Error", f"Failed to save {side} image: {str(e)}")
+                return
             
-            # Update status
-            self.back_image_path = filepath
-            self.back_image_status_var.set("Back: ✓")
-            self.back_image_status.config(foreground="green")
+            # Ignore saves for a record that has since been cleared or replaced
+            if getattr(self, f"{side}_image_path") != filepath:
+                return
             
-            messagebox.showinfo("Success", "Back image saved!")
-            return True
+            # Identical content already in the store is reused
+            setattr(self, f"{side}_image_path", stored)
+            status_var, status_label = self.image_status_widgets(side)
+            status_var.set(f"{side.title()}: ✓")
+            status_label.config(foreground="green")
+            if notify:
+                messagebox.showinfo("Success", f"{side.title()} image saved!")
+        finally:
+            if not self.pending_image_saves:
+                self.run_images_saved_callbacks()
             
-        return False
+    def when_images_saved(self, callback):
+        """Call a function once every image save in progress has finished
+        
+        Runs the function straight away if nothing is being saved. Used to
+        save records only after their images are stored, so the record gets
+        the final path (an existing file when the content was already
+        stored) and no path for an image that failed to save.
+        
+        Args:
+            callback: Function called on the Tk thread with no arguments
+        """
+        if self.pending_image_saves:
+            self.images_saved_callbacks.append(callback)
+        else:
+            callback()
+    
+    def run_images_saved_callbacks(self):
+        """Call the functions waiting in when_images_saved()"""
+        callbacks, self.images_saved_callbacks = self.images_saved_callbacks, []
+        for callback in callbacks:
+            callback()
+    
+    def image_status_widgets(self, side):
+        """Get the status variable and label for a camera side"""
+        if side == "front":
+            return self.front_image_status_var, self.front_image_status
+        return self.back_image_status_var, self.back_image_status
     
     def get_form_data(self):
         """Get form data as a dictionary"""
@@ -608,8 +792,8 @@ class MainForm:
             'second_timestamp': self.second_timestamp_var.get(),
             'net_weight': self.net_weight_var.get(),
             'material_type': self.material_type_var.get(),
-            'front_image': os.path.basename(self.front_image_path) if self.front_image_path else "",
-            'back_image': os.path.basename(self.back_image_path) if self.back_image_path else ""
+            'front_image': get_image_store().relative_name(self.front_image_path) if self.front_image_path else "",
+            'back_image': get_image_store().relative_name(self.back_image_path) if self.back_image_path else ""
         }
         
         return data
@@ -697,6 +881,6 @@ class MainForm:
     def on_closing(self):
         """Handle cleanup when closing"""
         if hasattr(self, 'front_camera'):
-            self.front_camera.stop_camera()
+            self.front_camera.close()
         if hasattr(self, 'back_camera'):
-            self.back_camera.stop_camera()
\ No newline at end of file
+            self.back_camera.close()
\ No newline at end of file
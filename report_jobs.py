@@ -0,0 +1,198 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from ui_components import HoverButton, when_done
+
+# Reports run one at a time, off the Tk thread, so weighing carries on
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+
+# Jobs queued or running, so they can be cancelled on shutdown
+_jobs = set()
+_jobs_lock = threading.Lock()
+
+
+class ReportCancelled(Exception):
+    """Raised inside a report job when the user cancels it"""
+
+
+class ReportJob:
+    """A report export running on the report worker thread
+    
+    The export function is called as function(path, progress=..., **kwargs),
+    with a temporary path beside the report's file, and must not touch Tk. Its progress callback publishes the fraction done
+    for the UI to poll, and raises ReportCancelled once cancel() has been
+    called, which unwinds the export at its next progress report.
+    """
+    
+    def __init__(self, function, filename, **kwargs):
+        """Initialize report job
+        
+        Args:
+            function: Export function, e.g. reports.write_excel
+            filename: File the report is written to
+            **kwargs: Extra arguments for the export function (e.g. query)
+        """
+        self.function = function
+        self.filename = filename
+        self.kwargs = kwargs
+        self.progress = 0.0
+        self.future = None
+        self._cancel_event = threading.Event()
+    
+    @property
+    def cancelled(self):
+        """True once the job has been asked to stop"""
+        return self._cancel_event.is_set()
+    
+    def start(self):
+        """Queue the job on the report worker
+        
+        Returns:
+            concurrent.futures.Future: Resolves to the file name, or raises
+                ReportCancelled or the export error
+        """
+        with _jobs_lock:
+            _jobs.add(self)
+        self.future = _pool.submit(self._run)
+        return self.future
+    
+    def cancel(self):
+        """Ask the job to stop at its next progress report"""
+        self._cancel_event.set()
+    
+    def _report(self, done, total):
+        """Progress callback handed to the export function"""
+        if self._cancel_event.is_set():
+            raise ReportCancelled()
+        self.progress = min(1.0, done / total) if total else 0.0
+    
+    def _run(self):
+        """Run the export (worker thread)
+        
+        The report is written under a temporary name beside the target and
+        renamed into place once complete, so cancelling or failing never
+        touches an existing file the operator chose to overwrite.
+        """
+        tmp_path = f"{self.filename}.part"
+        try:
+            if self._cancel_event.is_set():
+                raise ReportCancelled()
+            self.function(tmp_path, progress=self._report, **self.kwargs)
+            os.replace(tmp_path, self.filename)
+            return self.filename
+        except BaseException:
+            # Don't leave a half-written report behind
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            with _jobs_lock:
+                _jobs.discard(self)
+
+
+class ReportProgressDialog:
+    """Small window showing a report job's progress with a Cancel button
+    
+    The dialog is not modal, so operators can keep working while the
+    report is written. It polls the job from the Tk thread.
+    """
+    
+    def __init__(self, parent, job, title):
+        """Initialize progress dialog
+        
+        Args:
+            parent: Parent widget
+            job: ReportJob to show
+            title: Window title
+        """
+        self.parent = parent
+        self.job = job
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.resizable(False, False)
+        self.window.transient(parent.winfo_toplevel())
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.window.configure(bg=config.COLORS["background"])
+        
+        frame = ttk.Frame(self.window, padding=15)
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.status_var = tk.StringVar(value=f"Writing {os.path.basename(job.filename)}...")
+        ttk.Label(frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(0, 5))
+        
+        self.progress_var = tk.DoubleVar(value=0.0)
+        ttk.Progressbar(frame, variable=self.progress_var, maximum=100,
+                       length=300, mode="determinate").pack(fill=tk.X, pady=5)
+        
+        self.cancel_btn = HoverButton(frame, text="Cancel", bg=config.COLORS["button_alt"],
+                                      fg=config.COLORS["button_text"], padx=10, pady=2,
+                                      command=self.cancel)
+        self.cancel_btn.pack(pady=(5, 0))
+        
+        self.window.after(config.REPORT_PROGRESS_POLL_MS, self.poll)
+    
+    def poll(self):
+        """Show the job's latest progress"""
+        if not self.window.winfo_exists():
+            return
+        self.progress_var.set(self.job.progress * 100)
+        self.window.after(config.REPORT_PROGRESS_POLL_MS, self.poll)
+    
+    def cancel(self):
+        """Cancel the job; the dialog closes once the worker has stopped"""
+        self.job.cancel()
+        self.status_var.set("Cancelling...")
+        self.cancel_btn.config(state=tk.DISABLED)
+    
+    def close(self):
+        """Close the dialog"""
+        if self.window.winfo_exists():
+            self.window.destroy()
+
+
+def run_report(parent, function, filename, title, success_message, **kwargs):
+    """Run an export in the background with a progress dialog
+    
+    Must be called on the Tk thread, after the file name has been chosen.
+    
+    Args:
+        parent: Widget the dialog belongs to
+        function: Export function taking (filename, progress=..., **kwargs)
+        filename: File to write
+        title: Progress dialog title
+        success_message: Shown when the report has been written
+        **kwargs: Extra arguments for the export function
+    
+    Returns:
+        ReportJob: The started job
+    """
+    job = ReportJob(function, filename, **kwargs)
+    dialog = ReportProgressDialog(parent, job, title)
+    
+    def finished(future):
+        dialog.close()
+        try:
+            future.result()
+        except ReportCancelled:
+            return
+        except Exception as e:
+            print(f"Report error: {str(e)}")
+            messagebox.showerror("Export Failed", f"Could not write the report:\n{str(e)}")
+            return
+        messagebox.showinfo("Export Successful", success_message)
+    
+    when_done(parent, job.start(), finished)
+    return job
+
+
+def cancel_report_jobs():
+    """Cancel every queued or running report, e.g. when the application closes"""
+    with _jobs_lock:
+        jobs = list(_jobs)
+    for job in jobs:
+        job.cancel()
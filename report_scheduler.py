@@ -0,0 +1,434 @@
+import os
+import sys
+import json
+import hashlib
+import datetime
+import locale
+import csv
+import multiprocessing
+
+import config
+from fileutil import write_atomic
+
+# Report formats the schedule can ask for: file extension and reports function
+REPORT_FORMATS = {
+    "excel": (".xlsx", "write_excel"),
+    "pdf": (".pdf", "write_pdf")
+}
+
+# Bytes before the resume offset that must be unchanged to start reading there
+RESUME_CHECK_BYTES = 256
+
+
+def load_schedule(schedule_file=None):
+    """Load the report schedule, writing the defaults if there is none yet
+    
+    Args:
+        schedule_file: JSON schedule (defaults to config.REPORT_SCHEDULE_FILE)
+    
+    Returns:
+        dict: Schedule settings (missing keys use config.REPORT_SCHEDULE_DEFAULTS)
+    """
+    schedule_file = schedule_file or config.REPORT_SCHEDULE_FILE
+    schedule = dict(config.REPORT_SCHEDULE_DEFAULTS)
+    
+    try:
+        if os.path.exists(schedule_file):
+            with open(schedule_file, 'r') as f:
+                schedule.update(json.load(f))
+        else:
+            # Leave a file for the site admin to edit
+            with open(schedule_file, 'w') as f:
+                json.dump(schedule, f, indent=4)
+    except Exception as e:
+        print(f"Error loading report schedule: {str(e)}")
+    
+    return schedule
+
+
+def load_state(state_file=None):
+    """Load what the previous scheduled run produced
+    
+    Returns:
+        dict: Saved state, empty if there was no previous run
+    """
+    state_file = state_file or config.REPORT_SCHEDULE_STATE_FILE
+    try:
+        if os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error loading report schedule state: {str(e)}")
+    return {}
+
+
+def schedule_times(schedule):
+    """Parse the schedule's HH:MM run times
+    
+    Returns:
+        list: datetime.time values, sorted (invalid entries are skipped)
+    """
+    times = []
+    for text in schedule.get("times", []):
+        try:
+            times.append(datetime.datetime.strptime(text.strip(), "%H:%M").time())
+        except (AttributeError, ValueError):
+            print(f"Ignoring invalid report schedule time: {text!r}")
+    return sorted(times)
+
+
+def latest_due(schedule, now=None):
+    """Most recent scheduled run time that has passed
+    
+    Args:
+        schedule: Schedule settings
+        now: Current time (defaults to datetime.datetime.now())
+    
+    Returns:
+        datetime.datetime: Latest run time at or before now, or None if the
+            schedule has no valid times
+    """
+    now = now or datetime.datetime.now()
+    times = schedule_times(schedule)
+    if not times:
+        return None
+    
+    today = [datetime.datetime.combine(now.date(), t) for t in times if t <= now.time()]
+    if today:
+        return today[-1]
+    return datetime.datetime.combine(now.date() - datetime.timedelta(days=1), times[-1])
+
+
+def data_signature(data_file):
+    """Size and modification time of the data file, to detect changes cheaply"""
+    try:
+        stat = os.stat(data_file)
+        return [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def report_path(folder, kind, label, fmt):
+    """File a scheduled report is written to, e.g. reports/daily/2024-03-01.xlsx"""
+    return os.path.join(folder, kind, label + REPORT_FORMATS[fmt][0])
+
+
+def rows_digest(rows):
+    """Fingerprint of a period's rows, to tell whether its reports are current"""
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update("\x1f".join(row).encode('utf-8', 'replace'))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def read_window(data_file, window_start, last_day, resume=None):
+    """Read the rows dated within a window, starting where the last run did
+    
+    Records are appended in date order, so a run only needs the rows from
+    the start of its window onwards. The previous run's resume offset is
+    used if the bytes just before it are unchanged; otherwise (the file was
+    rewritten with different earlier rows) the whole file is read.
+    
+    Args:
+        data_file: CSV file
+        window_start: First day wanted (datetime.date)
+        last_day: Last day wanted (datetime.date)
+        resume: Resume point saved by the previous run, or None
+    
+    Returns:
+        tuple: ({day (YYYY-MM-DD): [rows]}, resume point for the next run)
+    """
+    start_key = window_start.isoformat()
+    end_key = last_day.isoformat()
+    width = len(config.CSV_HEADER)
+    encoding = locale.getpreferredencoding(False)
+    days = {}
+    
+    with open(data_file, 'rb') as f:
+        position = len(f.readline())  # Skip header
+        
+        if resume and resume.get("window", "") <= start_key:
+            offset = resume.get("offset", 0)
+            check = bytes.fromhex(resume.get("check", ""))
+            if position <= offset and len(check) <= offset:
+                f.seek(offset - len(check))
+                if f.read(len(check)) == check:
+                    position = offset
+            f.seek(position)
+        
+        consumed = [position]
+        
+        def lines():
+            for line in f:
+                consumed[0] += len(line)
+                yield line.decode(encoding, 'replace')
+        
+        first_offset = None
+        row_start = position
+        for row in csv.reader(lines()):
+            row_end = consumed[0]
+            if len(row) >= 13 and len(row[0]) == 10:
+                date = row[0]
+                day = f"{date[6:10]}-{date[3:5]}-{date[0:2]}"
+                if day >= start_key:
+                    if first_offset is None:
+                        first_offset = row_start
+                    if day <= end_key:
+                        if len(row) < width:
+                            row = row + [''] * (width - len(row))
+                        elif len(row) > width:
+                            row = row[:width]
+                        days.setdefault(day, []).append(row)
+            row_start = row_end
+        
+        if first_offset is None:
+            first_offset = row_start
+        f.seek(max(0, first_offset - RESUME_CHECK_BYTES))
+        check = f.read(first_offset - max(0, first_offset - RESUME_CHECK_BYTES))
+    
+    return days, {"window": start_key, "offset": first_offset, "check": check.hex()}
+
+
+def lower_priority():
+    """Run the current process below normal priority so the UI stays responsive"""
+    try:
+        if hasattr(os, 'nice'):
+            os.nice(10)
+        elif sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            process = kernel32.GetCurrentProcess()
+            kernel32.SetPriorityClass(process, 0x00004000)  # BELOW_NORMAL_PRIORITY_CLASS
+            kernel32.SetPriorityClass(process, 0x00100000)  # PROCESS_MODE_BACKGROUND_BEGIN - low I/O priority too
+    except Exception as e:
+        print(f"Could not lower report process priority: {str(e)}")
+
+
+def write_period(folder, kind, label, formats, query, rows):
+    """Write one period's reports
+    
+    Each file is written under a temporary name and renamed into place, so
+    a half-written report is never left behind.
+    
+    Args:
+        folder: Output folder
+        kind: "daily" or "monthly"
+        label: Period label used as the file name, e.g. "2024-03-01"
+        formats: Format names from REPORT_FORMATS
+        query: ReportQuery describing the period (shown in the report)
+        rows: The period's rows
+    
+    Returns:
+        list: Files written
+    """
+    import reports
+    
+    os.makedirs(os.path.join(folder, kind), exist_ok=True)
+    written = []
+    for fmt in formats:
+        filename = report_path(folder, kind, label, fmt)
+        tmp_path = f"{filename}.part"
+        writer = getattr(reports, REPORT_FORMATS[fmt][1])
+        try:
+            writer(tmp_path, query, rows=rows)
+            os.replace(tmp_path, filename)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        written.append(filename)
+    return written
+
+
+def run_scheduled_reports(schedule_file=None, state_file=None, data_file=None, now=None):
+    """Bring the scheduled daily and monthly reports up to date
+    
+    Every day from the schedule's catch_up_days ago to the latest scheduled run
+    gets a daily report, and each month they fall in a month-to-date report.
+    A period's reports are only rewritten when its rows have changed since
+    they were last written, and nothing is read at all if the data file is
+    unchanged. Meant to run in a separate low-priority process (see
+    ReportScheduler), but can be called directly.
+    
+    Args:
+        schedule_file: JSON schedule (defaults to config.REPORT_SCHEDULE_FILE)
+        state_file: State of the previous run (defaults to config.REPORT_SCHEDULE_STATE_FILE)
+        data_file: CSV file (defaults to config.DATA_FILE)
+        now: Current time (defaults to datetime.datetime.now())
+    
+    Returns:
+        list: Files written
+    """
+    from data_management import ReportQuery
+    
+    schedule_file = schedule_file or config.REPORT_SCHEDULE_FILE
+    state_file = state_file or config.REPORT_SCHEDULE_STATE_FILE
+    data_file = data_file or config.DATA_FILE
+    now = now or datetime.datetime.now()
+    
+    schedule = load_schedule(schedule_file)
+    due = latest_due(schedule, now)
+    if not schedule.get("enabled") or due is None or not os.path.exists(data_file):
+        return []
+    
+    state = load_state(state_file)
+    folder = schedule.get("output_folder") or config.REPORT_SCHEDULE_DEFAULTS["output_folder"]
+    formats = {kind: [fmt for fmt in schedule.get(kind, []) if fmt in REPORT_FORMATS]
+               for kind in ("daily", "monthly")}
+    
+    # Periods covered by this run - days back to the catch-up limit and their months
+    last_day = due.date()
+    first_day = last_day - datetime.timedelta(days=max(0, int(schedule.get("catch_up_days", 0))))
+    periods = []
+    day = first_day
+    while day <= last_day:
+        periods.append(("daily", day.isoformat(), day, day))
+        day += datetime.timedelta(days=1)
+    month = first_day.replace(day=1)
+    while month <= last_day:
+        next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+        periods.append(("monthly", month.strftime("%Y-%m"), month,
+                        min(last_day, next_month - datetime.timedelta(days=1))))
+        month = next_month
+    
+    done = state.get("periods", {})
+    signature = data_signature(data_file)
+    
+    def current(kind, label):
+        entry = done.get(f"{kind} {label}")
+        if entry is None:
+            return False
+        return not entry["rows"] or all(os.path.exists(report_path(folder, kind, label, fmt))
+                                        for fmt in formats[kind])
+    
+    if signature == state.get("data_signature") and all(current(kind, label) for kind, label, _, _ in periods):
+        print("Scheduled reports: data unchanged, nothing to do")
+        return []
+    
+    # Only the rows since the start of the oldest month covered are read
+    days, resume = read_window(data_file, first_day.replace(day=1), last_day, state.get("resume"))
+    
+    written = []
+    new_periods = {}
+    for kind, label, start, end in periods:
+        key = f"{kind} {label}"
+        rows = [row for day_key in sorted(days) if start.isoformat() <= day_key <= end.isoformat()
+                for row in days[day_key]]
+        entry = {"digest": rows_digest(rows), "rows": len(rows)}
+        if done.get(key, {}).get("digest") == entry["digest"] and current(kind, label):
+            new_periods[key] = entry
+            continue
+        
+        if rows:
+            try:
+                written += write_period(folder, kind, label, formats[kind],
+                                        ReportQuery(start_date=start, end_date=end), rows)
+            except Exception as e:
+                # Not recorded, so the period is tried again on the next run
+                print(f"Error writing scheduled {kind} report {label}: {str(e)}")
+                continue
+        new_periods[key] = entry
+    
+    state = {
+        "last_run": now.strftime("%d-%m-%Y %H:%M:%S"),
+        "data_signature": signature,
+        "resume": resume,
+        "periods": new_periods
+    }
+    try:
+        write_atomic(state_file, json.dumps(state, indent=4).encode('utf-8'))
+    except Exception as e:
+        print(f"Error saving report schedule state: {str(e)}")
+    
+    print(f"Scheduled reports: wrote {len(written)} file(s)")
+    return written
+
+
+def _scheduled_process(schedule_file, state_file, data_file):
+    """Entry point of the report process"""
+    lower_priority()
+    try:
+        run_scheduled_reports(schedule_file, state_file, data_file)
+    except Exception as e:
+        print(f"Scheduled report error: {str(e)}")
+
+
+class ReportScheduler:
+    """Runs the scheduled reports from the application
+    
+    The Tk thread only checks the clock once a minute. When a scheduled time
+    has passed since the last run (including times missed while the
+    application was closed), the reports are generated in a separate
+    low-priority process, so report work never competes with the UI for the
+    interpreter.
+    """
+    
+    def __init__(self, root, schedule_file=None, state_file=None, data_file=None):
+        """Initialize report scheduler
+        
+        Args:
+            root: Tk widget used for the periodic check
+            schedule_file: JSON schedule (defaults to config.REPORT_SCHEDULE_FILE)
+            state_file: Run state (defaults to config.REPORT_SCHEDULE_STATE_FILE)
+            data_file: CSV file (defaults to config.DATA_FILE)
+        """
+        self.root = root
+        self.schedule_file = schedule_file or config.REPORT_SCHEDULE_FILE
+        self.state_file = state_file or config.REPORT_SCHEDULE_STATE_FILE
+        self.data_file = data_file or config.DATA_FILE
+        self.process = None
+        self._after_id = None
+        
+        # Runs are due once a scheduled time passes after the last one
+        self.last_run = None
+        last_run = load_state(self.state_file).get("last_run")
+        if last_run:
+            try:
+                self.last_run = datetime.datetime.strptime(last_run, "%d-%m-%Y %H:%M:%S")
+            except ValueError:
+                pass
+    
+    def start(self):
+        """Start checking the schedule"""
+        self._after_id = self.root.after(config.REPORT_SCHEDULE_CHECK_MS, self.check)
+    
+    def check(self):
+        """Start a report run if one is due (Tk thread)"""
+        self._after_id = None
+        try:
+            if self.process is None or not self.process.is_alive():
+                now = datetime.datetime.now()
+                schedule = load_schedule(self.schedule_file)
+                due = latest_due(schedule, now)
+                if schedule.get("enabled") and due is not None and (self.last_run is None or due > self.last_run):
+                    self.run_now(now)
+        except Exception as e:
+            print(f"Report schedule error: {str(e)}")
+        self._after_id = self.root.after(config.REPORT_SCHEDULE_CHECK_MS, self.check)
+    
+    def run_now(self, now=None):
+        """Start a report run in the background process
+        
+        Returns:
+            bool: True if started, False if a run is still in progress
+        """
+        if self.process is not None and self.process.is_alive():
+            return False
+        
+        # A fresh interpreter rather than a fork of the Tk process
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=_scheduled_process, name="scheduled-reports", daemon=True,
+                                       args=(self.schedule_file, self.state_file, self.data_file))
+        self.process.start()
+        self.last_run = now or datetime.datetime.now()
+        return True
+    
+    def stop(self):
+        """Stop checking and end a run in progress"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
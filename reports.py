@@ -1,307 +1,638 @@
 import os
+import io
 import datetime
-import csv
-import pandas as pd
+from collections import deque
 from tkinter import filedialog, messagebox
 import config
+from data_management import iter_rows, iter_chunks
 
-def export_to_excel(filename=None):
+# Columns written to Excel as numbers, so they can be summed
+NUMERIC_COLUMNS = {config.CSV_HEADER.index(name) for name in ('First Weight', 'Second Weight', 'Net Weight')}
+
+def excel_row(row):
+    """Convert a CSV row for the Excel sheet
+    
+    Weights become numbers (empty or invalid weights become empty cells),
+    everything else stays text.
+    """
+    values = list(row)
+    for i in NUMERIC_COLUMNS:
+        try:
+            values[i] = float(values[i])
+        except ValueError:
+            values[i] = None
+    return values
+
+def scaled_progress(progress, start, share):
+    """Map one stage's progress onto part of an overall 0-1 progress callback
+    
+    Args:
+        progress: callback(done, total) for the whole job, or None
+        start: Fraction of the job finished before this stage
+        share: Fraction of the job this stage represents
+    
+    Returns:
+        function: callback(done, total) for the stage, or None
+    """
+    if progress is None:
+        return None
+    return lambda done, total: progress(start + share * done / max(total, 1), 1.0)
+
+def ask_report_filename(kind):
+    """Check there is data to export and ask where to save a report
+    
+    Must be called on the Tk thread.
+    
+    Args:
+        kind: "excel" or "pdf"
+    
+    Returns:
+        str: Chosen file name or None if there is no data or the user cancelled
+    """
+    # Check if data file exists
+    if not os.path.exists(config.DATA_FILE):
+        messagebox.showerror("Export Failed", "No data to export.")
+        return None
+    
+    if kind == "excel":
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title="Save Excel File"
+        )
+    else:
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            title="Save PDF File"
+        )
+    return filename or None
+
+def write_excel(filename, query=None, progress=None, rows=None):
+    """Write the Excel report
+    
+    Rows are streamed from the CSV in chunks into a write-only workbook, so
+    memory stays flat however long the history is. Does not touch the UI,
+    so it can run on a worker thread.
+    
+    Args:
+        filename: File to write
+        query: Optional ReportQuery - only matching records are read and exported
+        progress: Optional callback(done, total) reporting how much of the data has
+            been read; exceptions it raises abort the export
+        rows: Optional rows already read and filtered, written instead of
+            streaming the CSV
+    
+    Returns:
+        str: The file written
+    """
+    from openpyxl import Workbook
+    
+    # Write-only sheets stream rows to disk instead of keeping cells
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Records")
+    try:
+        sheet.append(config.CSV_HEADER)
+        
+        # Only the matching rows, already in config.CSV_HEADER order
+        if rows is None:
+            rows = iter_rows(config.DATA_FILE, query, progress)
+        for chunk in iter_chunks(rows):
+            for row in chunk:
+                sheet.append(excel_row(row))
+        
+        workbook.save(filename)
+    except BaseException:
+        # Cancelled or failed - don't leave the sheet's temporary file behind
+        discard_workbook(workbook)
+        raise
+    return filename
+
+def discard_workbook(workbook):
+    """Close an unsaved write-only workbook and delete its temporary sheet files"""
+    for sheet in workbook.worksheets:
+        writer = getattr(sheet, '_writer', None)
+        if writer is None or sheet.closed:
+            continue
+        for close in (getattr(sheet._rows, 'close', None), writer.close, writer.cleanup):
+            try:
+                if close is not None:
+                    close()
+            except Exception:
+                pass
+    workbook.close()
+
+def export_to_excel(filename=None, query=None, progress=None):
     """Export data to Excel file
     
     Args:
         filename: Optional filename to save to. If None, will prompt for location.
+        query: Optional ReportQuery - only matching records are read and exported
+        progress: Optional callback(done, total) reporting how much of the data has been read
         
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # Check if data file exists
-        if not os.path.exists(config.DATA_FILE):
-            messagebox.showerror("Export Failed", "No data to export.")
-            return False
-            
         # If no filename provided, ask for save location
         if not filename:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-                title="Save Excel File"
-            )
-            
-            if not filename:  # User canceled
+            filename = ask_report_filename("excel")
+            if not filename:  # No data or user canceled
                 return False
-                
-        # Read CSV into pandas DataFrame
-        df = pd.read_csv(config.DATA_FILE)
-        
-        # Handle column mapping issues
-        # If there's a column mismatch due to schema changes, ensure we have consistent columns
-        expected_columns = config.CSV_HEADER
-        
-        # Check if we need to fix the columns
-        if list(df.columns) != expected_columns:
-            # Create a new DataFrame with expected columns
-            new_df = pd.DataFrame(columns=expected_columns)
-            
-            # Map existing columns to expected columns
-            for col in df.columns:
-                if col in expected_columns:
-                    new_df[col] = df[col]
-            
-            # Fill missing columns with empty values
-            for col in expected_columns:
-                if col not in df.columns:
-                    new_df[col] = ""
-            
-            df = new_df
-        
-        # Export to Excel
-        df.to_excel(filename, index=False)
         
+        write_excel(filename, query, progress)
         return True
         
     except Exception as e:
         print(f"Error exporting to Excel: {e}")
         return False
 
-def export_to_pdf(filename=None):
-    """Export data to PDF file
+def records_table_style():
+    """Table style shared by the records tables of PDF reports"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+
+def column_widths(header, rows=()):
+    """Width each PDF table column needs for its header and values"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    
+    padding = 12
+    widths = [stringWidth(text, 'Helvetica-Bold', 12) + padding for text in header]
+    for row in rows:
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], stringWidth(str(value), 'Helvetica', 10) + padding)
+    return widths
+
+def chunked_tables(header, rows, col_widths, style=None):
+    """Split rows into page-sized tables that each repeat the header
+    
+    ReportLab's layout time grows faster than linearly with the size of one
+    table, so long reports are built from many small ones with the same
+    fixed column widths.
     
     Args:
-        filename: Optional filename to save to. If None, will prompt for location.
-        
+        header: Header row
+        rows: Data rows
+        col_widths: Fixed column widths (see column_widths)
+        style: TableStyle shared by every chunk (defaults to records_table_style())
+    
     Returns:
-        bool: True if successful, False otherwise
+        list: Table flowables (one header-only table if there are no rows)
     """
+    from reportlab.platypus import Table
+    
+    style = style or records_table_style()
+    tables = []
+    for chunk in iter_chunks(rows, config.REPORT_PDF_TABLE_ROWS):
+        table = Table([header] + chunk, colWidths=col_widths, repeatRows=1)
+        table.setStyle(style)
+        tables.append(table)
+    if not tables:
+        table = Table([header], colWidths=col_widths)
+        table.setStyle(style)
+        tables.append(table)
+    return tables
+
+def reportlab_available():
+    """True if ReportLab is installed for full PDF reports"""
     try:
-        # Check if ReportLab is available
-        try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.lib import colors
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            import cv2
-            reportlab_available = True
-        except ImportError:
-            reportlab_available = False
-            
-        # Check if data file exists
-        if not os.path.exists(config.DATA_FILE):
-            messagebox.showerror("Export Failed", "No data to export.")
-            return False
-            
-        # If no filename provided, ask for save location
-        if not filename:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
-                title="Save PDF File"
-            )
-            
-            if not filename:  # User canceled
-                return False
+        import reportlab
+        return True
+    except ImportError:
+        return False
+
+def write_pdf(filename, query=None, progress=None, rows=None):
+    """Write the PDF report
+    
+    The records table is split into page-sized tables with fixed column
+    widths, so layout time grows linearly with the number of rows. Without
+    ReportLab a plain text report is written instead. Does not touch the
+    UI, so it can run on a worker thread.
+    
+    Args:
+        filename: File to write
+        query: Optional ReportQuery - only matching records are read and rendered
+        progress: Optional callback(done, total) - reading the data, then laying
+            out pages; exceptions it raises abort the export
+        rows: Optional rows already read and filtered, rendered instead of
+            streaming the CSV
+    
+    Returns:
+        str: The file written
+    """
+    if reportlab_available():
+        from reportlab.lib.pagesizes import letter, A4
+        from reportlab.lib import colors
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from thumbnail_cache import get_thumbnail_cache, REPORT_SIZE
+        
+        # Use ReportLab for better PDF creation with images
+        header = config.CSV_HEADER
+        
+        # Create the PDF document
+        doc = SimpleDocTemplate(filename, pagesize=A4)
+        styles = getSampleStyleSheet()
+        
+        # Create a custom style for the title
+        title_style = ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            alignment=1,  # Center aligned
+            spaceAfter=12
+        )
+        
+        # Create elements to add to the PDF
+        elements = []
+        
+        # Add title
+        title = Paragraph("ADVITIA LABS - VEHICLE ENTRY REPORT", title_style)
+        elements.append(title)
+        elements.append(Spacer(1, 0.25*inch))
+        
+        # Add date and time
+        date_style = ParagraphStyle(
+            'DateStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=1,  # Center aligned
+        )
+        current_date = datetime.datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+        date_text = Paragraph(f"Report generated on: {current_date}", date_style)
+        elements.append(date_text)
+        if query is not None and not query.is_empty:
+            elements.append(Paragraph(f"Records: {query.describe()}", date_style))
+        elements.append(Spacer(1, 0.25*inch))
+        
+        # Create a table for the data
+        # Select only relevant columns for the report
+        visible_header = ["Date", "Vehicle No", "Ticket No", "Agency Name", "Material", "First Weight", "Second Weight", "Net Weight"]
+        column_indices = [0, 6, 5, 3, 4, 8, 10, 12]  # Indices of columns to display
+        
+        # Extract the relevant data, streaming only the matching rows
+        table_header = [header[i] for i in column_indices]
+        table_rows = []
+        recent_records = deque(maxlen=5)
+        
+        read_progress = scaled_progress(progress, 0.0, 0.3)
+        if rows is None:
+            rows = iter_rows(config.DATA_FILE, query, read_progress)
+        for row in rows:
+            table_rows.append([row[i] for i in column_indices])
+            recent_records.append(row)
+        
+        # Fixed column widths, so every page lines up and ReportLab never
+        # has to size the columns itself
+        col_widths = column_widths(table_header, table_rows)
+        elements.extend(chunked_tables(table_header, table_rows, col_widths))
+        del table_rows
+        
+        elements.append(Spacer(1, 0.5*inch))
+        
+        # Add detailed entries for the most recent 5 records with images
+        elements.append(Paragraph("Recent Vehicle Entries with Images", styles['Heading2']))
+        elements.append(Spacer(1, 0.25*inch))
+        
+        # Display the most recent 5 records
+        # Load every report-sized thumbnail up front, in parallel and in memory
+        image_names = [name for record in recent_records if len(record) >= 16 for name in record[14:16]]
+        report_images = get_thumbnail_cache().get_jpegs(image_names, REPORT_SIZE)
+        
+        for record in reversed(recent_records):  # Most recent first
+            if len(record) >= 16:  # Ensure we have all fields including images
+                vehicle_no = record[6]
+                date_time = f"{record[0]} {record[1]}"
+                agency = record[3]
+                material = record[4]
+                material_type = record[13]
+                weights = f"First: {record[8]} kg | Second: {record[10]} kg | Net: {record[12]} kg"
                 
-        if reportlab_available:
-            # Use ReportLab for better PDF creation with images
-            with open(config.DATA_FILE, 'r') as f:
-                reader = csv.reader(f)
-                header = next(reader)
-                data = list(reader)
-            
-            # Create the PDF document
-            doc = SimpleDocTemplate(filename, pagesize=A4)
-            styles = getSampleStyleSheet()
-            
-            # Create a custom style for the title
-            title_style = ParagraphStyle(
-                'TitleStyle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                alignment=1,  # Center aligned
-                spaceAfter=12
-            )
-            
-            # Create elements to add to the PDF
-            elements = []
-            
-            # Add title
-            title = Paragraph("ADVITIA LABS - VEHICLE ENTRY REPORT", title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 0.25*inch))
-            
-            # Add date and time
-            date_style = ParagraphStyle(
-                'DateStyle',
-                parent=styles['Normal'],
-                fontSize=10,
-                alignment=1,  # Center aligned
-            )
-            current_date = datetime.datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-            date_text = Paragraph(f"Report generated on: {current_date}", date_style)
-            elements.append(date_text)
-            elements.append(Spacer(1, 0.25*inch))
-            
-            # Create a table for the data
-            # Select only relevant columns for the report
-            visible_header = ["Date", "Vehicle No", "Ticket No", "Agency Name", "Material", "First Weight", "Second Weight", "Net Weight"]
-            column_indices = [0, 6, 5, 3, 4, 8, 10, 12]  # Indices of columns to display
-            
-            # Extract the relevant data
-            table_data = [[header[i] for i in column_indices]]
-            for row in data:
-                if len(row) >= max(column_indices) + 1:
-                    table_data.append([row[i] for i in column_indices])
-            
-            # Create the table
-            table = Table(table_data, repeatRows=1)
-            
-            # Add style to the table
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 0.5*inch))
-            
-            # Add detailed entries for the most recent 5 records with images
-            elements.append(Paragraph("Recent Vehicle Entries with Images", styles['Heading2']))
-            elements.append(Spacer(1, 0.25*inch))
-            
-            # Display the most recent 5 records
-            recent_records = data[-5:] if len(data) >= 5 else data
-            
-            for record in reversed(recent_records):  # Most recent first
-                if len(record) >= 16:  # Ensure we have all fields including images
-                    vehicle_no = record[6]
-                    date_time = f"{record[0]} {record[1]}"
-                    agency = record[3]
-                    material = record[4]
-                    material_type = record[13]
-                    weights = f"First: {record[8]} kg | Second: {record[10]} kg | Net: {record[12]} kg"
+                # Create a detail section for this record
+                elements.append(Paragraph(f"Vehicle: {vehicle_no}", styles['Heading3']))
+                elements.append(Paragraph(f"Date/Time: {date_time}", styles['Normal']))
+                elements.append(Paragraph(f"Agency: {agency} | Material: {material} | Type: {material_type}", styles['Normal']))
+                elements.append(Paragraph(f"Weights: {weights}", styles['Normal']))
+                
+                # Try to add images if available
+                front_img = record[14]
+                back_img = record[15]
+                
+                if front_img or back_img:
+                    # Create a mini table for the images
+                    img_data = [["Front Image", "Back Image"]]
+                    img_row = ["No Image", "No Image"]  # Default if images not found
                     
-                    # Create a detail section for this record
-                    elements.append(Paragraph(f"Vehicle: {vehicle_no}", styles['Heading3']))
-                    elements.append(Paragraph(f"Date/Time: {date_time}", styles['Normal']))
-                    elements.append(Paragraph(f"Agency: {agency} | Material: {material} | Type: {material_type}", styles['Normal']))
-                    elements.append(Paragraph(f"Weights: {weights}", styles['Normal']))
+                    # Front and back images, embedded straight from memory
+                    for column, name in enumerate((front_img, back_img)):
+                        if name in report_images:
+                            img_row[column] = Image(io.BytesIO(report_images[name]),
+                                                    width=2*inch, height=1.2*inch)
                     
-                    # Try to add images if available
-                    front_img = record[14]
-                    back_img = record[15]
+                    img_data.append(img_row)
                     
-                    if front_img or back_img:
-                        # Create a mini table for the images
-                        img_data = [["Front Image", "Back Image"]]
-                        img_row = ["No Image", "No Image"]  # Default if images not found
-                        
-                        # Front image
-                        if front_img:
-                            front_path = os.path.join(config.IMAGES_FOLDER, front_img)
-                            if os.path.exists(front_path):
-                                try:
-                                    # Convert the OpenCV image to a format ReportLab can use
-                                    img = cv2.imread(front_path)
-                                    if img is not None:
-                                        # Resize image to fit in report
-                                        img = cv2.resize(img, (250, 150))
-                                        # Save a temporary file
-                                        temp_path = os.path.join(config.IMAGES_FOLDER, f"temp_front_{vehicle_no}.jpg")
-                                        cv2.imwrite(temp_path, img)
-                                        # Use the temporary file in the report
-                                        img_row[0] = Image(temp_path, width=2*inch, height=1.2*inch)
-                                except Exception as img_err:
-                                    print(f"Error processing front image: {img_err}")
-                        
-                        # Back image
-                        if back_img:
-                            back_path = os.path.join(config.IMAGES_FOLDER, back_img)
-                            if os.path.exists(back_path):
-                                try:
-                                    # Convert the OpenCV image to a format ReportLab can use
-                                    img = cv2.imread(back_path)
-                                    if img is not None:
-                                        # Resize image to fit in report
-                                        img = cv2.resize(img, (250, 150))
-                                        # Save a temporary file
-                                        temp_path = os.path.join(config.IMAGES_FOLDER, f"temp_back_{vehicle_no}.jpg")
-                                        cv2.imwrite(temp_path, img)
-                                        # Use the temporary file in the report
-                                        img_row[1] = Image(temp_path, width=2*inch, height=1.2*inch)
-                                except Exception as img_err:
-                                    print(f"Error processing back image: {img_err}")
-                        
-                        img_data.append(img_row)
-                        
-                        # Create and style the image table
-                        img_table = Table(img_data, colWidths=[2.5*inch, 2.5*inch])
-                        img_table.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ]))
-                        
-                        elements.append(img_table)
+                    # Create and style the image table
+                    img_table = Table(img_data, colWidths=[2.5*inch, 2.5*inch])
+                    img_table.setStyle(TableStyle([
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                    ]))
                     
-                    elements.append(Spacer(1, 0.25*inch))
-                    elements.append(Paragraph("-" * 65, styles['Normal']))
-                    elements.append(Spacer(1, 0.25*inch))
-            
-            # Build the PDF document
-            doc.build(elements)
-            
-            # Clean up temporary files
-            for temp_file in os.listdir(config.IMAGES_FOLDER):
-                if temp_file.startswith("temp_"):
-                    try:
-                        os.remove(os.path.join(config.IMAGES_FOLDER, temp_file))
-                    except:
-                        pass
-                        
-            return True
-            
-        else:
-            # If ReportLab is not available, create a simpler text-based PDF
-            messagebox.showinfo("PDF Creation", 
-                             "For better PDF reports with images, please install ReportLab:\n"
-                             "pip install reportlab\n\n"
-                             "Creating a basic report file instead.")
-            
-            # Create a text report as a placeholder
-            with open(config.DATA_FILE, 'r') as f:
-                reader = csv.reader(f)
-                header = next(reader, None)
-                
-                # Create a DataFrame for easier handling
-                df = pd.DataFrame(list(reader), columns=header)
+                    elements.append(img_table)
                 
-                # Save as text file
-                with open(filename, 'w') as text_file:
-                    text_file.write("ADVITIA LABS - VEHICLE ENTRY REPORT\n")
-                    text_file.write("="*50 + "\n\n")
-                    
-                    # Write each record
-                    for _, row in df.iterrows():
-                        for col, value in zip(header, row):
-                            text_file.write(f"{col}: {value}\n")
-                        text_file.write("-"*50 + "\n")
-                
-                return True
+                elements.append(Spacer(1, 0.25*inch))
+                elements.append(Paragraph("-" * 65, styles['Normal']))
+                elements.append(Spacer(1, 0.25*inch))
+        
+        # Build the PDF document, reporting flowables laid out so far
+        if progress is not None:
+            build_progress = scaled_progress(progress, 0.3, 0.7)
+            estimate = [len(elements)]
+            
+            def on_build(kind, value):
+                if kind == 'SIZE_EST':
+                    estimate[0] = max(1, value)
+                elif kind == 'PROGRESS':
+                    build_progress(min(value, estimate[0]), estimate[0])
+            doc.setProgressCallBack(on_build)
+        doc.build(elements)
+        if progress is not None:
+            progress(1.0, 1.0)
+        
+        return filename
+        
+    else:
+        # Create a text report as a placeholder
+        header = config.CSV_HEADER
+        
+        # Save as text file
+        with open(filename, 'w') as text_file:
+            text_file.write("ADVITIA LABS - VEHICLE ENTRY REPORT\n")
+            if query is not None and not query.is_empty:
+                text_file.write(f"Records: {query.describe()}\n")
+            text_file.write("="*50 + "\n\n")
             
+            # Write each matching record
+            if rows is None:
+                rows = iter_rows(config.DATA_FILE, query, progress)
+            for row in rows:
+                for col, value in zip(header, row):
+                    text_file.write(f"{col}: {value}\n")
+                text_file.write("-"*50 + "\n")
+        
+        return filename
+
+def export_to_pdf(filename=None, query=None, progress=None):
+    """Export data to PDF file
+    
+    Args:
+        filename: Optional filename to save to. If None, will prompt for location.
+        query: Optional ReportQuery - only matching records are read and rendered
+        progress: Optional callback(done, total) - reading the data, then laying out pages
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        # If no filename provided, ask for save location
+        if not filename:
+            filename = ask_report_filename("pdf")
+            if not filename:  # No data or user canceled
+                return False
+        
+        if not reportlab_available():
+            show_reportlab_notice()
+        
+        write_pdf(filename, query, progress)
+        return True
+        
     except Exception as e:
         print(f"Error exporting to PDF: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def summary_sections(query=None, progress=None):
+    """Tonnage tables for the summary report, from the daily rollups
+    
+    Only the pre-aggregated daily totals are read, so this takes the same
+    time however long the history is.
+    
+    Args:
+        query: Optional ReportQuery - date range, site, agency and material
+            narrow the totals (only completed weighments are ever counted)
+        progress: Optional callback(done, total), used only if the rollups
+            have to be rebuilt from the history
+    
+    Returns:
+        list: (title, header, rows) for each table
+    """
+    from rollups import get_daily_rollups
+    
+    days = get_daily_rollups().get_days(progress)
+    start = query.start_date.isoformat() if query and query.start_date else None
+    end = query.end_date.isoformat() if query and query.end_date else None
+    
+    def tonnes(kg):
+        return f"{kg / 1000.0:,.3f}"
+    
+    def kg(value):
+        return "" if value is None else f"{value:,.0f}"
+    
+    by_day, by_agency, by_material, detail = {}, {}, {}, []
+    for day in sorted(days):
+        if (start and day < start) or (end and day > end):
+            continue
+        for (site, agency, material, material_type), (count, net_sum, net_min, net_max) in sorted(days[day].items()):
+            if query and ((query.site_name and site != query.site_name) or
+                          (query.agency_name and agency != query.agency_name) or
+                          (query.material and material != query.material)):
+                continue
+            for totals, key in ((by_day, day), (by_agency, agency), (by_material, material)):
+                total = totals.setdefault(key, [0, 0.0])
+                total[0] += count
+                total[1] += net_sum
+            detail.append([f"{day[8:10]}-{day[5:7]}-{day[0:4]}", site, agency, material, material_type,
+                           str(count), tonnes(net_sum), kg(net_min), kg(net_max)])
+    
+    def totals_rows(totals, label=lambda key: key):
+        rows = [[label(key) or "-", str(count), tonnes(net_sum)] for key, (count, net_sum) in sorted(totals.items())]
+        rows.append(["Total", str(sum(count for count, _ in totals.values())),
+                     tonnes(sum(net_sum for _, net_sum in totals.values()))])
+        return rows
+    
+    return [
+        ("Tonnage per Day", ["Date", "Trips", "Net (t)"],
+         totals_rows(by_day, lambda day: f"{day[8:10]}-{day[5:7]}-{day[0:4]}")),
+        ("Tonnage per Agency", ["Agency", "Trips", "Net (t)"], totals_rows(by_agency)),
+        ("Tonnage per Material", ["Material", "Trips", "Net (t)"], totals_rows(by_material)),
+        ("Daily Detail", ["Date", "Site", "Agency", "Material", "Type", "Trips", "Net (t)",
+                          "Min (kg)", "Max (kg)"], detail),
+    ]
+
+def write_summary(filename, query=None, progress=None):
+    """Write the tonnage summary report
+    
+    Per day, agency and material totals of completed weighments, read from
+    the daily rollups rather than the full history. Written as a PDF, or
+    as plain text without ReportLab. Does not touch the UI.
+    
+    Args:
+        filename: File to write
+        query: Optional ReportQuery narrowing the totals
+        progress: Optional callback(done, total); exceptions it raises abort the export
+    
+    Returns:
+        str: The file written
+    """
+    sections = summary_sections(query, progress)
+    return write_tables_report(filename, "ADVITIA LABS - TONNAGE SUMMARY", sections, query, progress)
+
+def write_tables_report(filename, title, sections, query=None, progress=None):
+    """Write a report made of titled tables
+    
+    Written as a PDF, or as tab-separated text without ReportLab.
+    
+    Args:
+        filename: File to write
+        title: Report title
+        sections: (title, header, rows) for each table, all values strings
+        query: ReportQuery the tables were built for (shown under the title)
+        progress: Optional callback(done, total), told when the file is complete
+    
+    Returns:
+        str: The file written
+    """
+    subtitle = f"Records: {query.describe()}" if query is not None and not query.is_empty else ""
+    generated = datetime.datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+    
+    if not reportlab_available():
+        with open(filename, 'w') as text_file:
+            text_file.write(f"{title}\n")
+            text_file.write(f"Report generated on: {generated}\n")
+            if subtitle:
+                text_file.write(f"{subtitle}\n")
+            for section_title, header, rows in sections:
+                text_file.write(f"\n{section_title}\n" + "="*50 + "\n")
+                text_file.write("\t".join(header) + "\n")
+                for row in rows:
+                    text_file.write("\t".join(row) + "\n")
+        return filename
+    
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    
+    doc = SimpleDocTemplate(filename, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('TitleStyle', parent=styles['Heading1'], fontSize=16,
+                                 alignment=1, spaceAfter=12)
+    date_style = ParagraphStyle('DateStyle', parent=styles['Normal'], fontSize=10, alignment=1)
+    
+    elements = [Paragraph(title, title_style),
+                Spacer(1, 0.25*inch),
+                Paragraph(f"Report generated on: {generated}", date_style)]
+    if subtitle:
+        elements.append(Paragraph(subtitle, date_style))
+    
+    style = records_table_style()
+    for section_title, header, rows in sections:
+        elements.append(Spacer(1, 0.3*inch))
+        elements.append(Paragraph(section_title, styles['Heading2']))
+        elements.extend(chunked_tables(header, rows, column_widths(header, rows), style))
+    
+    doc.build(elements)
+    if progress is not None:
+        progress(1.0, 1.0)
+    return filename
+
+def analytics_sections(query=None, top=None):
+    """Tables for the analytics report
+    
+    Args:
+        query: Optional ReportQuery narrowing the records analysed
+        top: Rows shown for tare drift and outliers (defaults to config.ANALYTICS_REPORT_TOP)
+    
+    Returns:
+        list: (title, header, rows) for each table
+    """
+    import analytics
+    
+    top = top or config.ANALYTICS_REPORT_TOP
+    data = analytics.load_weighments().select(query)
+    
+    hourly = analytics.throughput_per_hour(data)
+    hourly_rows = [[f"{hour:02d}:00", str(int(row.trips)), f"{row.trips_per_day:.1f}", f"{row.net_tonnes:,.3f}"]
+                   for hour, row in hourly.iterrows() if row.trips]
+    
+    turnaround = analytics.turnaround_by(data, 'agency')
+    turnaround_rows = [[agency or "-", str(int(row.trips)), f"{row['median']:.0f}", f"{row.p90:.0f}", f"{row['mean']:.1f}"]
+                       for agency, row in turnaround.iterrows()]
+    
+    drift = analytics.tare_drift(data).head(top)
+    drift_rows = [[vehicle, str(int(row.trips)), f"{row.median_tare:,.0f}", f"{row.latest_tare:,.0f}",
+                   f"{row.drift:+,.0f}", f"{row.tare_range:,.0f}"]
+                  for vehicle, row in drift.iterrows()]
+    
+    def z(value):
+        return "" if value != value else f"{value:+.1f}"  # NaN -> blank
+    
+    flagged = analytics.outliers(data).head(top)
+    outlier_rows = [[str(row.time).replace('T', ' '), row.vehicle, row.agency, row.material,
+                     f"{row.net_weight:,.0f}", f"{row.tare:,.0f}", z(row.net_z), z(row.tare_z)]
+                    for row in flagged.itertuples()]
+    
+    return [
+        ("Throughput per Hour (second weighment)", ["Hour", "Trips", "Trips/Day", "Net (t)"], hourly_rows),
+        ("Turnaround by Agency (minutes)", ["Agency", "Trips", "Median", "P90", "Mean"], turnaround_rows),
+        (f"Tare Drift - Top {top} Vehicles (kg)", ["Vehicle", "Trips", "Median Tare", "Latest Tare",
+                                                  "Drift", "Range"], drift_rows),
+        (f"Outliers - Top {top} (robust z > {analytics.OUTLIER_THRESHOLD})",
+         ["Time", "Vehicle", "Agency", "Material", "Net", "Tare", "Net z", "Tare z"], outlier_rows),
+    ]
+
+def write_analytics(filename, query=None, progress=None):
+    """Write the analytics report - throughput, turnaround, tare drift and outliers
+    
+    Does not touch the UI.
+    
+    Args:
+        filename: File to write
+        query: Optional ReportQuery narrowing the records analysed
+        progress: Optional callback(done, total); exceptions it raises abort the export
+    
+    Returns:
+        str: The file written
+    """
+    if progress is not None:
+        progress(0.0, 1.0)
+    sections = analytics_sections(query)
+    if progress is not None:
+        progress(0.5, 1.0)
+    return write_tables_report(filename, "ADVITIA LABS - WEIGHMENT ANALYTICS", sections, query, progress)
+
+def show_reportlab_notice():
+    """Tell the user a text report is written because ReportLab is missing"""
+    messagebox.showinfo("PDF Creation", 
+                     "For better PDF reports with images, please install ReportLab:\n"
+                     "pip install reportlab\n\n"
+                     "Creating a basic report file instead.")
\ No newline at end of file
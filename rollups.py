@@ -0,0 +1,243 @@
+import os
+import json
+import threading
+import contextlib
+
+import config
+from fileutil import write_atomic
+
+# Fields a rollup group is keyed by, in CSV column order
+GROUP_FIELDS = ('site_name', 'agency_name', 'material', 'material_type')
+GROUP_COLUMNS = (2, 3, 4, 13)
+
+
+def is_completed(row):
+    """True if a CSV row has both weighments"""
+    return bool(row[8] and row[9] and row[10] and row[11])
+
+
+def rollup_entry(row):
+    """Get what a completed CSV row contributes to the rollups
+    
+    Args:
+        row: CSV row in config.CSV_HEADER order
+    
+    Returns:
+        tuple: (day, group, net weight) - day as YYYY-MM-DD, group as a tuple
+            of GROUP_FIELDS values, net weight as float or None if not a number
+    """
+    date = row[0]
+    day = f"{date[6:10]}-{date[3:5]}-{date[0:2]}" if len(date) == 10 else date
+    group = tuple(row[i] for i in GROUP_COLUMNS)
+    try:
+        net = float(row[12])
+    except ValueError:
+        net = None
+    return day, group, net
+
+
+class DailyRollups:
+    """Per-day totals of completed weighments
+    
+    For every day and site / agency / material / material type the number of
+    completed weighments and the sum, minimum and maximum net weight are
+    kept in a small JSON file. Completed weighments are added as they are
+    saved, so summary reports never have to read the history. When a
+    completed record is edited the totals can no longer be corrected in
+    place; the file is then marked stale and rebuilt from the CSV on next use.
+    
+    Writes to the CSV go through writing(), so a rebuild never reads a row
+    whose add() is still to come. The file is rewritten a few seconds after
+    the last change rather than on every weighment; it records the CSV's
+    size, and totals saved before later writes are rebuilt on next use.
+    """
+    
+    def __init__(self, path=None, data_file=None):
+        """Initialize daily rollups
+        
+        Args:
+            path: Rollup file (defaults to config.ROLLUPS_FILE)
+            data_file: CSV the rollups are built from (defaults to config.DATA_FILE)
+        """
+        self.path = path or config.ROLLUPS_FILE
+        self.data_file = data_file or config.DATA_FILE
+        self._lock = threading.RLock()
+        self._days = None  # day -> {group: [count, net_sum, net_min, net_max]}
+        self._stale = False
+        self._save_timer = None
+    
+    @contextlib.contextmanager
+    def writing(self):
+        """Hold the totals while the CSV is written
+        
+        Use around every write to the data file, calling add() or
+        invalidate() for the rows written before leaving the block. The
+        file is saved shortly afterwards.
+        """
+        with self._lock:
+            self._load()
+            try:
+                yield
+            finally:
+                self._schedule_save()
+    
+    def add(self, row):
+        """Add a newly completed weighment
+        
+        Args:
+            row: Completed CSV row
+        """
+        with self._lock:
+            self._load()
+            if self._stale:
+                return
+            self._add_row(row)
+            self._schedule_save()
+    
+    def invalidate(self):
+        """Mark the totals as out of date, to be rebuilt on next use"""
+        with self._lock:
+            self._stale = True
+            self._days = {}
+            self._save()
+    
+    def flush(self):
+        """Write a pending save now, e.g. when the application closes"""
+        with self._lock:
+            if self._save_timer is None:
+                return
+            self._save_timer.cancel()
+            self._save_timer = None
+            self._save()
+    
+    def rebuild(self, progress=None):
+        """Recompute every total from the CSV history
+        
+        Args:
+            progress: Optional callback(done, total) while the CSV is read
+        """
+        from data_management import iter_rows
+        
+        with self._lock:
+            self._days = {}
+            self._stale = False
+            for row in iter_rows(self.data_file, progress=progress):
+                if is_completed(row):
+                    self._add_row(row)
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._save()
+    
+    def get_days(self, progress=None):
+        """Get the totals, rebuilding them first if needed
+        
+        Args:
+            progress: Optional callback(done, total) used if a rebuild is needed
+        
+        Returns:
+            dict: day (YYYY-MM-DD) -> {group tuple: (count, net_sum, net_min, net_max)}
+        """
+        with self._lock:
+            self._load()
+            needs_rebuild = self._stale
+        if needs_rebuild:
+            self.rebuild(progress)
+        
+        with self._lock:
+            return {day: {group: tuple(values) for group, values in groups.items()}
+                    for day, groups in self._days.items()}
+    
+    def _add_row(self, row):
+        """Add one completed row to the totals (lock held)"""
+        day, group, net = rollup_entry(row)
+        values = self._days.setdefault(day, {}).get(group)
+        if values is None:
+            values = self._days[day][group] = [0, 0.0, None, None]
+        values[0] += 1
+        if net is not None:
+            values[1] += net
+            values[2] = net if values[2] is None else min(values[2], net)
+            values[3] = net if values[3] is None else max(values[3], net)
+    
+    def _load(self):
+        """Read the rollup file on first use (lock held)
+        
+        A missing or unreadable file is treated as stale, so the totals are
+        built from the history the first time they are needed. So is a file
+        saved when the CSV had a different size: rows were written after it
+        (e.g. the application stopped before a delayed save).
+        """
+        if self._days is not None:
+            return
+        
+        self._days = {}
+        if not os.path.exists(self.path):
+            self._stale = True
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self._stale = data.get("stale", False) or data.get("data_size") != self._data_size()
+            for day, groups in data.get("days", {}).items():
+                self._days[day] = {tuple(entry["group"]): [entry["count"], entry["net_sum"],
+                                                           entry["net_min"], entry["net_max"]]
+                                   for entry in groups}
+        except Exception as e:
+            print(f"Error loading daily rollups: {str(e)}")
+            self._days = {}
+            self._stale = True
+    
+    def _schedule_save(self):
+        """Save after config.ROLLUPS_SAVE_DELAY, batching weighments saved together (lock held)"""
+        if self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(config.ROLLUPS_SAVE_DELAY, self._delayed_save)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+    
+    def _delayed_save(self):
+        """Timer callback for _schedule_save()"""
+        with self._lock:
+            self._save_timer = None
+            self._save()
+    
+    def _data_size(self):
+        """Current size of the CSV, or None if it is missing"""
+        try:
+            return os.path.getsize(self.data_file)
+        except OSError:
+            return None
+    
+    def _save(self):
+        """Write the rollup file (lock held)"""
+        data = {
+            "stale": self._stale,
+            "data_size": self._data_size(),
+            "days": {day: [{"group": list(group), "count": values[0], "net_sum": values[1],
+                            "net_min": values[2], "net_max": values[3]}
+                           for group, values in groups.items()]
+                     for day, groups in sorted(self._days.items())}
+        }
+        try:
+            write_atomic(self.path, json.dumps(data).encode('utf-8'))
+        except Exception as e:
+            print(f"Error saving daily rollups: {str(e)}")
+
+
+# Shared rollups for the application's data file
+_rollups = None
+_rollups_lock = threading.Lock()
+
+
+def get_daily_rollups():
+    """Get the application's daily rollups
+    
+    Returns:
+        DailyRollups: Shared rollups for config.DATA_FILE
+    """
+    global _rollups
+    with _rollups_lock:
+        if _rollups is None:
+            _rollups = DailyRollups()
+        return _rollups
@@ -1,21 +1,26 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import time
 import serial.tools.list_ports
 
 import config
 from ui_components import HoverButton
-from weighbridge import WeighbridgeManager
+from lanes import LaneRegistry
+from frame_sources import normalize_source
+from camera_service import CAPTURE_MODES
 
 class SettingsPanel:
     """Settings panel for camera and weighbridge configuration"""
     
-    def __init__(self, parent, weighbridge_callback=None, update_cameras_callback=None):
+    def __init__(self, parent, weighbridge_callback=None, update_cameras_callback=None, lane_registry=None):
         """Initialize settings panel
         
         Args:
             parent: Parent widget
-            weighbridge_callback: Callback for weighbridge weight updates
+            weighbridge_callback: Callback for weighbridge weight updates (called
+                from the weighbridge thread, must not touch Tk widgets)
             update_cameras_callback: Callback for camera updates
+            lane_registry: LaneRegistry with one weighbridge manager per lane
         """
         self.parent = parent
         self.weighbridge_callback = weighbridge_callback
@@ -24,14 +29,34 @@ class SettingsPanel:
         # Initialize variables
         self.init_variables()
         
-        # Initialize weighbridge manager
-        self.weighbridge = WeighbridgeManager(self.weighbridge_callback)
+        # Initialize weighbridge lanes
+        self.lane_registry = lane_registry or LaneRegistry(update_callback=self.weighbridge_callback)
+        self.current_lane = self.lane_registry.get(0)
+        self._last_weight_seq = None
         
         # Create UI components
         self.create_panel()
+        self.load_lane_settings()
+        
+        # Poll the weight state and diagnostics from the Tk thread
+        self.poll_weight_display()
+        self.poll_diagnostics()
+    
+    @property
+    def weighbridge(self):
+        """Weighbridge manager of the selected lane"""
+        return self.current_lane.weighbridge
+    
+    @property
+    def weight_state(self):
+        """Weight state of the selected lane"""
+        return self.current_lane.weight_state
     
     def init_variables(self):
         """Initialize settings variables"""
+        # Lane selection
+        self.lane_var = tk.StringVar()
+        
         # Weighbridge settings
         self.com_port_var = tk.StringVar()
         self.baud_rate_var = tk.IntVar(value=9600)
@@ -41,13 +66,45 @@ class SettingsPanel:
         self.wb_status_var = tk.StringVar(value="Status: Disconnected")
         self.current_weight_var = tk.StringVar(value="0 kg")
         
+        # Weighbridge diagnostics
+        self.wb_rates_var = tk.StringVar()
+        self.wb_errors_var = tk.StringVar()
+        self.wb_latency_var = tk.StringVar()
+        
+        # Auto capture settings
+        self.auto_capture_var = tk.BooleanVar(value=config.AUTO_CAPTURE_ENABLED)
+        self.auto_min_weight_var = tk.DoubleVar(value=config.AUTO_CAPTURE_MIN_WEIGHT)
+        self.auto_stable_seconds_var = tk.DoubleVar(value=config.AUTO_CAPTURE_STABLE_SECONDS)
+        self.auto_rearm_weight_var = tk.DoubleVar(value=config.AUTO_CAPTURE_REARM_WEIGHT)
+        
         # Camera settings
-        self.front_cam_index_var = tk.IntVar(value=0)
-        self.back_cam_index_var = tk.IntVar(value=1)
+        self.front_cam_index_var = tk.StringVar(value="0")
+        self.back_cam_index_var = tk.StringVar(value="1")
+        self.capture_mode_var = tk.StringVar(value=config.CAMERA_CAPTURE_MODE)
+        # Requested camera mode per side ("Default" uses config.CAMERA_CAPTURE_DEFAULTS)
+        self.cam_format_vars = {side: {key: tk.StringVar(value="Default")
+                                       for key in ("resolution", "fps", "fourcc", "buffer_size")}
+                                for side in ("front", "back")}
         self.cam_status_var = tk.StringVar()
     
     def create_panel(self):
         """Create settings panel with tabs"""
+        # Lane selector - all settings below apply to the selected lane
+        lane_frame = ttk.Frame(self.parent, style="TFrame")
+        lane_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
+        
+        ttk.Label(lane_frame, text="Lane:").pack(side=tk.LEFT, padx=(0, 5))
+        self.lane_combo = ttk.Combobox(lane_frame, textvariable=self.lane_var, state="readonly",
+                                     values=[lane.name for lane in self.lane_registry])
+        self.lane_combo.pack(side=tk.LEFT)
+        self.lane_combo.current(0)
+        self.lane_combo.bind("<<ComboboxSelected>>", self.on_lane_selected)
+        
+        add_lane_btn = HoverButton(lane_frame, text="Add Lane", bg=config.COLORS["primary_light"],
+                                 fg=config.COLORS["text"], padx=5, pady=2,
+                                 command=self.add_lane)
+        add_lane_btn.pack(side=tk.LEFT, padx=5)
+        
         # Create settings notebook
         self.settings_notebook = ttk.Notebook(self.parent)
         self.settings_notebook.pack(fill=tk.BOTH, expand=True)
@@ -127,6 +184,35 @@ class SettingsPanel:
         self.weight_label = ttk.Label(wb_frame, textvariable=self.current_weight_var, 
                                     font=("Segoe UI", 10, "bold"))
         self.weight_label.grid(row=7, column=1, sticky=tk.W, pady=2)
+        
+        # Auto capture settings
+        auto_frame = ttk.LabelFrame(parent, text="Auto Capture", padding=10)
+        auto_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Checkbutton(auto_frame, text="Capture weighment automatically on stable weight",
+                       variable=self.auto_capture_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=2)
+        
+        ttk.Label(auto_frame, text="Minimum Weight (kg):").grid(row=1, column=0, sticky=tk.W, pady=2)
+        ttk.Entry(auto_frame, textvariable=self.auto_min_weight_var, width=10).grid(row=1, column=1, sticky=tk.W, pady=2, padx=5)
+        
+        ttk.Label(auto_frame, text="Stable For (seconds):").grid(row=2, column=0, sticky=tk.W, pady=2)
+        ttk.Entry(auto_frame, textvariable=self.auto_stable_seconds_var, width=10).grid(row=2, column=1, sticky=tk.W, pady=2, padx=5)
+        
+        ttk.Label(auto_frame, text="Re-arm Below (kg):").grid(row=3, column=0, sticky=tk.W, pady=2)
+        ttk.Entry(auto_frame, textvariable=self.auto_rearm_weight_var, width=10).grid(row=3, column=1, sticky=tk.W, pady=2, padx=5)
+        
+        apply_auto_btn = HoverButton(auto_frame, text="Apply", bg=config.COLORS["primary"], 
+                                   fg=config.COLORS["button_text"], padx=10, pady=2,
+                                   command=self.apply_auto_capture_settings)
+        apply_auto_btn.grid(row=4, column=0, columnspan=2, pady=5, sticky=tk.W)
+        
+        # Live weighbridge diagnostics
+        diag_frame = ttk.LabelFrame(parent, text="Diagnostics", padding=10)
+        diag_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(diag_frame, textvariable=self.wb_rates_var).pack(anchor=tk.W)
+        ttk.Label(diag_frame, textvariable=self.wb_errors_var).pack(anchor=tk.W)
+        ttk.Label(diag_frame, textvariable=self.wb_latency_var).pack(anchor=tk.W)
     
     def create_camera_settings(self, parent):
         """Create camera configuration settings"""
@@ -134,25 +220,68 @@ class SettingsPanel:
         cam_frame = ttk.LabelFrame(parent, text="Camera Configuration", padding=10)
         cam_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Front camera index
-        ttk.Label(cam_frame, text="Front Camera Index:").grid(row=0, column=0, sticky=tk.W, pady=2)
-        ttk.Combobox(cam_frame, textvariable=self.front_cam_index_var, 
-                    values=[0, 1, 2, 3], state="readonly").grid(row=0, column=1, sticky=tk.EW, pady=2, padx=5)
+        # Camera sources - an index, "synthetic", or a video file / image folder for testing
+        sources = ["0", "1", "2", "3", "synthetic"]
+        for row, (label, var) in enumerate([("Front Camera Source:", self.front_cam_index_var),
+                                            ("Back Camera Source:", self.back_cam_index_var)]):
+            ttk.Label(cam_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Combobox(cam_frame, textvariable=var, 
+                        values=sources).grid(row=row, column=1, sticky=tk.EW, pady=2, padx=5)
+            ttk.Button(cam_frame, text="Video...", width=7,
+                      command=lambda v=var: self.browse_camera_source(v, "video")).grid(row=row, column=2, padx=1)
+            ttk.Button(cam_frame, text="Folder...", width=7,
+                      command=lambda v=var: self.browse_camera_source(v, "images")).grid(row=row, column=3, padx=1)
+        
+        cam_frame.columnconfigure(1, weight=1)
+        
+        # Which buffered frame is saved
+        ttk.Label(cam_frame, text="Saved Frame:").grid(row=2, column=0, sticky=tk.W, pady=2)
+        ttk.Combobox(cam_frame, textvariable=self.capture_mode_var, 
+                    values=CAPTURE_MODES, state="readonly").grid(row=2, column=1, sticky=tk.EW, pady=2, padx=5)
         
-        # Back camera index
-        ttk.Label(cam_frame, text="Back Camera Index:").grid(row=1, column=0, sticky=tk.W, pady=2)
-        ttk.Combobox(cam_frame, textvariable=self.back_cam_index_var, 
-                    values=[0, 1, 2, 3], state="readonly").grid(row=1, column=1, sticky=tk.EW, pady=2, padx=5)
+        # Capture format requested from each camera - MJPG keeps USB bandwidth low
+        format_frame = ttk.Frame(cam_frame, style="TFrame")
+        format_frame.grid(row=3, column=0, columnspan=4, sticky=tk.EW, pady=(8, 2))
+        
+        columns = [("Resolution", "resolution", ["Default", "640x480", "1280x720", "1920x1080"], 11),
+                   ("FPS", "fps", ["Default", "15", "25", "30"], 7),
+                   ("Codec", "fourcc", ["Default", "MJPG", "YUYV"], 7),
+                   ("Buffer", "buffer_size", ["Default", "1", "2", "4"], 7)]
+        for column, (title, _, _, _) in enumerate(columns, start=1):
+            ttk.Label(format_frame, text=title).grid(row=0, column=column, sticky=tk.W, padx=3)
+        
+        for row, side in enumerate(("front", "back"), start=1):
+            ttk.Label(format_frame, text=f"{side.title()}:").grid(row=row, column=0, sticky=tk.W, pady=2)
+            for column, (_, key, values, width) in enumerate(columns, start=1):
+                ttk.Combobox(format_frame, textvariable=self.cam_format_vars[side][key], values=values,
+                            width=width).grid(row=row, column=column, sticky=tk.W, pady=2, padx=3)
         
         # Apply button
         apply_btn = HoverButton(cam_frame, text="Apply Settings", bg=config.COLORS["primary"], 
                                fg=config.COLORS["button_text"], padx=10, pady=3,
                                command=self.apply_camera_settings)
-        apply_btn.grid(row=2, column=0, columnspan=2, pady=10)
+        apply_btn.grid(row=4, column=0, columnspan=4, pady=10)
         
         # Status message
         ttk.Label(cam_frame, textvariable=self.cam_status_var, 
-                foreground=config.COLORS["primary"]).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+                foreground=config.COLORS["primary"]).grid(row=5, column=0, columnspan=4, sticky=tk.W)
+    
+    def browse_camera_source(self, var, kind):
+        """Pick a video file or image folder as a camera source
+        
+        Args:
+            var: StringVar holding the source spec
+            kind: "video" or "images"
+        """
+        if kind == "video":
+            path = filedialog.askopenfilename(
+                title="Select Video File",
+                filetypes=[("Video files", "*.mp4 *.avi *.mkv *.mov"), ("All files", "*.*")])
+        else:
+            path = filedialog.askdirectory(title="Select Image Folder")
+        
+        if path:
+            var.set(f"{kind}:{path}")
     
     def refresh_com_ports(self):
         """Refresh available COM ports"""
@@ -175,8 +304,18 @@ class SettingsPanel:
             parity = self.parity_var.get()
             stop_bits = self.stop_bits_var.get()
             
+            # Remember the port settings for this lane
+            self.current_lane.settings.update({
+                "com_port": com_port,
+                "baud_rate": baud_rate,
+                "data_bits": data_bits,
+                "parity": parity,
+                "stop_bits": stop_bits
+            })
+            self.lane_registry.save()
+            
             # Connect to weighbridge
-            if self.weighbridge.connect(com_port, baud_rate, data_bits, parity, stop_bits):
+            if self.current_lane.connect():
                 # Update UI
                 self.wb_status_var.set("Status: Connected")
                 self.weight_label.config(foreground="green")
@@ -197,36 +336,208 @@ class SettingsPanel:
             self.disconnect_btn.config(state=tk.DISABLED)
             self.current_weight_var.set("0 kg")
     
-    def update_weight_display(self, weight):
-        """Update weight display (callback for weighbridge)
+    def poll_weight_display(self):
+        """Refresh the weight display from the shared weight state"""
+        if not self.parent.winfo_exists():
+            return
         
-        Args:
-            weight: Weight value to display
-        """
-        self.current_weight_var.set(f"{weight:.2f} kg")
+        reading = self.weight_state.snapshot()
+        
+        if reading.seq != self._last_weight_seq:
+            self._last_weight_seq = reading.seq
+            if reading.seq:
+                self.current_weight_var.set(f"{reading.weight:.2f} kg")
         
-        # Update weight label color based on connection status
-        if self.wb_status_var.get() == "Status: Connected":
+        # Update weight label color based on connection status and freshness
+        if not reading.connected:
+            self.weight_label.config(foreground="red")
+        elif time.time() - reading.timestamp > config.WEIGHT_STALE_SECONDS:
+            self.weight_label.config(foreground="gray")
+        elif reading.stable:
             self.weight_label.config(foreground="green")
         else:
-            self.weight_label.config(foreground="red")
+            self.weight_label.config(foreground=config.COLORS["warning"])
+        
+        self.parent.after(config.WEIGHT_DISPLAY_INTERVAL_MS, self.poll_weight_display)
+    
+    def poll_diagnostics(self):
+        """Refresh the weighbridge diagnostics for the selected lane"""
+        if not self.parent.winfo_exists():
+            return
+        
+        def fmt(value, unit):
+            return "-" if value is None else f"{value:.1f}{unit}"
         
-        # Propagate weight update to form if callback is set
-        if self.weighbridge_callback:
-            self.weighbridge_callback(weight)
+        metrics = self.weighbridge.metrics.snapshot()
+        stable = metrics["time_to_stable_s"]
+        callback = metrics["callback_latency_ms"]
+        publish = metrics["publish_latency_ms"]
+        
+        self.wb_rates_var.set(
+            f"Bytes/s: {metrics['bytes_per_s']:.0f}   Frames/s: {metrics['frames_per_s']:.1f}   "
+            f"Queue: {metrics['queue_depth']} (max {metrics['max_queue_depth']})")
+        self.wb_errors_var.set(
+            f"Frames: {metrics['frames_total']}   Parse failures: {metrics['parse_failures']}   "
+            f"Dropped: {metrics['dropped_frames']}")
+        self.wb_latency_var.set(
+            f"Time to stable p50/p95: {fmt(stable['p50'], 's')}/{fmt(stable['p95'], 's')}   "
+            f"Publish p95: {fmt(publish['p95'], 'ms')}   Callback p95: {fmt(callback['p95'], 'ms')}")
+        
+        self.parent.after(config.METRICS_DISPLAY_INTERVAL_MS, self.poll_diagnostics)
+    
+    def get_capture_overrides(self, side):
+        """Read one camera's capture format fields
+        
+        Args:
+            side: "front" or "back"
+        
+        Returns:
+            dict: Settings that differ from "Default"
+        
+        Raises:
+            ValueError: If a field is not a valid value
+        """
+        values = {key: var.get().strip() for key, var in self.cam_format_vars[side].items()}
+        overrides = {}
+        
+        resolution = values["resolution"]
+        if resolution and resolution != "Default":
+            try:
+                width, height = (int(value) for value in resolution.lower().split('x'))
+            except ValueError:
+                raise ValueError(f"Invalid {side} camera resolution: {resolution} (use WIDTHxHEIGHT)")
+            overrides["width"], overrides["height"] = width, height
+        
+        for key in ("fps", "buffer_size"):
+            if values[key] and values[key] != "Default":
+                if not values[key].isdigit() or int(values[key]) <= 0:
+                    raise ValueError(f"Invalid {side} camera {key.replace('_', ' ')}: {values[key]}")
+                overrides[key] = int(values[key])
+        
+        fourcc = values["fourcc"]
+        if fourcc and fourcc != "Default":
+            if len(fourcc) != 4:
+                raise ValueError(f"Invalid {side} camera codec: {fourcc} (use a 4 letter FOURCC)")
+            overrides["fourcc"] = fourcc.upper()
+        
+        return overrides
+    
+    def set_capture_overrides(self, side, overrides):
+        """Show one camera's capture format overrides in the UI
+        
+        Args:
+            side: "front" or "back"
+            overrides: Lane's capture settings for the camera
+        """
+        variables = self.cam_format_vars[side]
+        if overrides.get("width") and overrides.get("height"):
+            variables["resolution"].set(f"{overrides['width']}x{overrides['height']}")
+        else:
+            variables["resolution"].set("Default")
+        for key in ("fps", "fourcc", "buffer_size"):
+            variables[key].set(str(overrides[key]) if overrides.get(key) else "Default")
     
     def apply_camera_settings(self):
-        """Apply camera index settings"""
-        front_index = self.front_cam_index_var.get()
-        back_index = self.back_cam_index_var.get()
+        """Apply camera source settings"""
+        try:
+            front_index = normalize_source(self.front_cam_index_var.get())
+            back_index = normalize_source(self.back_cam_index_var.get())
+            front_capture = self.get_capture_overrides("front")
+            back_capture = self.get_capture_overrides("back")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        # Save camera indices for the selected lane
+        self.current_lane.settings["front_camera_index"] = front_index
+        self.current_lane.settings["back_camera_index"] = back_index
+        self.current_lane.settings["capture_mode"] = self.capture_mode_var.get()
+        self.current_lane.settings["front_camera_capture"] = front_capture
+        self.current_lane.settings["back_camera_capture"] = back_capture
+        self.lane_registry.save()
         
         # Update camera indices through callback
         if self.update_cameras_callback:
-            self.update_cameras_callback(front_index, back_index)
+            self.update_cameras_callback(front_index, back_index, self.current_lane)
+        
+        self.cam_status_var.set("Camera settings applied.")
+    
+    def apply_auto_capture_settings(self):
+        """Apply auto capture settings to the selected lane"""
+        try:
+            min_weight = self.auto_min_weight_var.get()
+            stable_seconds = self.auto_stable_seconds_var.get()
+            rearm_weight = self.auto_rearm_weight_var.get()
+        except tk.TclError:
+            messagebox.showerror("Error", "Auto capture thresholds must be numbers")
+            return
+        
+        if rearm_weight >= min_weight:
+            messagebox.showerror("Error", "Re-arm weight must be below the minimum weight")
+            return
+        
+        self.current_lane.settings.update({
+            "auto_capture": self.auto_capture_var.get(),
+            "auto_capture_min_weight": min_weight,
+            "auto_capture_stable_seconds": stable_seconds,
+            "auto_capture_rearm_weight": rearm_weight
+        })
+        self.lane_registry.save()
+        
+        messagebox.showinfo("Auto Capture", f"Auto capture settings applied to {self.current_lane.name}.")
+    
+    def on_lane_selected(self, event=None):
+        """Switch the settings view to the selected lane"""
+        lane = self.lane_registry.find_by_name(self.lane_var.get())
+        if lane:
+            self.current_lane = lane
+            self.load_lane_settings()
+    
+    def load_lane_settings(self):
+        """Load the selected lane's settings and connection state into the UI"""
+        settings = self.current_lane.settings
+        
+        if settings.get("com_port"):
+            self.com_port_var.set(settings["com_port"])
+        self.baud_rate_var.set(settings["baud_rate"])
+        self.data_bits_var.set(settings["data_bits"])
+        self.parity_var.set(settings["parity"])
+        self.stop_bits_var.set(settings["stop_bits"])
+        self.front_cam_index_var.set(str(settings["front_camera_index"]))
+        self.back_cam_index_var.set(str(settings["back_camera_index"]))
+        self.capture_mode_var.set(settings["capture_mode"])
+        self.set_capture_overrides("front", settings["front_camera_capture"])
+        self.set_capture_overrides("back", settings["back_camera_capture"])
+        self.cam_status_var.set("")
+        self.auto_capture_var.set(settings["auto_capture"])
+        self.auto_min_weight_var.set(settings["auto_capture_min_weight"])
+        self.auto_stable_seconds_var.set(settings["auto_capture_stable_seconds"])
+        self.auto_rearm_weight_var.set(settings["auto_capture_rearm_weight"])
+        
+        # Reflect this lane's connection state
+        self._last_weight_seq = None
+        if self.current_lane.is_connected:
+            self.wb_status_var.set("Status: Connected")
+            self.connect_btn.config(state=tk.DISABLED)
+            self.disconnect_btn.config(state=tk.NORMAL)
+        else:
+            self.wb_status_var.set("Status: Disconnected")
+            self.connect_btn.config(state=tk.NORMAL)
+            self.disconnect_btn.config(state=tk.DISABLED)
+            self.current_weight_var.set("0 kg")
+    
+    def add_lane(self):
+        """Add a new weighbridge lane"""
+        lane = self.lane_registry.add_lane()
+        self.lane_registry.save()
+        
+        self.lane_combo['values'] = [l.name for l in self.lane_registry]
+        self.lane_var.set(lane.name)
+        self.on_lane_selected()
         
-        self.cam_status_var.set("Camera settings applied. Changes take effect on next capture.")
+        messagebox.showinfo("Lane Added", 
+                          f"{lane.name} added. Restart the application to open its entry form.")
     
     def on_closing(self):
         """Handle cleanup when closing"""
-        if self.weighbridge:
-            self.weighbridge.disconnect()
\ No newline at end of file
+        self.lane_registry.disconnect_all()
\ No newline at end of file
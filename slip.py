@@ -0,0 +1,269 @@
+import os
+import io
+import re
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from fileutil import write_atomic
+from image_store import image_path
+
+# Record fields printed on a slip, in order
+SLIP_FIELDS = [
+    ("Ticket No", 'ticket_no'),
+    ("Date", 'date'),
+    ("Vehicle No", 'vehicle_no'),
+    ("Site", 'site_name'),
+    ("Agency", 'agency_name'),
+    ("Transfer Party", 'transfer_party_name'),
+    ("Material", 'material'),
+    ("Material Type", 'material_type')
+]
+
+# Weighments printed below the fields: label, weight key, timestamp key
+SLIP_WEIGHTS = [
+    ("First Weight", 'first_weight', 'first_timestamp'),
+    ("Second Weight", 'second_weight', 'second_timestamp')
+]
+
+# Slips are written one at a time, off the Tk thread
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slip")
+
+
+class SlipTemplate:
+    """Page layout for weighment slips
+    
+    Fonts, sizes and every position on the page are worked out once, when
+    the template is created, so rendering a slip only draws the record's
+    values onto a bare canvas. Vehicle images are embedded as the stored
+    JPEG files without decoding them.
+    """
+    
+    def __init__(self):
+        """Initialize slip template"""
+        from reportlab import rl_config
+        from reportlab.lib.pagesizes import A5
+        from reportlab.lib.units import mm
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        
+        # Embed JPEGs as binary streams; ASCII85 text encoding is pure Python
+        # without ReportLab's C extension and took most of the render time
+        rl_config.useA85 = 0
+        
+        self.page_size = A5
+        self.width, self.height = A5
+        self.margin = 12 * mm
+        self.fonts = {
+            "title": ("Helvetica-Bold", 16),
+            "heading": ("Helvetica", 11),
+            "label": ("Helvetica", 9),
+            "value": ("Helvetica-Bold", 10),
+            "net": ("Helvetica-Bold", 14),
+            "small": ("Helvetica", 7)
+        }
+        
+        # Title lines
+        self.title_y = self.height - self.margin - self.fonts["title"][1]
+        self.subtitle_y = self.title_y - 2 * self.fonts["heading"][1]
+        
+        # Field rows: labels in one column, values after the widest label
+        self.row_height = 6 * mm
+        labels = [label for label, _ in SLIP_FIELDS] + [label for label, _, _ in SLIP_WEIGHTS] + ["Net Weight"]
+        self.value_x = self.margin + max(stringWidth(label, *self.fonts["label"]) for label in labels) + 6 * mm
+        self.fields_top = self.height - self.margin - 22 * mm
+        self.weights_top = self.fields_top - len(SLIP_FIELDS) * self.row_height - 3 * mm
+        self.net_y = self.weights_top - len(SLIP_WEIGHTS) * self.row_height - 3 * mm
+        
+        # Front and back images side by side under the weights
+        gap = 6 * mm
+        self.image_width = (self.width - 2 * self.margin - gap) / 2
+        self.image_height = self.image_width * 0.6
+        self.image_y = self.net_y - 10 * mm - self.image_height
+        self.image_x = (self.margin, self.margin + self.image_width + gap)
+        
+        # Signature line above the footer
+        self.footer_y = self.margin + 8
+        self.signature_x = self.width - self.margin - 55 * mm
+    
+    def render(self, record):
+        """Draw a slip
+        
+        Args:
+            record: Record dictionary (see data_management.RECORD_FIELDS)
+        
+        Returns:
+            bytes: One-page PDF
+        """
+        from reportlab.pdfgen import canvas
+        
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=self.page_size, pageCompression=0)
+        c.setTitle(f"Weighment Slip {record.get('ticket_no', '')}")
+        left, right = self.margin, self.width - self.margin
+        
+        # Header
+        c.setFont(*self.fonts["title"])
+        c.drawCentredString(self.width / 2, self.title_y, "ADVITIA LABS")
+        c.setFont(*self.fonts["heading"])
+        c.drawCentredString(self.width / 2, self.subtitle_y, "WEIGHMENT SLIP")
+        c.line(left, self.fields_top + self.row_height / 2, right, self.fields_top + self.row_height / 2)
+        
+        # Record fields
+        y = self.fields_top
+        for label, key in SLIP_FIELDS:
+            self._field(c, y, label, record.get(key, ''))
+            y -= self.row_height
+        
+        # Weighments with their timestamps
+        y = self.weights_top
+        for label, weight_key, timestamp_key in SLIP_WEIGHTS:
+            weight = record.get(weight_key, '')
+            self._field(c, y, label, f"{weight} kg" if weight else "")
+            c.setFont(*self.fonts["label"])
+            c.drawRightString(right, y, record.get(timestamp_key, ''))
+            y -= self.row_height
+        
+        c.line(left, self.net_y + self.row_height * 0.8, right, self.net_y + self.row_height * 0.8)
+        c.setFont(*self.fonts["label"])
+        c.drawString(left, self.net_y, "Net Weight")
+        c.setFont(*self.fonts["net"])
+        net = record.get('net_weight', '')
+        c.drawString(self.value_x, self.net_y, f"{net} kg" if net else "")
+        
+        # Vehicle images
+        for x, (label, key) in zip(self.image_x, (("Front", 'front_image'), ("Back", 'back_image'))):
+            c.setFont(*self.fonts["label"])
+            c.drawString(x, self.image_y + self.image_height + 2, label)
+            c.rect(x, self.image_y, self.image_width, self.image_height)
+            path = image_path(record.get(key, ''))
+            if path and os.path.exists(path):
+                c.drawImage(path, x, self.image_y, self.image_width, self.image_height,
+                            preserveAspectRatio=True, anchor='c')
+            else:
+                c.drawCentredString(x + self.image_width / 2, self.image_y + self.image_height / 2, "No Image")
+        
+        # Footer
+        c.line(self.signature_x, self.footer_y + 12, right, self.footer_y + 12)
+        c.setFont(*self.fonts["small"])
+        c.drawRightString(right, self.footer_y, "Operator signature")
+        c.drawString(left, self.footer_y, f"Printed {datetime.datetime.now().strftime('%d-%m-%Y %H:%M:%S')}")
+        
+        c.showPage()
+        c.save()
+        return buffer.getvalue()
+    
+    def _field(self, c, y, label, value):
+        """Draw one label / value row"""
+        c.setFont(*self.fonts["label"])
+        c.drawString(self.margin, y, label)
+        c.setFont(*self.fonts["value"])
+        c.drawString(self.value_x, y, str(value))
+
+
+def render_text(record):
+    """Plain text slip, used when ReportLab is not installed
+    
+    Args:
+        record: Record dictionary
+    
+    Returns:
+        str: Slip text
+    """
+    lines = ["ADVITIA LABS - WEIGHMENT SLIP", "=" * 40]
+    for label, key in SLIP_FIELDS:
+        lines.append(f"{label + ':':<16}{record.get(key, '')}")
+    for label, weight_key, timestamp_key in SLIP_WEIGHTS:
+        lines.append(f"{label + ':':<16}{record.get(weight_key, '')} kg  {record.get(timestamp_key, '')}")
+    lines.append(f"{'Net Weight:':<16}{record.get('net_weight', '')} kg")
+    lines.append("=" * 40)
+    return "\n".join(lines) + "\n"
+
+
+def slip_filename(record, folder=None, extension=".pdf"):
+    """File a record's slip is written to, e.g. data/slips/slip_1234.pdf"""
+    ticket = re.sub(r'[^A-Za-z0-9_-]', '_', record.get('ticket_no', '')) or "ticket"
+    return os.path.join(folder or config.SLIP_FOLDER, f"slip_{ticket}{extension}")
+
+
+def wait_for_images(record, timeout=None):
+    """Give the record's images a moment to finish saving
+    
+    Images are written in the background and appear atomically, so a slip
+    requested right after the capture may have to wait for them briefly.
+    """
+    deadline = time.monotonic() + (config.SLIP_IMAGE_WAIT if timeout is None else timeout)
+    paths = [image_path(record.get(key, '')) for key in ('front_image', 'back_image')]
+    paths = [path for path in paths if path]
+    while paths and time.monotonic() < deadline:
+        paths = [path for path in paths if not os.path.exists(path)]
+        if paths:
+            time.sleep(0.05)
+
+
+def write_slip(record, folder=None):
+    """Write a weighment slip
+    
+    The slip is written under a temporary name and renamed into place, so a
+    printer watching the folder never picks up half a file. Does not touch
+    the UI.
+    
+    Args:
+        record: Record dictionary of a completed weighment
+        folder: Output or print spool folder (defaults to config.SLIP_FOLDER)
+    
+    Returns:
+        str: The file written
+    """
+    from reports import reportlab_available
+    
+    folder = folder or config.SLIP_FOLDER
+    os.makedirs(folder, exist_ok=True)
+    wait_for_images(record)
+    
+    if reportlab_available():
+        filename = slip_filename(record, folder)
+        data = get_slip_template().render(record)
+    else:
+        filename = slip_filename(record, folder, ".txt")
+        data = render_text(record).encode('utf-8')
+    
+    write_atomic(filename, data)
+    return filename
+
+
+def submit_slip(record, folder=None):
+    """Write a weighment slip in the background
+    
+    Args:
+        record: Record dictionary of a completed weighment
+        folder: Output or print spool folder (defaults to config.SLIP_FOLDER)
+    
+    Returns:
+        concurrent.futures.Future: Resolves to the file written
+    """
+    return _pool.submit(write_slip, dict(record), folder)
+
+
+def prepare_slips():
+    """Build the slip template in the background, so the first slip is fast"""
+    _pool.submit(get_slip_template)
+
+
+# Shared template, built on first use
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_slip_template():
+    """Get the shared slip template
+    
+    Returns:
+        SlipTemplate: Template built once and reused for every slip
+    """
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = SlipTemplate()
+        return _template
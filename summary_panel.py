@@ -2,12 +2,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import datetime
-from PIL import Image, ImageTk
-import cv2
 
 import config
 from ui_components import HoverButton
-from reports import export_to_excel, export_to_pdf
+from reports import (ask_report_filename, write_excel, write_pdf, write_summary, write_analytics,
+                     reportlab_available, show_reportlab_notice)
+from report_jobs import run_report
+from image_store import image_path as image_path_for
+from thumbnail_cache import get_thumbnail_cache
+from data_management import ReportQuery, DATE_FORMAT
+from lazy_import import lazy_module
+
+Image = lazy_module("PIL.Image")
+ImageTk = lazy_module("PIL.ImageTk")
+cv2 = lazy_module("cv2")
 
 class SummaryPanel:
     """Panel for displaying summary of recent entries"""
@@ -25,6 +33,14 @@ class SummaryPanel:
         # Create summary variables
         self.filter_var = tk.StringVar()
         
+        # Report query - limits both the table and the exports
+        self.from_date_var = tk.StringVar()
+        self.to_date_var = tk.StringVar()
+        self.site_filter_var = tk.StringVar()
+        self.agency_filter_var = tk.StringVar()
+        self.material_filter_var = tk.StringVar()
+        self.completed_only_var = tk.BooleanVar(value=False)
+        
         # Create UI
         self.create_panel()
         
@@ -64,6 +80,51 @@ class SummaryPanel:
                             command=self.export_to_pdf)
         pdf_btn.pack(side=tk.LEFT, padx=2)
         
+        # Tonnage summary button - totals from the daily rollups
+        tonnage_btn = HoverButton(control_frame, 
+                                text="Tonnage", 
+                                bg=config.COLORS["primary"],
+                                fg=config.COLORS["button_text"],
+                                padx=5, pady=2,
+                                command=self.export_summary)
+        tonnage_btn.pack(side=tk.LEFT, padx=2)
+        
+        # Analytics button - throughput, turnaround, tare drift and outliers
+        analytics_btn = HoverButton(control_frame, 
+                                  text="Analytics", 
+                                  bg=config.COLORS["primary"],
+                                  fg=config.COLORS["button_text"],
+                                  padx=5, pady=2,
+                                  command=self.export_analytics)
+        analytics_btn.pack(side=tk.LEFT, padx=2)
+        
+        # Report query
+        query_frame = ttk.Frame(self.parent, style="TFrame")
+        query_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        
+        ttk.Label(query_frame, text="From:").pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Entry(query_frame, textvariable=self.from_date_var, width=11).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(query_frame, text="To:").pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Entry(query_frame, textvariable=self.to_date_var, width=11).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.query_combos = {}
+        for label, var, key in [("Site:", self.site_filter_var, 'site_name'),
+                                ("Agency:", self.agency_filter_var, 'agency_name'),
+                                ("Material:", self.material_filter_var, 'material')]:
+            ttk.Label(query_frame, text=label).pack(side=tk.LEFT, padx=(0, 2))
+            combo = ttk.Combobox(query_frame, textvariable=var, width=12)
+            combo.pack(side=tk.LEFT, padx=(0, 5))
+            self.query_combos[key] = combo
+        
+        ttk.Checkbutton(query_frame, text="Completed only",
+                       variable=self.completed_only_var).pack(side=tk.LEFT, padx=5)
+        ttk.Button(query_frame, text="Clear", width=6,
+                  command=self.clear_query).pack(side=tk.LEFT, padx=5)
+        
+        for var in (self.from_date_var, self.to_date_var, self.site_filter_var,
+                    self.agency_filter_var, self.material_filter_var, self.completed_only_var):
+            var.trace_add("write", self.apply_filter)
+        
         # Summary frame with table
         summary_frame = ttk.LabelFrame(self.parent, text="Recent Entries")
         summary_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
@@ -126,16 +187,24 @@ class SummaryPanel:
     
     def update_summary(self):
         """Update the summary tree with recent records"""
-        # Clear existing items
-        for item in self.summary_tree.get_children():
-            self.summary_tree.delete(item)
-            
         if not self.data_manager:
             return
             
-        # Get records with filter applied
+        # Get records with the query and filter applied
+        try:
+            query = self.build_query()
+        except ValueError:
+            # A date is still being typed - keep the current table
+            return
+        
+        # Clear existing items
+        for item in self.summary_tree.get_children():
+            self.summary_tree.delete(item)
+        
         filter_text = self.filter_var.get()
-        records = self.data_manager.get_filtered_records(filter_text)
+        records = self.data_manager.get_filtered_records(filter_text, query)
+        if query.is_empty and not filter_text:
+            self.update_query_options(records)
         
         # Show most recent first (limited to 100 for performance)
         for i, record in enumerate(reversed(records[-100:])):
@@ -182,15 +251,98 @@ class SummaryPanel:
         """Apply filter to records"""
         self.update_summary()
     
+    def build_query(self):
+        """Build the report query from the filter fields
+        
+        Returns:
+            ReportQuery: Query for the table and exports
+        
+        Raises:
+            ValueError: If a date is not DD-MM-YYYY
+        """
+        dates = []
+        for var in (self.from_date_var, self.to_date_var):
+            text = var.get().strip()
+            dates.append(datetime.datetime.strptime(text, DATE_FORMAT).date() if text else None)
+        
+        return ReportQuery(start_date=dates[0], end_date=dates[1],
+                           site_name=self.site_filter_var.get(),
+                           agency_name=self.agency_filter_var.get(),
+                           material=self.material_filter_var.get(),
+                           completed_only=self.completed_only_var.get())
+    
+    def update_query_options(self, records):
+        """Offer the sites, agencies and materials seen in records"""
+        for key, combo in self.query_combos.items():
+            combo['values'] = [""] + sorted({record[key] for record in records if record.get(key)})
+    
+    def clear_query(self):
+        """Reset the report query to every record"""
+        for var in (self.from_date_var, self.to_date_var, self.site_filter_var,
+                    self.agency_filter_var, self.material_filter_var):
+            var.set("")
+        self.completed_only_var.set(False)
+    
+    def get_export_query(self):
+        """Get the query for an export, reporting invalid dates
+        
+        Returns:
+            ReportQuery: Query or None if the fields are invalid
+        """
+        try:
+            return self.build_query()
+        except ValueError:
+            messagebox.showerror("Invalid Date", "Report dates must be in DD-MM-YYYY format.")
+            return None
+    
     def export_to_excel(self):
-        """Export records to Excel"""
-        if export_to_excel():
-            messagebox.showinfo("Export Successful", "Data successfully exported to Excel file.")
+        """Export the records matching the report query to Excel in the background"""
+        query = self.get_export_query()
+        if not query:
+            return
+        filename = ask_report_filename("excel")
+        if filename:
+            run_report(self.parent, write_excel, filename, "Excel Export",
+                       "Data successfully exported to Excel file.", query=query)
     
     def export_to_pdf(self):
-        """Export records to PDF"""
-        if export_to_pdf():
-            messagebox.showinfo("Export Successful", "Data successfully exported to PDF file.")
+        """Export the records matching the report query to PDF in the background"""
+        query = self.get_export_query()
+        if not query:
+            return
+        filename = ask_report_filename("pdf")
+        if not filename:
+            return
+        if not reportlab_available():
+            show_reportlab_notice()
+        run_report(self.parent, write_pdf, filename, "PDF Export",
+                   "Data successfully exported to PDF file.", query=query)
+    
+    def export_summary(self):
+        """Export tonnage per day, agency and material for the report query"""
+        query = self.get_export_query()
+        if not query:
+            return
+        filename = ask_report_filename("pdf")
+        if not filename:
+            return
+        if not reportlab_available():
+            show_reportlab_notice()
+        run_report(self.parent, write_summary, filename, "Tonnage Summary",
+                   "Tonnage summary successfully exported to PDF file.", query=query)
+    
+    def export_analytics(self):
+        """Export throughput, turnaround, tare drift and outliers for the report query"""
+        query = self.get_export_query()
+        if not query:
+            return
+        filename = ask_report_filename("pdf")
+        if not filename:
+            return
+        if not reportlab_available():
+            show_reportlab_notice()
+        run_report(self.parent, write_analytics, filename, "Analytics Report",
+                   "Analytics report successfully exported to PDF file.", query=query)
     
     def view_entry_details(self):
         """View details of selected entry"""
@@ -294,13 +446,12 @@ class SummaryPanel:
     def display_image_in_frame(self, parent, image_name, width, height):
         """Display an image in the given frame with specified size"""
         if image_name:
-            image_path = os.path.join(config.IMAGES_FOLDER, image_name)
+            image_path = image_path_for(image_name)
             if os.path.exists(image_path):
                 try:
-                    # Read image and resize
-                    img = cv2.imread(image_path)
+                    # Small cached copy instead of decoding the full frame
+                    img = get_thumbnail_cache().get(image_name, (width, height))
                     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                    img = cv2.resize(img, (width, height))
                     
                     # Convert to PhotoImage
                     photo = ImageTk.PhotoImage(image=Image.fromarray(img))
@@ -0,0 +1,230 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from fileutil import write_atomic
+from image_store import get_image_store
+from lazy_import import lazy_module
+
+cv2 = lazy_module("cv2")
+np = lazy_module("numpy")
+
+# Fixed thumbnail sizes (width, height) used by the application
+DETAIL_SIZE = config.THUMBNAIL_SIZES["detail"]
+REPORT_SIZE = config.THUMBNAIL_SIZES["report"]
+
+
+class ThumbnailCache:
+    """Small, fixed-size copies of stored images
+    
+    Thumbnails are written to THUMBNAIL_CACHE_FOLDER/<width>x<height>/ with
+    the same relative name as the image, and the most recently used ones
+    are also kept decoded in memory. They are made when an image is saved
+    (from the frame already in memory) or on first use, decoding the
+    store's small thumbnail or a reduced-resolution decode of the full
+    JPEG instead of the whole frame.
+    """
+    
+    def __init__(self, store=None, folder=None, capacity=None):
+        """Initialize thumbnail cache
+        
+        Args:
+            store: ImageStore holding the full images (defaults to the application store)
+            folder: Cache folder (defaults to config.THUMBNAIL_CACHE_FOLDER)
+            capacity: Thumbnails kept in memory (defaults to config.THUMBNAIL_MEMORY_ITEMS)
+        """
+        self.store = store or get_image_store()
+        self.folder = folder or config.THUMBNAIL_CACHE_FOLDER
+        self.capacity = capacity or config.THUMBNAIL_MEMORY_ITEMS
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # (name, size) -> BGR image
+    
+    def get(self, name, size):
+        """Get a thumbnail as an image
+        
+        Args:
+            name: Image name from a record
+            size: (width, height)
+        
+        Returns:
+            numpy.ndarray: BGR thumbnail or None if the image is missing
+        """
+        key = (name, tuple(size))
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                return image
+        
+        path = self.get_path(name, size)
+        image = cv2.imread(path) if path else None
+        if image is not None:
+            self._remember(key, image)
+        return image
+    
+    def get_path(self, name, size):
+        """Get the on-disk thumbnail, creating it if needed
+        
+        Args:
+            name: Image name from a record
+            size: (width, height)
+        
+        Returns:
+            str: Thumbnail path or None if the image is missing
+        """
+        source = self.store.resolve(name)
+        if not source or not os.path.exists(source):
+            return None
+        
+        path = self._cache_path(name, size)
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+            return path
+        
+        image = self._load_reduced(source, size)
+        if image is None:
+            return None
+        return self._write(name, size, image)
+    
+    def get_jpeg(self, name, size):
+        """Get a thumbnail as encoded JPEG bytes, e.g. for embedding in a PDF
+        
+        Args:
+            name: Image name from a record
+            size: (width, height)
+        
+        Returns:
+            bytes: JPEG data or None if the image is missing
+        """
+        path = self.get_path(name, size)
+        if not path:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def get_jpegs(self, names, size, workers=None):
+        """Load several thumbnails as JPEG bytes in parallel
+        
+        Thumbnails that are missing from the cache are decoded and resized
+        on a small thread pool (OpenCV releases the GIL while it works).
+        
+        Args:
+            names: Image names from records (empty names are skipped)
+            size: (width, height)
+            workers: Threads to use (defaults to config.THUMBNAIL_LOAD_WORKERS)
+        
+        Returns:
+            dict: name -> JPEG bytes for every image that could be loaded
+        """
+        names = list(dict.fromkeys(name for name in names if name))
+        if not names:
+            return {}
+        
+        def load(name):
+            try:
+                return self.get_jpeg(name, size)
+            except Exception as e:
+                print(f"Thumbnail error: {str(e)}")
+                return None
+        
+        workers = min(workers or config.THUMBNAIL_LOAD_WORKERS, len(names))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail") as pool:
+            results = pool.map(load, names)
+            return {name: data for name, data in zip(names, results) if data}
+    
+    def warm(self, name, image):
+        """Create all standard thumbnails from an image already in memory
+        
+        Called when an image is saved so it never has to be decoded again for
+        detail views or reports.
+        
+        Args:
+            name: Image name as stored in records
+            image: Full BGR image
+        """
+        for size in config.THUMBNAIL_SIZES.values():
+            self._write(name, size, image)
+    
+    def remove(self, name):
+        """Drop the thumbnails of a deleted image"""
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == name]:
+                del self._memory[key]
+        
+        for width, height in config.THUMBNAIL_SIZES.values():
+            path = self._cache_path(name, (width, height))
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def _cache_path(self, name, size):
+        """Path of the cached thumbnail for an image and size"""
+        width, height = size
+        return os.path.join(self.folder, f"{width}x{height}", *name.split('/'))
+    
+    def _load_reduced(self, source, size):
+        """Decode an image at no more than about the requested size
+        
+        Uses the store's thumbnail when it is big enough, otherwise lets the
+        JPEG decoder skip detail with IMREAD_REDUCED_*.
+        """
+        width, height = size
+        thumbnail = self.store.thumbnail_path(source)
+        if width <= config.THUMBNAIL_WIDTH and os.path.exists(thumbnail):
+            image = cv2.imread(thumbnail)
+            if image is not None:
+                return image
+        
+        # The 1/8 decode is nearly free and also tells us the full size
+        image = cv2.imread(source, cv2.IMREAD_REDUCED_COLOR_8)
+        if image is None:
+            return None
+        full_width, full_height = image.shape[1] * 8, image.shape[0] * 8
+        
+        for flag, factor in ((cv2.IMREAD_REDUCED_COLOR_8, 8), (cv2.IMREAD_REDUCED_COLOR_4, 4),
+                             (cv2.IMREAD_REDUCED_COLOR_2, 2)):
+            if full_width // factor >= width and full_height // factor >= height:
+                return image if factor == 8 else cv2.imread(source, flag)
+        return cv2.imread(source)
+    
+    def _write(self, name, size, image):
+        """Resize, save and remember a thumbnail
+        
+        Returns:
+            str: Thumbnail path
+        """
+        # Imported here to avoid a cycle - the pipeline warms this cache
+        from image_pipeline import encode_jpeg
+        
+        thumbnail = cv2.resize(image, tuple(size), interpolation=cv2.INTER_AREA)
+        path = self._cache_path(name, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, encode_jpeg(thumbnail, config.THUMBNAIL_QUALITY))
+        self._remember((name, tuple(size)), np.ascontiguousarray(thumbnail))
+        return path
+    
+    def _remember(self, key, image):
+        """Add a thumbnail to the in-memory LRU"""
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+
+
+# Shared cache for the application's images
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    """Get the application's thumbnail cache
+    
+    Returns:
+        ThumbnailCache: Shared cache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
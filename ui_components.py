@@ -28,6 +28,27 @@ class HoverButton(tk.Button):
         if self["state"] != "disabled":
             self["background"] = self.defaultBackground
 
+def when_done(widget, future, callback, interval_ms=None):
+    """Call a function on the Tk thread once a background future completes
+    
+    Args:
+        widget: Any widget, used for scheduling with after()
+        future: concurrent.futures.Future to watch
+        callback: Function called with the finished future
+        interval_ms: Polling interval (defaults to config.FUTURE_POLL_MS)
+    """
+    interval_ms = interval_ms or config.FUTURE_POLL_MS
+    
+    def check():
+        if not widget.winfo_exists():
+            return
+        if future.done():
+            callback(future)
+        else:
+            widget.after(interval_ms, check)
+    
+    widget.after(interval_ms, check)
+
 def create_styles():
     """Create styles for widgets"""
     style = ttk.Style()
@@ -1,28 +1,186 @@
 import serial
 import serial.tools.list_ports
 import threading
+import queue
 import time
 import re
-from collections import defaultdict
+from collections import Counter, deque, namedtuple
 from tkinter import messagebox
 
+import config
+from weighbridge_metrics import WeighbridgeMetrics
+
+
+# Immutable snapshot of the latest weighbridge reading
+WeightReading = namedtuple('WeightReading', ['weight', 'stable', 'timestamp', 'seq', 'connected'])
+
+
+class WeightState:
+    """Latest weighbridge reading shared between the reader thread and the UI
+    
+    The processor thread publishes readings here; Tk code polls snapshot()
+    with after() instead of being called back from a non-Tk thread.
+    """
+    
+    def __init__(self):
+        """Initialize weight state with an empty, disconnected reading"""
+        self._lock = threading.Lock()
+        self._reading = WeightReading(0.0, False, 0.0, 0, False)
+    
+    def publish(self, weight, stable):
+        """Publish a new reading
+        
+        Args:
+            weight: Weight value in kg (float)
+            stable: True if the weight has settled
+        """
+        with self._lock:
+            previous = self._reading
+            self._reading = WeightReading(weight, stable, time.time(), previous.seq + 1, previous.connected)
+    
+    def set_connected(self, connected):
+        """Update the connection flag without publishing a new weight
+        
+        When the connection state changes the last reading is cleared (no
+        weight, seq 0), so a weight read before a disconnect is never taken
+        for the current one after reconnecting.
+        
+        Args:
+            connected: True if the weighbridge is connected
+        """
+        with self._lock:
+            if connected != self._reading.connected:
+                self._reading = WeightReading(0.0, False, 0.0, 0, connected)
+    
+    def snapshot(self):
+        """Get the latest reading
+        
+        Returns:
+            WeightReading: Latest published reading
+        """
+        with self._lock:
+            return self._reading
+
+
+class WeightFilter:
+    """Rolling window that turns raw readings into a settled weight
+    
+    The reported weight is the most common value in the window; it is flagged
+    stable once the window has filled and its spread is within tolerance.
+    """
+    
+    def __init__(self, size=None, tolerance=None):
+        """Initialize the filter
+        
+        Args:
+            size: Number of readings in the window (defaults to config)
+            tolerance: Max spread in kg for a stable window (defaults to config)
+        """
+        self.window = deque(maxlen=size or config.WEIGHT_WINDOW_SIZE)
+        self.tolerance = config.WEIGHT_STABLE_TOLERANCE if tolerance is None else tolerance
+    
+    def add(self, weights):
+        """Add parsed readings to the window
+        
+        Args:
+            weights: Iterable of weights (float)
+            
+        Returns:
+            tuple: (weight, stable) or None if the window is empty
+        """
+        self.window.extend(weights)
+        if not self.window:
+            return None
+        
+        most_common = Counter(self.window).most_common(1)[0][0]
+        stable = (len(self.window) == self.window.maxlen and
+                  max(self.window) - min(self.window) <= self.tolerance)
+        return most_common, stable
+    
+    def reset(self):
+        """Clear the window, e.g. after a reconnect"""
+        self.window.clear()
+
+
+def parse_weights(line):
+    """Extract weight values from a raw weighbridge line
+    
+    Args:
+        line: Raw line received from the indicator
+        
+    Returns:
+        list: Weights (float) found in the line
+    """
+    weights = []
+    # Clean the line - remove special characters
+    cleaned = re.sub(r'[^\d.]', '', line)
+    # Find all sequences of digits (with optional decimal point)
+    matches = re.findall(r'\d+\.?\d*', cleaned)
+    for match in matches:
+        if len(match) >= 6:  # At least 6 digits
+            try:
+                weights.append(float(match))
+            except ValueError:
+                pass
+    return weights
+
+
+def serial_port_settings(baud_rate, data_bits, parity, stop_bits):
+    """Convert UI connection settings to pyserial keyword arguments
+    
+    Args:
+        baud_rate: Baud rate (int)
+        data_bits: Data bits (int)
+        parity: Parity setting (string, first letter used)
+        stop_bits: Stop bits (float)
+        
+    Returns:
+        dict: Keyword arguments for serial.Serial
+    """
+    # Convert parity to serial.PARITY_* value
+    parity_map = {
+        'N': serial.PARITY_NONE,
+        'O': serial.PARITY_ODD,
+        'E': serial.PARITY_EVEN,
+        'M': serial.PARITY_MARK,
+        'S': serial.PARITY_SPACE
+    }
+    
+    # Convert stop bits
+    stop_bits_map = {
+        1.0: serial.STOPBITS_ONE,
+        1.5: serial.STOPBITS_ONE_POINT_FIVE,
+        2.0: serial.STOPBITS_TWO
+    }
+    
+    return {
+        'baudrate': baud_rate,
+        'bytesize': data_bits,
+        'parity': parity_map.get(parity[0].upper(), serial.PARITY_NONE),
+        'stopbits': stop_bits_map.get(stop_bits, serial.STOPBITS_ONE)
+    }
+
 
 class WeighbridgeManager:
     """Class to manage weighbridge connection and data processing"""
     
-    def __init__(self, update_callback=None):
+    def __init__(self, update_callback=None, weight_state=None):
         """Initialize weighbridge manager
         
         Args:
-            update_callback: Function to call when weight is updated
+            update_callback: Function to call when weight is updated. Called from
+                the processor thread, so it must not touch Tk widgets.
+            weight_state: WeightState to publish readings to (created if None)
         """
         self.serial_port = None
         self.weighbridge_connected = False
-        self.weight_buffer = []
+        self.weight_buffer = queue.Queue(maxsize=config.WEIGHT_BUFFER_SIZE)
         self.weight_processing = False
         self.weight_thread = None
         self.weight_update_thread = None
         self.update_callback = update_callback
+        self.weight_state = weight_state if weight_state is not None else WeightState()
+        self.metrics = WeighbridgeMetrics()
     
     def get_available_ports(self):
         """Get list of available COM ports"""
@@ -45,36 +203,16 @@ class WeighbridgeManager:
             return False
         
         try:
-            # Convert parity to serial.PARITY_* value
-            parity_map = {
-                'N': serial.PARITY_NONE,
-                'O': serial.PARITY_ODD,
-                'E': serial.PARITY_EVEN,
-                'M': serial.PARITY_MARK,
-                'S': serial.PARITY_SPACE
-            }
-            parity = parity_map.get(parity[0].upper(), serial.PARITY_NONE)
-            
-            # Convert stop bits
-            stop_bits_map = {
-                1.0: serial.STOPBITS_ONE,
-                1.5: serial.STOPBITS_ONE_POINT_FIVE,
-                2.0: serial.STOPBITS_TWO
-            }
-            stop_bits = stop_bits_map.get(stop_bits, serial.STOPBITS_ONE)
-            
             # Create serial connection
             self.serial_port = serial.Serial(
                 port=com_port,
-                baudrate=baud_rate,
-                bytesize=data_bits,
-                parity=parity,
-                stopbits=stop_bits,
-                timeout=1
+                timeout=1,
+                **serial_port_settings(baud_rate, data_bits, parity, stop_bits)
             )
             
             # Start processing
             self.weighbridge_connected = True
+            self.weight_state.set_connected(True)
             
             # Start weight reading thread
             self.weight_thread = threading.Thread(target=self._read_weighbridge_data, daemon=True)
@@ -102,6 +240,7 @@ class WeighbridgeManager:
         try:
             self.weight_processing = False
             self.weighbridge_connected = False
+            self.weight_state.set_connected(False)
             
             if self.weight_thread and self.weight_thread.is_alive():
                 self.weight_thread.join(1.0)
@@ -123,54 +262,57 @@ class WeighbridgeManager:
         """Read data from weighbridge in a separate thread"""
         while self.weighbridge_connected and self.serial_port:
             try:
-                if self.serial_port.in_waiting > 0:
-                    line = self.serial_port.readline().decode('ascii', errors='ignore').strip()
-                    if line:
-                        self.weight_buffer.append(line)
+                # readline blocks for up to the port timeout, so no busy polling is needed
+                raw = self.serial_port.readline()
+                if raw:
+                    self.metrics.record_bytes(len(raw))
+                line = raw.decode('ascii', errors='ignore').strip()
+                if line:
+                    item = (time.perf_counter(), line)
+                    try:
+                        self.weight_buffer.put_nowait(item)
+                    except queue.Full:
+                        # Processor has fallen behind - drop the oldest line
+                        try:
+                            self.weight_buffer.get_nowait()
+                            self.metrics.record_drop()
+                        except queue.Empty:
+                            pass
+                        self.weight_buffer.put_nowait(item)
             except Exception as e:
                 print(f"Weighbridge read error: {str(e)}")
                 time.sleep(0.1)
     
     def _process_weighbridge_data(self):
         """Process weighbridge data to find most common valid weight"""
+        weight_filter = WeightFilter()
+        
         while self.weight_processing:
             try:
-                if not self.weight_buffer:
-                    time.sleep(0.1)
+                try:
+                    received, line = self.weight_buffer.get(timeout=0.1)
+                except queue.Empty:
                     continue
                 
-                # Process data in 20-second windows
-                start_time = time.time()
-                window_data = []
+                weights = parse_weights(line)
+                self.metrics.record_frame(bool(weights))
+                self.metrics.set_queue_depth(self.weight_buffer.qsize())
+                
+                result = weight_filter.add(weights)
+                if result is None:
+                    continue
                 
-                while time.time() - start_time < 20 and self.weight_processing:
-                    if self.weight_buffer:
-                        line = self.weight_buffer.pop(0)
-                        # Clean the line - remove special characters
-                        cleaned = re.sub(r'[^\d.]', '', line)
-                        # Find all sequences of digits (with optional decimal point)
-                        matches = re.findall(r'\d+\.?\d*', cleaned)
-                        for match in matches:
-                            if len(match) >= 6:  # At least 6 digits
-                                try:
-                                    weight = float(match)
-                                    window_data.append(weight)
-                                except ValueError:
-                                    pass
-                    time.sleep(0.05)
+                weight, stable = result
+                self.weight_state.publish(weight, stable)
+                self.metrics.record_reading(weight, stable)
+                self.metrics.record_publish_latency(time.perf_counter() - received)
                 
-                if window_data:
-                    # Find the most common weight in the window
-                    freq = defaultdict(int)
-                    for weight in window_data:
-                        freq[weight] += 1
-                    
-                    if freq:
-                        most_common = max(freq.items(), key=lambda x: x[1])[0]
-                        # Update with the new weight through callback
-                        if self.update_callback:
-                            self.update_callback(most_common)
+                # Notify non-UI listeners
+                if self.update_callback:
+                    started = time.perf_counter()
+                    self.update_callback(weight)
+                    self.metrics.record_callback(time.perf_counter() - started)
                 
             except Exception as e:
                 print(f"Weight processing error: {str(e)}")
-                time.sleep(1)
\ No newline at end of file
+                time.sleep(1)
@@ -0,0 +1,284 @@
+import asyncio
+import threading
+import time
+import serial
+import serial.tools.list_ports
+
+import config
+from weighbridge import WeightState, WeightFilter, parse_weights, serial_port_settings
+from weighbridge_metrics import WeighbridgeMetrics
+
+# pyserial-asyncio is optional - fall back to polling a non-blocking port
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+
+# Single event loop shared by every async weighbridge, run on one daemon thread
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """Get the shared weighbridge event loop, starting it on first use
+    
+    Returns:
+        asyncio.AbstractEventLoop: Running event loop
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="weighbridge-io", daemon=True)
+            thread.start()
+        return _loop
+
+
+class AsyncWeighbridgeManager:
+    """Weighbridge manager built on asyncio
+    
+    Drop-in alternative to WeighbridgeManager. Each connected device runs as a
+    single task on a shared event loop instead of two free-running threads.
+    """
+    
+    def __init__(self, update_callback=None, weight_state=None):
+        """Initialize async weighbridge manager
+        
+        Args:
+            update_callback: Function to call when weight is updated. Called from
+                the event loop thread, so it must not touch Tk widgets.
+            weight_state: WeightState to publish readings to (created if None)
+        """
+        self.weighbridge_connected = False
+        self.update_callback = update_callback
+        self.weight_state = weight_state if weight_state is not None else WeightState()
+        self.metrics = WeighbridgeMetrics()
+        self.loop = None
+        self._task = None
+        self._subscribers = set()
+    
+    def get_available_ports(self):
+        """Get list of available COM ports"""
+        return [port.device for port in serial.tools.list_ports.comports()]
+    
+    def connect(self, com_port, baud_rate, data_bits, parity, stop_bits):
+        """Connect to weighbridge with specified parameters
+        
+        The first open is done synchronously so configuration errors are raised
+        to the caller; later drops are handled by reconnecting with backoff.
+        
+        Args:
+            com_port: COM port name
+            baud_rate: Baud rate (int)
+            data_bits: Data bits (int)
+            parity: Parity setting (string, first letter used)
+            stop_bits: Stop bits (float)
+        
+        Returns:
+            bool: True if connected successfully, False otherwise
+        """
+        if not com_port:
+            return False
+        
+        if self.weighbridge_connected:
+            self.disconnect()
+        
+        self.loop = get_event_loop()
+        port_settings = serial_port_settings(baud_rate, data_bits, parity, stop_bits)
+        
+        # Open once up front - raises on bad port or settings
+        connection = asyncio.run_coroutine_threadsafe(
+            self._open(com_port, port_settings), self.loop).result()
+        
+        self.weighbridge_connected = True
+        self.weight_state.set_connected(True)
+        self._task = asyncio.run_coroutine_threadsafe(
+            self._start_device(com_port, port_settings, connection), self.loop).result()
+        return True
+    
+    def disconnect(self):
+        """Disconnect from weighbridge
+        
+        Cancels the device task and waits until the port has been closed.
+        
+        Returns:
+            bool: True if disconnected successfully, False otherwise
+        """
+        try:
+            self.weighbridge_connected = False
+            self.weight_state.set_connected(False)
+            
+            if self._task and self.loop and not self.loop.is_closed():
+                asyncio.run_coroutine_threadsafe(self._cancel_task(), self.loop).result()
+            self._task = None
+            
+            return True
+        
+        except Exception as e:
+            print(f"Error disconnecting weighbridge: {e}")
+            return False
+    
+    async def readings(self, maxsize=100):
+        """Async stream of parsed readings
+        
+        Must be iterated on the weighbridge event loop, e.g. from a coroutine
+        scheduled with submit(). Slow consumers lose the oldest readings.
+        
+        Args:
+            maxsize: Readings buffered per subscriber
+        
+        Yields:
+            WeightReading: Each reading as it is published
+        """
+        subscriber = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                yield await subscriber.get()
+        finally:
+            self._subscribers.discard(subscriber)
+    
+    def submit(self, coro):
+        """Run a coroutine (e.g. a readings() consumer) on the weighbridge loop
+        
+        Args:
+            coro: Coroutine to schedule
+        
+        Returns:
+            concurrent.futures.Future: Future for the coroutine result
+        """
+        if self.loop is None:
+            self.loop = get_event_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    async def _start_device(self, com_port, port_settings, connection):
+        """Create the device task on the loop"""
+        return asyncio.get_running_loop().create_task(
+            self._run_device(com_port, port_settings, connection))
+    
+    async def _cancel_task(self):
+        """Cancel the device task and wait for it to finish cleaning up"""
+        task = self._task
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def _open(self, com_port, port_settings):
+        """Open the serial port
+        
+        Returns:
+            tuple: (line iterator, close function)
+        """
+        if serial_asyncio:
+            reader, writer = await serial_asyncio.open_serial_connection(url=com_port, **port_settings)
+            return self._stream_lines(reader), writer.close
+        
+        port = serial.Serial(port=com_port, timeout=0, **port_settings)
+        return self._poll_lines(port), port.close
+    
+    async def _stream_lines(self, reader):
+        """Yield lines from an asyncio serial stream"""
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise serial.SerialException("Serial stream closed")
+            self.metrics.record_bytes(len(line))
+            yield line.decode('ascii', errors='ignore').strip()
+    
+    async def _poll_lines(self, port):
+        """Yield lines from a non-blocking serial port"""
+        buffer = bytearray()
+        while True:
+            waiting = port.in_waiting
+            if not waiting:
+                await asyncio.sleep(config.WEIGHBRIDGE_POLL_INTERVAL)
+                continue
+            
+            data = port.read(waiting)
+            self.metrics.record_bytes(len(data))
+            buffer += data
+            *lines, rest = buffer.split(b'\n')
+            buffer = bytearray(rest)
+            for line in lines:
+                yield line.decode('ascii', errors='ignore').strip()
+    
+    async def _run_device(self, com_port, port_settings, connection):
+        """Read, parse and publish readings, reconnecting when the port drops"""
+        weight_filter = WeightFilter()
+        delay = config.WEIGHBRIDGE_RECONNECT_INITIAL
+        
+        while True:
+            lines, close = connection
+            try:
+                async for line in lines:
+                    if not line:
+                        continue
+                    
+                    # A bad line must not end the device task
+                    try:
+                        received = time.perf_counter()
+                        weights = parse_weights(line)
+                        self.metrics.record_frame(bool(weights))
+                        
+                        result = weight_filter.add(weights)
+                        if result is None:
+                            continue
+                        
+                        self._publish(*result)
+                        self.metrics.record_publish_latency(time.perf_counter() - received)
+                        delay = config.WEIGHBRIDGE_RECONNECT_INITIAL
+                    except Exception as e:
+                        print(f"Weighbridge processing error: {str(e)}")
+            
+            except (serial.SerialException, OSError) as e:
+                print(f"Weighbridge read error: {str(e)}")
+            except Exception as e:
+                # Unexpected error from the port - reopen it like a dropped port
+                print(f"Weighbridge read error: {str(e)}")
+            finally:
+                await lines.aclose()
+                close()
+            
+            # Port dropped (e.g. USB-serial adapter unplugged) - retry with backoff
+            self.weight_state.set_connected(False)
+            weight_filter.reset()
+            while True:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, config.WEIGHBRIDGE_RECONNECT_MAX)
+                try:
+                    connection = await self._open(com_port, port_settings)
+                    self.weight_state.set_connected(True)
+                    break
+                except (serial.SerialException, OSError) as e:
+                    print(f"Weighbridge reconnect failed: {str(e)}")
+    
+    def _publish(self, weight, stable):
+        """Publish a reading to the weight state, callback and subscribers"""
+        self.weight_state.publish(weight, stable)
+        self.metrics.record_reading(weight, stable)
+        reading = self.weight_state.snapshot()
+        
+        # Notify non-UI listeners - a failing listener must not stop the others
+        if self.update_callback:
+            started = time.perf_counter()
+            try:
+                self.update_callback(weight)
+            except Exception as e:
+                print(f"Weight update callback error: {str(e)}")
+            self.metrics.record_callback(time.perf_counter() - started)
+        
+        depth = 0
+        for subscriber in self._subscribers:
+            try:
+                if subscriber.full():
+                    subscriber.get_nowait()
+                    self.metrics.record_drop()
+                subscriber.put_nowait(reading)
+                depth = max(depth, subscriber.qsize())
+            except Exception as e:
+                print(f"Weight subscriber error: {str(e)}")
+        self.metrics.set_queue_depth(depth)
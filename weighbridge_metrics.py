@@ -0,0 +1,298 @@
+import json
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import config
+
+
+class RateMeter:
+    """Events per second over a short sliding window of one-second buckets"""
+    
+    def __init__(self, window_seconds=5):
+        """Initialize rate meter
+        
+        Args:
+            window_seconds: Length of the averaging window in seconds
+        """
+        self.window_seconds = window_seconds
+        self.buckets = deque()  # [second, count]
+    
+    def add(self, count=1, now=None):
+        """Record events
+        
+        Args:
+            count: Number of events (e.g. bytes)
+            now: Current time (defaults to time.time())
+        """
+        second = int(now if now is not None else time.time())
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += count
+        else:
+            self.buckets.append([second, count])
+        self._expire(second)
+    
+    def rate(self, now=None):
+        """Get the average rate over the window
+        
+        Returns:
+            float: Events per second
+        """
+        second = int(now if now is not None else time.time())
+        self._expire(second)
+        return sum(count for _, count in self.buckets) / float(self.window_seconds)
+    
+    def _expire(self, second):
+        """Drop buckets older than the window"""
+        while self.buckets and self.buckets[0][0] <= second - self.window_seconds:
+            self.buckets.popleft()
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min, max and percentiles"""
+    
+    def __init__(self, bounds):
+        """Initialize histogram
+        
+        Args:
+            bounds: Sorted upper bounds of the buckets; an overflow bucket is added
+        """
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def observe(self, value):
+        """Record a value"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def percentile(self, fraction):
+        """Approximate percentile as the upper bound of the bucket containing it
+        
+        The bound is capped at the largest value recorded, so a percentile
+        never exceeds the maximum.
+        
+        Args:
+            fraction: Percentile as a fraction (e.g. 0.95)
+        
+        Returns:
+            float: Percentile value or None if empty
+        """
+        if not self.count:
+            return None
+        
+        target = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+    
+    def summary(self):
+        """Get histogram summary
+        
+        Returns:
+            dict: count, mean, min, max, p50, p95 and raw bucket counts
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["inf"], self.counts))
+        }
+
+
+class WeighbridgeMetrics:
+    """Live counters and histograms for one weighbridge
+    
+    Updated from the weighbridge I/O threads and read from the UI, so all
+    access goes through a lock.
+    """
+    
+    def __init__(self):
+        """Initialize metrics"""
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.bytes_total = 0
+        self.frames_total = 0
+        self.parse_failures = 0
+        self.dropped_frames = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.byte_rate = RateMeter()
+        self.frame_rate = RateMeter()
+        self.time_to_stable = Histogram([0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60])
+        self.callback_latency = Histogram([0.1, 0.5, 1, 2, 5, 10, 20, 50, 100])
+        self.publish_latency = Histogram([0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 500])
+        
+        # Time-to-stable tracking
+        self._settling_since = None
+        self._last_stable_weight = None
+    
+    def record_bytes(self, count):
+        """Record raw bytes received from the port"""
+        with self._lock:
+            self.bytes_total += count
+            self.byte_rate.add(count)
+    
+    def record_frame(self, parsed):
+        """Record a received line
+        
+        Args:
+            parsed: True if at least one weight was parsed from it
+        """
+        with self._lock:
+            if parsed:
+                self.frames_total += 1
+                self.frame_rate.add()
+            else:
+                self.parse_failures += 1
+    
+    def record_drop(self, count=1):
+        """Record frames dropped because a queue was full"""
+        with self._lock:
+            self.dropped_frames += count
+    
+    def set_queue_depth(self, depth):
+        """Record the current depth of the line queue"""
+        with self._lock:
+            self.queue_depth = depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+    
+    def record_reading(self, weight, stable, now=None):
+        """Track how long each new load takes to settle
+        
+        A weighment starts when an unstable weight moves away from the last
+        stable weight by more than the stability tolerance, and ends when the
+        reading is next flagged stable.
+        
+        Args:
+            weight: Published weight
+            stable: Published stable flag
+            now: Current time (defaults to time.time())
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            if stable:
+                if self._settling_since is not None:
+                    self.time_to_stable.observe(now - self._settling_since)
+                    self._settling_since = None
+                self._last_stable_weight = weight
+            elif self._settling_since is None:
+                moved = (self._last_stable_weight is None or
+                         abs(weight - self._last_stable_weight) > config.WEIGHT_STABLE_TOLERANCE)
+                if moved:
+                    self._settling_since = now
+    
+    def record_publish_latency(self, seconds):
+        """Record time from line received to reading published"""
+        with self._lock:
+            self.publish_latency.observe(seconds * 1000.0)
+    
+    def record_callback(self, seconds):
+        """Record time spent in the update callback"""
+        with self._lock:
+            self.callback_latency.observe(seconds * 1000.0)
+    
+    def snapshot(self):
+        """Get a consistent copy of all metrics
+        
+        Returns:
+            dict: Metrics suitable for display or JSON serialisation
+        """
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "bytes_total": self.bytes_total,
+                "bytes_per_s": self.byte_rate.rate(),
+                "frames_total": self.frames_total,
+                "frames_per_s": self.frame_rate.rate(),
+                "parse_failures": self.parse_failures,
+                "dropped_frames": self.dropped_frames,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "time_to_stable_s": self.time_to_stable.summary(),
+                "publish_latency_ms": self.publish_latency.summary(),
+                "callback_latency_ms": self.callback_latency.summary()
+            }
+
+
+class MetricsLogger:
+    """Periodically appends weighbridge metrics to a rolling log file
+    
+    Each line is a JSON object with a timestamp and one snapshot per lane.
+    """
+    
+    def __init__(self, lane_registry, filename=None, interval=None):
+        """Initialize metrics logger
+        
+        Args:
+            lane_registry: LaneRegistry whose weighbridges are sampled
+            filename: Metrics file (defaults to config.METRICS_FILE)
+            interval: Seconds between dumps (defaults to config.METRICS_DUMP_SECONDS)
+        """
+        self.lane_registry = lane_registry
+        self.interval = interval or config.METRICS_DUMP_SECONDS
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.logger = logging.getLogger("weighbridge.metrics")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(filename or config.METRICS_FILE,
+                                          maxBytes=config.METRICS_MAX_BYTES,
+                                          backupCount=config.METRICS_BACKUP_COUNT)
+            self.logger.addHandler(handler)
+    
+    def start(self):
+        """Start dumping metrics in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weighbridge-metrics", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread after a final dump"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(1.0)
+    
+    def dump(self):
+        """Write one metrics line for all lanes"""
+        lanes = {}
+        for lane in self.lane_registry:
+            snapshot = lane.weighbridge.metrics.snapshot()
+            snapshot["connected"] = lane.is_connected
+            lanes[lane.name] = snapshot
+        
+        self.logger.info(json.dumps({
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "lanes": lanes
+        }))
+    
+    def _run(self):
+        """Dump metrics every interval until stopped"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                print(f"Metrics dump error: {str(e)}")
+        try:
+            self.dump()
+        except Exception as e:
+            print(f"Metrics dump error: {str(e)}")